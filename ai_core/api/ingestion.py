@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ai_core.database import models, session
 from ai_core.api import schemas
+from ai_core.core.listened_cache import listened_cache
 
 router = APIRouter()
 
@@ -15,6 +16,7 @@ def ingest_user_event(
         db.add(db_event)
         db.commit()
         db.refresh(db_event)
+        listened_cache.add(db_event.user_id, db_event.song_id)
         return db_event
     except Exception as e:
         db.rollback()
@@ -0,0 +1,85 @@
+import time
+from typing import List, Tuple
+
+from decouple import config
+from fastapi import APIRouter, Response
+
+from ai_core.core.metrics import registry, request_duration, request_stages
+
+# --- Configuration ---
+SERVER_TIMING_ENABLED = config("SERVER_TIMING_ENABLED", default=True, cast=bool)
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Exposes all application metrics in the Prometheus text format."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def route_template(scope) -> str:
+    """
+    The matched route's path template, including any router prefix, or
+    "unmatched" for requests no route handled.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    # Routes of an included router may only know their own part of the path;
+    # whatever precedes it in the request path is the prefix.
+    try:
+        rendered = path_format.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return path_format
+    path = scope["path"]
+    return path[:len(path) - len(rendered)] + path_format if path.endswith(rendered) else path_format
+
+def server_timing_header(stages: List[Tuple[str, str, float]], total: float) -> str:
+    """
+    Formats timed stages as a Server-Timing header value, e.g.
+    `semantic_search.embed;dur=12.301, ..., total;dur=20.114`. Repeated
+    stages are summed.
+    """
+    durations = {}
+    for operation, stage, elapsed in stages:
+        name = f"{operation}.{stage}"
+        durations[name] = durations.get(name, 0.0) + elapsed
+    durations["total"] = total
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in durations.items())
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records each request's latency under its route
+    template (e.g. /api/v1/users/{user_id}/recommendations), so per-user
+    paths do not create a series each. Unmatched paths share one label.
+
+    It also collects the stages timed during the request and returns them
+    in a Server-Timing header, unless SERVER_TIMING_ENABLED is off.
+    """
+    def __init__(self, app, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        stages = []
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(stages, time.perf_counter() - start)
+                    message = dict(message, headers=list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))])
+            await send(message)
+
+        start = time.perf_counter()
+        token = request_stages.set(stages)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_stages.reset(token)
+            request_duration.observe(time.perf_counter() - start, scope["method"], route_template(scope), str(status[0]))
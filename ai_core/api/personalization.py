@@ -5,7 +5,7 @@ from typing import List
 
 # Import our custom project modules
 from ai_core.database import models, session
-from ai_core.core import fingerprint_engine, recommender_engine
+from ai_core.core import fingerprint_engine, recommender_engine, recommendation_store
 from ai_core.api import schemas
 
 router = APIRouter()
@@ -36,6 +36,9 @@ def generate_fingerprint(
         db.add(db_fingerprint)
     
     db.commit()
+
+    # The stored recommendation list was built from the old fingerprint.
+    recommendation_store.refresher.submit(user_id)
     
     return {"status": "success", "user_id": user_id, "message": "User fingerprint has been successfully generated/updated."}
 
@@ -44,17 +47,22 @@ def generate_fingerprint(
 def get_user_recommendations(
     user_id: int, 
     limit: int = 10,
-    db: Session = Depends(session.get_db_session)
+    db: Session = Depends(session.get_read_db_session)
 ):
     """
-    Generates and returns a list of personalized song recommendations
-    based on the user's calculated taste fingerprint.
+    Returns a list of personalized song recommendations based on the user's
+    calculated taste fingerprint, served from the user's materialized list
+    and computed live only when no list exists yet.
     """
-    recommendations = recommender_engine.get_recommendations(
-        user_id=user_id, 
-        db=db, 
-        limit=limit
-    )
+    recommendations = recommendation_store.get_stored_recommendations(user_id, db, limit)
+    if recommendations is None:
+        recommendations = recommender_engine.get_recommendations(
+            user_id=user_id, 
+            db=db, 
+            limit=limit
+        )
+        if recommendations:
+            recommendation_store.refresher.submit(user_id)
     if not recommendations:
         raise HTTPException(
             status_code=404, 
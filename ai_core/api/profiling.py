@@ -0,0 +1,104 @@
+import hmac
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from decouple import config
+
+from ai_core.core.profiler import SamplingProfiler
+
+# --- Configuration ---
+# Profiling is off unless an admin token is configured.
+PROFILING_ADMIN_TOKEN = config("PROFILING_ADMIN_TOKEN", default="")
+PROFILING_DIR = Path(config("PROFILING_DIR", default=str(Path(__file__).resolve().parent.parent / "data" / "profiles")))
+PROFILING_INTERVAL = config("PROFILING_INTERVAL", default=0.001, cast=float)
+PROFILING_TOP = config("PROFILING_TOP", default=25, cast=int)
+
+class ProfilingMiddleware:
+    """
+    Runs a request under the sampling profiler when it asks for it with an
+    `X-Profile: 1` header or a `profile=1` query parameter and carries the
+    admin token in `X-Admin-Token`. Other requests pass straight through,
+    including profile requests without a valid token.
+
+    The full report is written to PROFILING_DIR; the response names the file
+    in `X-Profile-Report` and lists the three hottest lines in `X-Profile-Top`.
+    Only one request is profiled at a time, since samples are process-wide;
+    a second one gets `X-Profile-Status: busy`.
+    """
+    def __init__(self, app, admin_token: str = PROFILING_ADMIN_TOKEN, output_dir=PROFILING_DIR,
+                 interval: float = PROFILING_INTERVAL, top: int = PROFILING_TOP):
+        self.app = app
+        self.admin_token = admin_token
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.top = top
+        self._busy = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        if not self.admin_token:
+            return False
+        headers = dict(scope.get("headers") or [])
+        flag = headers.get(b"x-profile", b"").decode("latin-1")
+        if not flag:
+            flag = (parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile") or [""])[0]
+        if flag.lower() not in ("1", "true", "yes"):
+            return False
+        token = headers.get(b"x-admin-token", b"")
+        return hmac.compare_digest(token, self.admin_token.encode())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    message = dict(message, headers=list(message.get("headers", [])) + [(b"x-profile-status", b"busy")])
+                await send(message)
+            await self.app(scope, receive, send_busy)
+            return
+
+        profiler = SamplingProfiler(self.interval)
+        response_start = []
+
+        async def send_after_profile(message):
+            # Holding back the response start lets the profile headers cover
+            # the whole handler; the body follows right after.
+            if message["type"] == "http.response.start":
+                response_start.append(message)
+                return
+            if response_start:
+                await send(self._with_profile(response_start.pop(), profiler, scope))
+            await send(message)
+
+        try:
+            profiler.start()
+            await self.app(scope, receive, send_after_profile)
+        finally:
+            profiler.stop()
+            self._busy.release()
+        if response_start:
+            await send(self._with_profile(response_start.pop(), profiler, scope))
+
+    def _with_profile(self, message, profiler: SamplingProfiler, scope):
+        profiler.stop()
+        report = profiler.report(self.top)
+        report.update(method=scope["method"], path=scope["path"], created_at=datetime.utcnow().isoformat())
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"profile-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.json"
+        path.write_text(json.dumps(report, indent=2))
+        print(f"Profiled {scope['method']} {scope['path']}: {report['samples']} samples written to {path}")
+
+        top = "; ".join(
+            f"{row['function']} ({Path(row['file']).name}:{row['line']}) {row['percent']}%" for row in report["top_self"][:3]
+        )
+        headers = list(message.get("headers", [])) + [
+            (b"x-profile-report", path.name.encode("latin-1")),
+            (b"x-profile-top", top.encode("latin-1", "replace")),
+        ]
+        return dict(message, headers=headers)
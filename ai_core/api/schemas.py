@@ -1,7 +1,7 @@
 import datetime
 import datetime
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 class UserEventCreate(BaseModel):
     user_id: int
@@ -25,3 +25,30 @@ class Song(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Structured constraints for semantic search, applied inside the vector query
+class SearchFilters(BaseModel):
+    bpm_min: Optional[float] = None
+    bpm_max: Optional[float] = None
+    key: Optional[str] = None
+    artist: Optional[str] = None
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.bpm_min is not None and self.bpm_max is not None and self.bpm_min > self.bpm_max:
+            raise ValueError("'bpm_min' cannot be greater than 'bpm_max'.")
+        if self.year_min is not None and self.year_max is not None and self.year_min > self.year_max:
+            raise ValueError("'year_min' cannot be greater than 'year_max'.")
+        return self
+
+# Request and response models for batch semantic search
+class SemanticSearchBatchRequest(BaseModel):
+    queries: List[str]
+    limit: int = Field(5, ge=1)
+    filters: Optional[SearchFilters] = None
+
+class SemanticSearchResult(BaseModel):
+    query: str
+    results: List[Song]
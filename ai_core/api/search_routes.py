@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import chromadb
+from decouple import config
 
 from ai_core.database import models, session
 from ai_core.api import schemas
 from ai_core.core import search_engine
 from ai_core.models.clip_embedder import SimpleClipEmbedder
+from ai_core.models.text_encoder import TEXT_ENCODER_BACKEND
 
 # --- API Setup & Initialization ---
 router = APIRouter()
@@ -14,31 +17,79 @@ router = APIRouter()
 # Initialize our AI and DB connections once when the server starts
 VECTOR_DB_PATH = "./data/vector_db"
 VECTOR_DB_COLLECTION = "song_thought_vectors"
+SEARCH_DEVICE = config("SEARCH_DEVICE", default="cpu")
+SEARCH_BATCH_MAX_QUERIES = config("SEARCH_BATCH_MAX_QUERIES", default=100, cast=int)
 chroma_client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
 vector_collection = chroma_client.get_or_create_collection(name=VECTOR_DB_COLLECTION)
-embedder = SimpleClipEmbedder(device="cpu") # Use CPU for API server
+# CPU by default for the API server; the text backend (fp32, int8, ONNX) is
+# chosen with TEXT_ENCODER_BACKEND.
+embedder = SimpleClipEmbedder(device=SEARCH_DEVICE, text_backend=TEXT_ENCODER_BACKEND)
 
 @router.get("/search/semantic", response_model=List[schemas.Song], tags=["Search"])
 def semantic_search_endpoint(
     q: str, 
-    limit: int = 5,
-    db: Session = Depends(session.get_db_session)
+    limit: int = Query(5, ge=1),
+    bpm_min: Optional[float] = None,
+    bpm_max: Optional[float] = None,
+    key: Optional[str] = None,
+    artist: Optional[str] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    db: Session = Depends(session.get_read_db_session)
 ):
     """
-    Performs semantic search for songs based on a natural language query.
+    Performs semantic search for songs based on a natural language query,
+    optionally restricted to a BPM range, a key, an artist or a year range.
     """
     if not q:
         raise HTTPException(status_code=400, detail="Query parameter 'q' cannot be empty.")
+    try:
+        filters = schemas.SearchFilters(
+            bpm_min=bpm_min, bpm_max=bpm_max, key=key, artist=artist, year_min=year_min, year_max=year_max
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e.errors()[0]["ctx"]["error"]))
     
     results = search_engine.semantic_search(
         query_text=q,
         db=db,
         vector_collection=vector_collection,
         embedder=embedder,
-        limit=limit
+        limit=limit,
+        filters=filters
     )
     
     if not results:
         raise HTTPException(status_code=404, detail="No matching songs found for your query.")
         
     return results
+
+@router.post("/search/semantic/batch", response_model=List[schemas.SemanticSearchResult], tags=["Search"])
+def semantic_search_batch_endpoint(
+    request: schemas.SemanticSearchBatchRequest,
+    db: Session = Depends(session.get_read_db_session)
+):
+    """
+    Performs several semantic searches in one request. Returns one ranked
+    result list per query, in request order; a query with no matches gets
+    an empty list.
+    """
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="'queries' cannot be empty.")
+    if len(request.queries) > SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {SEARCH_BATCH_MAX_QUERIES} queries are allowed per batch.")
+    if any(not query for query in request.queries):
+        raise HTTPException(status_code=400, detail="Queries cannot be empty strings.")
+
+    results = search_engine.semantic_search_batch(
+        queries=request.queries,
+        db=db,
+        vector_collection=vector_collection,
+        embedder=embedder,
+        limit=request.limit,
+        filters=request.filters
+    )
+    return [
+        schemas.SemanticSearchResult(query=query, results=songs)
+        for query, songs in zip(request.queries, results)
+    ]
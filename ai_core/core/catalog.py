@@ -0,0 +1,31 @@
+import datetime
+from sqlalchemy.orm import Session
+
+from ai_core.database import models
+
+CATALOG_STATE_ID = 1
+
+def get_catalog_version(db: Session) -> int:
+    """
+    Returns the current catalog version (0 if it has never been bumped).
+    """
+    state = db.get(models.CatalogState, CATALOG_STATE_ID)
+    return state.version if state else 0
+
+def bump_catalog_version(db: Session) -> int:
+    """
+    Increments the catalog version after songs or embeddings have changed,
+    invalidating everything derived from the old catalog.
+
+    Returns:
+        The new catalog version.
+    """
+    state = db.get(models.CatalogState, CATALOG_STATE_ID)
+    if state is None:
+        state = models.CatalogState(id=CATALOG_STATE_ID, version=0)
+        db.add(state)
+    state.version += 1
+    state.updated_at = datetime.datetime.utcnow()
+    db.commit()
+    print(f"Catalog version bumped to {state.version}.")
+    return state.version
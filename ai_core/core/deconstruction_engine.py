@@ -5,6 +5,8 @@ from demucs.pretrained import get_model
 from pathlib import Path
 from typing import Dict
 
+from ai_core.core.metrics import timed, timed_model_load
+
 def deconstruct_song(
     input_filepath: str, 
     output_directory: str
@@ -25,31 +27,35 @@ def deconstruct_song(
     Path(output_directory).mkdir(parents=True, exist_ok=True)
 
     # Load the pre-trained Demucs model
-    model = get_model(name='htdemucs')
+    with timed("deconstruct_song", "load_model"), timed_model_load("demucs_htdemucs"):
+        model = get_model(name='htdemucs')
     
     # Load the audio file
-    wav, sr = torchaudio.load(input_filepath)
+    with timed("deconstruct_song", "load_audio"):
+        wav, sr = torchaudio.load(input_filepath)
     
-    # The model expects a specific sample rate
-    resampler = torchaudio.transforms.Resample(sr, model.samplerate)
-    wav = resampler(wav)
+        # The model expects a specific sample rate
+        resampler = torchaudio.transforms.Resample(sr, model.samplerate)
+        wav = resampler(wav)
     
     # Separate the audio into stems
-    ref = wav.mean(0)
-    wav = (wav - ref.mean()) / ref.std()
-    sources = apply_model(model, wav[None], device="cpu")[0] # Run on CPU for compatibility
-    sources = sources * ref.std() + ref.mean()
+    with timed("deconstruct_song", "separate"):
+        ref = wav.mean(0)
+        wav = (wav - ref.mean()) / ref.std()
+        sources = apply_model(model, wav[None], device="cpu")[0] # Run on CPU for compatibility
+        sources = sources * ref.std() + ref.mean()
 
     # Define the names for the output stems
     stem_names = ['drums', 'bass', 'other', 'vocals']
     output_paths = {}
 
     # Save each stem to a new file
-    for i, name in enumerate(stem_names):
-        stem_path = Path(output_directory) / f"{name}.wav"
-        torchaudio.save(str(stem_path), sources[i].cpu(), model.samplerate)
-        output_paths[name] = str(stem_path)
-        print(f"  - Saved stem: {stem_path}")
+    with timed("deconstruct_song", "save_stems"):
+        for i, name in enumerate(stem_names):
+            stem_path = Path(output_directory) / f"{name}.wav"
+            torchaudio.save(str(stem_path), sources[i].cpu(), model.samplerate)
+            output_paths[name] = str(stem_path)
+            print(f"  - Saved stem: {stem_path}")
         
     print("Deconstruction complete.")
     return output_paths
@@ -0,0 +1,177 @@
+import time
+import queue
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from decouple import config
+from sqlalchemy import bindparam
+
+from ai_core.database import models
+from ai_core.database.session import SessionLocal
+from ai_core.core.lookup_cache import lookup_cache
+
+# --- Configuration ---
+# Requests per second allowed against each remote service. MusicBrainz asks
+# clients to stay at or below one request per second.
+MUSICBRAINZ_RATE_LIMIT = config("MUSICBRAINZ_RATE_LIMIT", default=1.0, cast=float)
+GENIUS_RATE_LIMIT = config("GENIUS_RATE_LIMIT", default=4.0, cast=float)
+ENRICHMENT_WORKERS = config("ENRICHMENT_WORKERS", default=8, cast=int)
+ENRICHMENT_BATCH_SIZE = config("ENRICHMENT_BATCH_SIZE", default=50, cast=int)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `acquire()` blocks until a token is available,
+    refilling at `rate` tokens per second up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def rate_limited(bucket: TokenBucket, fetch: Callable) -> Callable:
+    """Wraps a fetcher so every remote call first takes a token from `bucket`."""
+    def wrapper(*args, **kwargs):
+        bucket.acquire()
+        return fetch(*args, **kwargs)
+    return wrapper
+
+# Shared by every enrichment worker in the process, so the limits hold no
+# matter how many stages or threads are running.
+rate_limits = {
+    "lyrics": TokenBucket(GENIUS_RATE_LIMIT),
+    "metadata": TokenBucket(MUSICBRAINZ_RATE_LIMIT),
+}
+
+def enrichment_services(names: Iterable[str] = ("lyrics", "metadata")) -> Dict[str, tuple]:
+    """
+    Returns {name: (cache service name, rate-limited fetcher)} for the
+    requested services ("lyrics" and/or "metadata").
+    """
+    services = {}
+    # Imported lazily so callers that only need lyrics don't require the
+    # MusicBrainz client, and the other way round.
+    if "lyrics" in names:
+        from ai_core.core import lyric_fetcher
+        services["lyrics"] = (lyric_fetcher.LYRICS_SERVICE, rate_limited(rate_limits["lyrics"], lyric_fetcher.fetch_lyrics))
+    if "metadata" in names:
+        from ai_core.core import metadata_enricher
+        services["metadata"] = (metadata_enricher.METADATA_SERVICE, rate_limited(rate_limits["metadata"], metadata_enricher.fetch_metadata))
+    return services
+
+def enrich_song(services: Dict[str, tuple], artist: str, title: str, timings=None) -> Dict[str, Optional[object]]:
+    """
+    Looks up one song through the lookup cache for each of `services`. With
+    a pipeline StepTimings, each lookup is timed as "enrich.<service name>".
+    """
+    result = {}
+    for name, (service, fetch) in services.items():
+        try:
+            with timings.time(f"enrich.{name}") if timings is not None else nullcontext():
+                result[name] = lookup_cache.cached(service, fetch, artist, title)
+        except Exception as e:
+            print(f"ERROR: {name} enrichment failed for '{title}' by '{artist}': {e}")
+            result[name] = None
+    return result
+
+class EnrichmentStage:
+    """
+    Runs lyric and metadata lookups for many songs concurrently, off the audio
+    analysis path. Lookups go through the lookup cache, so only cache misses
+    are rate limited. Lyrics and release years are written back to the songs
+    table in batches by a single writer thread, only where still missing.
+
+    Usage:
+        with EnrichmentStage() as enrichment:
+            for song in songs:
+                enrichment.submit(song.id, song.artist, song.title)
+                ...  # audio work continues meanwhile
+        results = enrichment.results
+    """
+    def __init__(self, services: Iterable[str] = ("lyrics", "metadata"), max_workers: int = ENRICHMENT_WORKERS,
+                 batch_size: int = ENRICHMENT_BATCH_SIZE, session_factory=SessionLocal):
+        self.services = enrichment_services(services)
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self.results: Dict[int, Dict[str, Optional[object]]] = {}
+        self.written = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrichment")
+        self._completed = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="enrichment-writer", daemon=True)
+        self._writer.start()
+
+    def submit(self, song_id: int, artist: str, title: str) -> None:
+        self._executor.submit(self._enrich, song_id, artist, title)
+
+    def _enrich(self, song_id, artist, title):
+        self._completed.put((song_id, enrich_song(self.services, artist, title)))
+
+    def _write_loop(self):
+        batch = []
+        while True:
+            item = self._completed.get()
+            if item is not None:
+                song_id, result = item
+                self.results[song_id] = result
+                year = (result.get("metadata") or {}).get("year")
+                row = {
+                    "b_id": song_id,
+                    "b_lyrics": result.get("lyrics"),
+                    "b_year": int(year) if year and str(year).isdigit() else None,
+                }
+                if row["b_lyrics"] or row["b_year"] is not None:
+                    batch.append(row)
+            if batch and (item is None or len(batch) >= self.batch_size):
+                self._write_batch(batch)
+                batch = []
+            if item is None:
+                return
+
+    def _write_batch(self, batch):
+        db = self.session_factory()
+        try:
+            # Only fill in lyrics and years that are still missing.
+            songs = models.Song.__table__
+            for column, field in ((songs.c.lyrics, "b_lyrics"), (songs.c.year, "b_year")):
+                rows = [{"b_id": row["b_id"], field: row[field]} for row in batch if row[field] is not None]
+                if rows:
+                    db.connection().execute(
+                        songs.update()
+                        .where(songs.c.id == bindparam("b_id"), column.is_(None))
+                        .values({column.name: bindparam(field)}),
+                        rows,
+                    )
+            db.commit()
+            self.written += len(batch)
+        except Exception as e:
+            db.rollback()
+            print(f"ERROR: Could not write a batch of {len(batch)} enrichment results: {e}")
+        finally:
+            db.close()
+
+    def close(self) -> None:
+        """Waits for every submitted lookup and flushes the last batch."""
+        self._executor.shutdown(wait=True)
+        self._completed.put(None)
+        self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
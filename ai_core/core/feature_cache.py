@@ -0,0 +1,77 @@
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from decouple import config
+
+# --- Configuration ---
+FEATURE_CACHE_DIR = Path(config("FEATURE_CACHE_DIR", default=str(Path(__file__).resolve().parent.parent / "data" / "features")))
+# "uint8" stores exactly the pixels the CLIP embedder renders, so it is
+# lossless for that model; "float16" keeps more precision for other backends.
+FEATURE_CACHE_DTYPE = config("FEATURE_CACHE_DTYPE", default="uint8")
+FEATURE_CACHE_ENABLED = config("FEATURE_CACHE_ENABLED", default=True, cast=bool)
+
+def file_hash(path, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a file, so renamed or moved files keep their features."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class FeatureCache:
+    """
+    On-disk cache of normalized log-mel spectrograms, one .npy file per song,
+    keyed by the audio file's content hash and the spectrogram parameters.
+
+    Layout: <root>/<params digest>/<hash[:2]>/<hash>.npy, with the parameters
+    themselves written to <root>/<params digest>/params.json.
+    """
+    def __init__(self, params: Dict, root=FEATURE_CACHE_DIR, dtype: str = FEATURE_CACHE_DTYPE):
+        if dtype not in ("uint8", "float16"):
+            raise ValueError(f"Unsupported feature dtype: {dtype}")
+        self.params = dict(params, dtype=dtype)
+        self.dtype = dtype
+        params_digest = hashlib.sha1(json.dumps(self.params, sort_keys=True).encode()).hexdigest()[:12]
+        self.root = Path(root) / params_digest
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.npy"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Returns the stored spectrogram for a file hash, or None."""
+        try:
+            spectrogram = np.load(self._path(key))
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return spectrogram
+
+    def put(self, key: str, spectrogram: np.ndarray) -> None:
+        """Stores a normalized [0, 1] spectrogram in the cache's dtype."""
+        if self.dtype == "uint8":
+            stored = spectrogram if spectrogram.dtype == np.uint8 else (spectrogram * 255).astype(np.uint8)
+        else:
+            stored = spectrogram.astype(np.float16)
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        params_path = self.root / "params.json"
+        if not params_path.exists():
+            params_path.write_text(json.dumps(self.params, indent=2, sort_keys=True))
+        # Written to a temp file and renamed, so readers never see a partial array.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, stored)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
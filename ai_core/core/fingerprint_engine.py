@@ -21,14 +21,22 @@ def calculate_user_fingerprint(user_id: int, db: Session) -> Optional[np.ndarray
     """
     print(f"Calculating taste fingerprint for user_id: {user_id}...")
 
-    # Step 1: Query the UserEvent table for all "positive" listening events.
+    # Step 1: Query the UserEvent table for all "positive" listening events,
+    # including those the retention job has rolled up into UserEventDaily.
+    # UNION also removes the duplicates, like DISTINCT did.
     positive_events = (
         db.query(models.UserEvent.song_id)
         .filter(
             models.UserEvent.user_id == user_id,
             models.UserEvent.event_type == "SONG_PLAYED_FULL"
         )
-        .distinct()
+        .union(
+            db.query(models.UserEventDaily.song_id)
+            .filter(
+                models.UserEventDaily.user_id == user_id,
+                models.UserEventDaily.event_type == "SONG_PLAYED_FULL"
+            )
+        )
         .all()
     )
 
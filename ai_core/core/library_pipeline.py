@@ -0,0 +1,318 @@
+import os
+import re
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import librosa
+from decouple import config
+
+from ai_core.database import models
+from ai_core.database.session import SessionLocal, engine
+from ai_core.core.pipeline import Pipeline, Stage, Checkpoint, StepTimings
+from ai_core.core.enrichment import enrichment_services, enrich_song
+from ai_core.core.vector_metadata import song_metadata
+from ai_core.core.feature_cache import FeatureCache, FEATURE_CACHE_ENABLED, file_hash
+from ai_core.models.clip_embedder import (
+    load_audio, load_windows, compute_spectrograms, embedding_params, AUDIO_EMBEDDING_MODE
+)
+
+# --- Configuration ---
+PIPELINE_DECODE_WORKERS = config("PIPELINE_DECODE_WORKERS", default=4, cast=int)
+PIPELINE_DSP_WORKERS = config("PIPELINE_DSP_WORKERS", default=2, cast=int)
+PIPELINE_EMBED_BATCH_SIZE = config("PIPELINE_EMBED_BATCH_SIZE", default=8, cast=int)
+PIPELINE_ENRICH_WORKERS = config("PIPELINE_ENRICH_WORKERS", default=8, cast=int)
+PIPELINE_PERSIST_BATCH_SIZE = config("PIPELINE_PERSIST_BATCH_SIZE", default=32, cast=int)
+# Where run reports are written; by default a pipeline_reports folder next
+# to the SQLite database file.
+PIPELINE_REPORT_DIR = config("PIPELINE_REPORT_DIR", default="")
+
+def clean_text(text: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', (text or '').lower())
+
+def report_directory() -> Path:
+    if PIPELINE_REPORT_DIR:
+        return Path(PIPELINE_REPORT_DIR)
+    if engine.url.get_backend_name() == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        return Path(engine.url.database).resolve().parent / "pipeline_reports"
+    return Path(__file__).resolve().parent.parent / "data" / "pipeline_reports"
+
+def save_report(report: Dict[str, Any], directory=None) -> Path:
+    """Writes a pipeline run report as <name>-<timestamp>.json and returns its path."""
+    directory = Path(directory) if directory else report_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{report['pipeline']}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+class LibraryPipeline:
+    """
+    The library analysis pipeline shared by the genesis and analysis scripts:
+
+        discover -> match -> decode -> dsp -> embed -> enrich -> summarize -> persist
+
+    Each song is decoded once (the whole track, or only a few windows in
+    the "windowed" embedding mode); the audio feeds both the BPM estimate and
+    the spectrogram. Spectrograms are kept in the feature cache, so a song
+    that only needs re-embedding is not decoded at all. Work a song already
+    has in the database is skipped.
+
+    Args:
+        name: Pipeline name, used for logs.
+        metadata_path: The library's metadata.json.
+        audio_dir: Directory holding the .mp3 files.
+        embedder: A SimpleClipEmbedder.
+        summarizer: Optional object with `summarize_lyrics(lyrics, title, artist)`.
+        vector_collection: If given, audio embeddings are stored there, keyed
+            by song id, instead of in songs.clip_embedding.
+        store_audio_features: Whether to store bpm and clip_embedding on the song.
+        services: Enrichment lookups to run ("lyrics", "metadata").
+        checkpoint_path: Where to record finished songs for resuming.
+        feature_cache: Spectrogram cache; defaults to one for the embedder's
+            spectrogram parameters unless FEATURE_CACHE_ENABLED is off.
+        embedding_mode: "full" or "windowed"; see AUDIO_EMBEDDING_MODE.
+
+    Each run writes a JSON report (see `save_report`) with per-stage and
+    per-step timings (mp3 decode, beat_track, CLIP, Genius, MusicBrainz,
+    the summarizer, SQLite commits) and the slowest files.
+    """
+    def __init__(self, name: str, metadata_path, audio_dir, embedder, summarizer=None, vector_collection=None,
+                 store_audio_features: bool = True, services: Iterable[str] = ("lyrics",),
+                 checkpoint_path=None, feature_cache: Optional[FeatureCache] = None,
+                 embedding_mode: str = AUDIO_EMBEDDING_MODE, session_factory=SessionLocal):
+        self.name = name
+        self.metadata_path = Path(metadata_path)
+        self.audio_dir = Path(audio_dir)
+        self.embedder = embedder
+        self.summarizer = summarizer
+        self.vector_collection = vector_collection
+        self.store_audio_features = store_audio_features
+        self.services = enrichment_services(services)
+        self.checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        self.embedding_mode = embedding_mode
+        if feature_cache is None and FEATURE_CACHE_ENABLED:
+            feature_cache = FeatureCache(embedding_params(embedding_mode))
+        self.feature_cache = feature_cache
+        self.session_factory = session_factory
+
+    def run(self) -> Dict[str, Any]:
+        report = self.build().run()
+        path = save_report(report)
+        print(f"Run report written to {path}")
+        return report
+
+    def build(self) -> Pipeline:
+        self.timings = StepTimings()
+        audio_filenames = sorted(f for f in os.listdir(self.audio_dir) if f.endswith('.mp3'))
+        self._audio_index = [(fname, clean_text(os.path.splitext(fname)[0])) for fname in audio_filenames]
+        self._claimed = set()
+
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                models.Song.id, models.Song.filepath, models.Song.bpm,
+                models.Song.clip_embedding.isnot(None).label("has_embedding"),
+                models.Song.lyrics.isnot(None).label("has_lyrics"),
+                models.Song.lyric_summary.isnot(None).label("has_summary"), models.Song.year,
+            ).all()
+        finally:
+            db.close()
+        self._existing = {row.filepath: row for row in rows}
+        self._vector_ids = set(self.vector_collection.get(include=[])["ids"]) if self.vector_collection is not None else set()
+        print(f"Found {len(audio_filenames)} audio files and {len(rows)} songs already in the database.")
+
+        return Pipeline(
+            self.name,
+            self.discover(),
+            [
+                Stage("match", self.match),
+                Stage("decode", self.decode, workers=PIPELINE_DECODE_WORKERS),
+                Stage("dsp", self.dsp, workers=PIPELINE_DSP_WORKERS),
+                Stage("embed", self.embed, batch_size=PIPELINE_EMBED_BATCH_SIZE),
+                Stage("enrich", self.enrich, workers=PIPELINE_ENRICH_WORKERS),
+                Stage("summarize", self.summarize),
+                Stage("persist", self.persist, batch_size=PIPELINE_PERSIST_BATCH_SIZE),
+            ],
+            key=self.checkpoint_key,
+            checkpoint=self.checkpoint,
+            label=lambda item: item.get("filepath"),
+            timings=self.timings,
+        )
+
+    @staticmethod
+    def checkpoint_key(item: Dict[str, Any]) -> str:
+        """
+        The metadata entry's artist/title pair exactly as written. Unlike the
+        lookup cache key it is not normalized, so distinct entries never share
+        a checkpoint line; identical entries would claim the same file anyway.
+        """
+        metadata = item["metadata"]
+        return json.dumps([metadata.get('artist'), metadata.get('title')], ensure_ascii=False)
+
+    # --- Stages ---
+    def discover(self):
+        with open(self.metadata_path, 'r') as f:
+            metadata_list = json.load(f)
+        print(f"Found {len(metadata_list)} metadata entries.")
+        for metadata in metadata_list:
+            yield {"metadata": metadata}
+
+    def match(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        metadata = item["metadata"]
+        title, artist = metadata.get('title'), metadata.get('artist')
+        if not title or not artist:
+            return None
+
+        title_clean = clean_text(title)
+        artist_clean = clean_text(re.split(r',|&|ft\.', artist)[0].strip())
+        best_match = next((fname for fname, cleaned in self._audio_index if artist_clean in cleaned and title_clean in cleaned), None)
+        if not best_match:
+            print(f"WARNING: Could not find a matching audio file for '{title}' by '{artist}'.")
+            return None
+
+        filepath = str(self.audio_dir / best_match)
+        if filepath in self._claimed:
+            return None
+        self._claimed.add(filepath)
+
+        existing = self._existing.get(filepath)
+        needs_audio = needs_bpm = False
+        if self.store_audio_features:
+            needs_bpm = existing is None or not existing.bpm
+            needs_audio = needs_bpm or not existing.has_embedding
+        if self.vector_collection is not None:
+            needs_audio = needs_audio or existing is None or str(existing.id) not in self._vector_ids
+        needs_lyrics = bool(self.services.get("lyrics")) and (existing is None or not existing.has_lyrics)
+        needs_summary = self.summarizer is not None and (existing is None or not existing.has_summary)
+        # The release year feeds the year filters of semantic search.
+        needs_metadata = bool(self.services.get("metadata")) and (existing is None or existing.year is None)
+        if not (needs_audio or needs_lyrics or needs_summary or needs_metadata or existing is None):
+            return None
+
+        item.update(
+            filepath=filepath, title=title, artist=artist,
+            song_id=existing.id if existing else None,
+            needs_audio=needs_audio, needs_bpm=needs_bpm, needs_lyrics=needs_lyrics, needs_summary=needs_summary,
+            needs_metadata=needs_metadata,
+        )
+        return item
+
+    def decode(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if not item["needs_audio"]:
+            return item
+        try:
+            if self.feature_cache is not None:
+                with self.timings.time("decode.feature_cache_read"):
+                    item["file_hash"] = file_hash(item["filepath"])
+                    spectrogram = self.feature_cache.get(item["file_hash"])
+                if spectrogram is not None:
+                    item["spectrogram"] = spectrogram
+            # The waveform is only needed for a BPM estimate or a cache miss.
+            if item["needs_bpm"] or "spectrogram" not in item:
+                load = load_windows if self.embedding_mode == "windowed" else load_audio
+                with self.timings.time("decode.mp3"):
+                    item["y"], item["sr"] = load(item["filepath"])
+        except Exception as e:
+            print(f"Error processing file {item['filepath']}: {e}")
+        return item
+
+    def dsp(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        y = item.pop("y", None)
+        if y is not None:
+            sr = item.pop("sr")
+            if item["needs_bpm"]:
+                # Windowed audio gets one estimate per window and the median.
+                with self.timings.time("dsp.beat_track"):
+                    tempos = [np.atleast_1d(librosa.beat.beat_track(y=window, sr=sr)[0])[0] for window in np.atleast_2d(y)]
+                item["bpm"] = float(np.median(tempos))
+            if "spectrogram" not in item:
+                with self.timings.time("dsp.spectrogram"):
+                    item["spectrogram"] = compute_spectrograms(y, sr)
+                if self.feature_cache is not None:
+                    with self.timings.time("dsp.feature_cache_write"):
+                        self.feature_cache.put(item["file_hash"], item["spectrogram"])
+        return item
+
+    def embed(self, batch):
+        pending = [item for item in batch if "spectrogram" in item]
+        if pending:
+            try:
+                with self.timings.time("embed.clip_batch"):
+                    embeddings = self.embedder.embed_tracks([item["spectrogram"] for item in pending], batch_size=PIPELINE_EMBED_BATCH_SIZE)
+                for item, embedding in zip(pending, embeddings):
+                    item["embedding"] = embedding
+            except Exception as e:
+                print(f"Error embedding a batch of {len(pending)} files: {e}")
+            for item in pending:
+                del item["spectrogram"]
+        return batch
+
+    def enrich(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        wanted = {"lyrics": item["needs_lyrics"], "metadata": item["needs_metadata"]}
+        services = {name: service for name, service in self.services.items() if wanted[name]}
+        if services:
+            result = enrich_song(services, item["artist"], item["title"], timings=self.timings)
+            item["lyrics"] = result.get("lyrics")
+            item["enriched"] = result.get("metadata")
+        return item
+
+    def summarize(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if not item["needs_summary"]:
+            return item
+        lyrics = item.get("lyrics")
+        if not lyrics and item["song_id"] is not None:
+            db = self.session_factory()
+            try:
+                lyrics = db.query(models.Song.lyrics).filter(models.Song.id == item["song_id"]).scalar()
+            finally:
+                db.close()
+        if lyrics:
+            with self.timings.time("summarize.model"):
+                item["lyric_summary"] = self.summarizer.summarize_lyrics(lyrics=lyrics, title=item["title"], artist=item["artist"])
+        return item
+
+    def persist(self, batch):
+        db = self.session_factory()
+        try:
+            songs = []
+            for item in batch:
+                song = db.get(models.Song, item["song_id"]) if item["song_id"] is not None else None
+                if song is None:
+                    song = models.Song(filepath=item["filepath"], title=item["title"], artist=item["artist"])
+                    db.add(song)
+                if "bpm" in item:
+                    song.bpm = item["bpm"]
+                if self.store_audio_features and item.get("embedding") is not None:
+                    song.clip_embedding = item["embedding"].tobytes()
+                if item.get("lyrics") and not song.lyrics:
+                    song.lyrics = item["lyrics"]
+                if item.get("lyric_summary"):
+                    song.lyric_summary = item["lyric_summary"]
+                year = (item.get("enriched") or {}).get("year")
+                if year and str(year).isdigit():
+                    song.year = int(year)
+                songs.append(song)
+            with self.timings.time("persist.sqlite_commit"):
+                db.commit()
+
+            if self.vector_collection is not None:
+                vectors = [(song, item["embedding"]) for song, item in zip(songs, batch) if item.get("embedding") is not None]
+                if vectors:
+                    with self.timings.time("persist.vector_upsert"):
+                        self.vector_collection.upsert(
+                            ids=[str(song.id) for song, _ in vectors],
+                            embeddings=[embedding.tolist() for _, embedding in vectors],
+                            metadatas=[song_metadata(song) for song, _ in vectors]
+                        )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for item in batch:
+            item.pop("embedding", None)
+        return batch
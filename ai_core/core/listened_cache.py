@@ -0,0 +1,92 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict
+
+import numpy as np
+from decouple import config
+from sqlalchemy.orm import Session
+
+from ai_core.database import models
+
+# --- Configuration ---
+LISTENED_CACHE_MAX_USERS = config("LISTENED_CACHE_MAX_USERS", default=10000, cast=int)
+# Each API worker has its own cache; the TTL bounds how long events ingested
+# through another worker can go unseen here.
+LISTENED_CACHE_TTL = config("LISTENED_CACHE_TTL", default=300, cast=float)
+
+class ListenedSetCache:
+    """
+    Per-user set of song ids the user has already interacted with, kept as a
+    sorted int64 NumPy array so it can be applied to catalog scores as one
+    vectorized mask. Bounded by LRU eviction over users.
+    """
+    def __init__(self, max_users: int = LISTENED_CACHE_MAX_USERS, ttl: float = LISTENED_CACHE_TTL):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (loaded_at, sorted song ids)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, user_id: int, db: Session) -> np.ndarray:
+        rows = (
+            db.query(models.UserEvent.song_id).filter(models.UserEvent.user_id == user_id)
+            .union(db.query(models.UserEventDaily.song_id).filter(models.UserEventDaily.user_id == user_id))
+            .all()
+        )
+        return np.unique(np.fromiter((row.song_id for row in rows), dtype=np.int64, count=len(rows)))
+
+    def get(self, user_id: int, db: Session) -> np.ndarray:
+        """Returns the user's sorted listened song ids, loading them on a miss."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        song_ids = self._load(user_id, db)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), song_ids)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return song_ids
+
+    def add(self, user_id: int, song_id: int) -> None:
+        """Records a new interaction for a cached user; uncached users load lazily."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            loaded_at, song_ids = entry
+            pos = np.searchsorted(song_ids, song_id)
+            if pos < len(song_ids) and song_ids[pos] == song_id:
+                return
+            # Arrays handed out by get() are never mutated in place.
+            self._entries[user_id] = (loaded_at, np.insert(song_ids, pos, song_id))
+
+    def invalidate(self, user_id: int = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def exclusion_mask(self, user_id: int, db: Session, candidate_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask over `candidate_ids` that is True for already-heard songs."""
+        return np.isin(candidate_ids, self.get(user_id, db), assume_unique=True)
+
+listened_cache = ListenedSetCache()
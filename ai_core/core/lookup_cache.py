@@ -0,0 +1,163 @@
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from decouple import config
+
+# --- Configuration ---
+LOOKUP_CACHE_PATH = Path(config("LOOKUP_CACHE_PATH", default=str(Path(__file__).resolve().parent.parent / "data" / "lookup_cache.db")))
+LOOKUP_HIT_TTL_DAYS = config("LOOKUP_HIT_TTL_DAYS", default=90, cast=float)
+# "Not found" answers are re-checked sooner, since the remote data can appear later.
+LOOKUP_MISS_TTL_DAYS = config("LOOKUP_MISS_TTL_DAYS", default=7, cast=float)
+# Serve only from the cache and never call remote APIs.
+LOOKUP_OFFLINE = config("LOOKUP_OFFLINE", default=False, cast=bool)
+
+class TransientLookupError(Exception):
+    """
+    Raised by a fetcher when the remote service failed (network error, rate
+    limit, 5xx). Unlike a "not found" answer, these are never cached.
+    """
+
+# Scripts whose accents are folded away (é -> e, ά -> α). Combining marks on
+# other scripts, such as the kana voicing marks, tell letters apart and stay.
+_ACCENT_FOLDED_SCRIPTS = ("LATIN", "GREEK")
+
+def _strip_accents(text: str) -> str:
+    chars = []
+    folds = False
+    for char in unicodedata.normalize("NFKD", text):
+        if not unicodedata.combining(char):
+            folds = unicodedata.name(char, "").startswith(_ACCENT_FOLDED_SCRIPTS)
+        elif folds:
+            continue
+        chars.append(char)
+    return unicodedata.normalize("NFC", "".join(chars))
+
+def normalize_key(artist: str, title: str) -> str:
+    """
+    Builds the cache key for an artist/title pair: case, accents, punctuation
+    and "feat." credits are ignored so trivially different spellings share
+    one entry. Letters of every script are kept, and a non-empty name never
+    reduces to an empty key component.
+    """
+    def words(text):
+        return " ".join(re.sub(r"[\W_]+", " ", text).split())
+
+    def clean(text):
+        text = _strip_accents(text or "").casefold()
+        full = words(text)
+        text = re.sub(r"[(\[]\s*(?:feat|ft|featuring)\b[^)\]]*[)\]]", " ", text)
+        text = re.split(r"\s(?:feat\.?|ft\.?|featuring)\s", text)[0]
+        # A name made only of a credit or of punctuation keeps what it has.
+        return words(text) or full or " ".join(text.split())
+    return f"{clean(artist)}|{clean(title)}"
+
+class LookupCache:
+    """
+    Persistent SQLite cache for remote lookups keyed on (service, normalized
+    artist/title). Stores hits and misses with separate TTLs.
+    """
+    def __init__(self, path=LOOKUP_CACHE_PATH, hit_ttl_days=LOOKUP_HIT_TTL_DAYS,
+                 miss_ttl_days=LOOKUP_MISS_TTL_DAYS, offline=LOOKUP_OFFLINE):
+        self.path = Path(path)
+        self.hit_ttl = hit_ttl_days * 86400
+        self.miss_ttl = miss_ttl_days * 86400
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS lookup_cache (
+                    service TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    found INTEGER NOT NULL,
+                    value TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (service, key)
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def get(self, service: str, artist: str, title: str, allow_expired: bool = False) -> Optional[Tuple[bool, Any]]:
+        """
+        Returns (found, value) for a cached answer, or None if there is no
+        entry or it has expired. `found` is False for a cached miss.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT found, value, expires_at FROM lookup_cache WHERE service = ? AND key = ?",
+                (service, normalize_key(artist, title))
+            ).fetchone()
+        if row is None or (row[2] < time.time() and not allow_expired):
+            return None
+        return bool(row[0]), json.loads(row[1]) if row[1] is not None else None
+
+    def put(self, service: str, artist: str, title: str, value: Any) -> None:
+        """Stores a lookup result; a None value is stored as a miss."""
+        now = time.time()
+        found = value is not None
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO lookup_cache (service, key, found, value, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (service, normalize_key(artist, title), int(found), json.dumps(value) if found else None,
+                 now, now + (self.hit_ttl if found else self.miss_ttl))
+            )
+            conn.commit()
+
+    def cached(self, service: str, fetch: Callable[[str, str], Any], artist: str, title: str) -> Any:
+        """
+        Read-through lookup. Calls `fetch(artist, title)` only when there is
+        no fresh entry and the cache is not offline; in offline mode expired
+        entries are still served.
+        """
+        entry = self.get(service, artist, title, allow_expired=self.offline)
+        if entry is not None:
+            return entry[1]
+        if self.offline:
+            return None
+        try:
+            value = fetch(artist, title)
+        except TransientLookupError as e:
+            print(f"WARNING: {service} lookup for '{title}' by '{artist}' failed, not caching: {e}")
+            return None
+        self.put(service, artist, title, value)
+        return value
+
+    def prefetch(self, service: str, fetch: Callable[[str, str], Any], pairs: Iterable[Tuple[str, str]]) -> dict:
+        """
+        Warms the cache for many (artist, title) pairs, skipping fresh entries.
+
+        Returns:
+            Counts of pairs that were already cached, fetched as hits, fetched
+            as misses, or failed.
+        """
+        stats = {"cached": 0, "hits": 0, "misses": 0, "errors": 0}
+        for artist, title in pairs:
+            if self.get(service, artist, title) is not None:
+                stats["cached"] += 1
+                continue
+            if self.offline:
+                continue
+            try:
+                value = fetch(artist, title)
+            except TransientLookupError:
+                stats["errors"] += 1
+                continue
+            self.put(service, artist, title, value)
+            stats["hits" if value is not None else "misses"] += 1
+        return stats
+
+lookup_cache = LookupCache()
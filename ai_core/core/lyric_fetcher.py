@@ -2,15 +2,50 @@ import lyricsgenius
 from decouple import config
 from typing import Optional
 
+from ai_core.core.lookup_cache import lookup_cache, TransientLookupError
+
 # Fetch the access token from our .env file
 GENIUS_ACCESS_TOKEN = config("GENIUS_ACCESS_TOKEN")
 
 # Initialize the Genius API client
 genius = lyricsgenius.Genius(GENIUS_ACCESS_TOKEN, verbose=False, remove_section_headers=True)
 
+# Optional endpoint overrides, e.g. to point the client at a local stub server.
+for _root in ("API_ROOT", "PUBLIC_API_ROOT", "WEB_ROOT"):
+    _override = config(f"GENIUS_{_root}", default="")
+    if _override:
+        setattr(genius, _root, _override)
+
+LYRICS_SERVICE = "genius_lyrics"
+
+def fetch_lyrics(artist: str, title: str) -> Optional[str]:
+    """
+    Fetches lyrics directly from the Genius API, bypassing the lookup cache.
+
+    Returns:
+        The lyrics as a string, or None if Genius has no lyrics for the song.
+
+    Raises:
+        TransientLookupError: If the request itself failed.
+    """
+    try:
+        song = genius.search_song(title, artist)
+    except Exception as e:
+        raise TransientLookupError(e) from e
+    if song and song.lyrics:
+        # Clean up the lyrics by removing the first line (title) and "Embed" at the end
+        lines = song.lyrics.split('\n')
+        cleaned_lyrics = '\n'.join(lines[1:])
+        # Genius sometimes adds "Embed" at the very end of the string
+        if cleaned_lyrics.endswith("Embed"):
+             cleaned_lyrics = cleaned_lyrics[:-5].strip()
+        return cleaned_lyrics
+    return None
+
 def get_lyrics(artist: str, title: str) -> Optional[str]:
     """
-    Fetches lyrics for a given song from the Genius API.
+    Fetches lyrics for a given song, served from the lookup cache when a
+    fresh answer (including "not found") is already stored.
 
     Args:
         artist: The name of the song's artist.
@@ -19,17 +54,4 @@ def get_lyrics(artist: str, title: str) -> Optional[str]:
     Returns:
         The lyrics as a string, or None if not found or an error occurs.
     """
-    try:
-        song = genius.search_song(title, artist)
-        if song and song.lyrics:
-            # Clean up the lyrics by removing the first line (title) and "Embed" at the end
-            lines = song.lyrics.split('\n')
-            cleaned_lyrics = '\n'.join(lines[1:])
-            # Genius sometimes adds "Embed" at the very end of the string
-            if cleaned_lyrics.endswith("Embed"):
-                 cleaned_lyrics = cleaned_lyrics[:-5].strip()
-            return cleaned_lyrics
-        return None
-    except Exception as e:
-        print(f"An error occurred while fetching lyrics for {title} by {artist}: {e}")
-        return None
+    return lookup_cache.cached(LYRICS_SERVICE, fetch_lyrics, artist, title)
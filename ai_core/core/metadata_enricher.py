@@ -1,47 +1,76 @@
 import musicbrainzngs as mb
+from decouple import config
 from typing import Optional, Dict, Any
 
+from ai_core.core.lookup_cache import lookup_cache, TransientLookupError
+
 # --- Configuration ---
 # Set a user-agent, which is required by the MusicBrainz API
 mb.set_useragent("Acytel AI", "1.0", "https://github.com/technicalcode578-collab/ai-2-0-core")
 
-def enrich_metadata(artist: str, title: str) -> Optional[Dict[str, Any]]:
-    """
-    Enriches song metadata by searching the MusicBrainz database.
+# Optional host override, e.g. a mirror or a local stub server ("localhost:5000").
+MUSICBRAINZ_HOST = config("MUSICBRAINZ_HOST", default="")
+if MUSICBRAINZ_HOST:
+    mb.set_hostname(MUSICBRAINZ_HOST, use_https=config("MUSICBRAINZ_HTTPS", default=False, cast=bool))
 
-    Args:
-        artist: The name of the song's artist.
-        title: The title of the song.
+METADATA_SERVICE = "musicbrainz_recording"
+
+def fetch_metadata(artist: str, title: str) -> Optional[Dict[str, Any]]:
+    """
+    Searches MusicBrainz directly, bypassing the lookup cache.
 
     Returns:
-        A dictionary containing enriched metadata (like year and tags),
-        or None if no definitive match is found.
+        The enriched metadata, or None if there is no confident match or
+        the response could not be read.
+
+    Raises:
+        TransientLookupError: If the request itself failed.
     """
     try:
         # Search for recordings that match the artist and title
         result = mb.search_recordings(artist=artist, recording=title, limit=1)
-        
+    except Exception as e:
+        raise TransientLookupError(e) from e
+
+    try:
         # Check if we found a confident match
         if result['recording-list'] and int(result['recording-list'][0]['ext:score']) > 90:
             recording = result['recording-list'][0]
-            
+
             enriched_data = {}
-            
-            # Extract the release year
+
+            # Extract the release year; the XML search results musicbrainzngs
+            # parses only carry it on the recording's releases.
             if 'first-release-date' in recording:
                 enriched_data['year'] = recording['first-release-date'].split('-')[0]
-            
+            else:
+                dates = [release['date'] for release in recording.get('release-list', []) if release.get('date')]
+                if dates:
+                    enriched_data['year'] = min(dates).split('-')[0]
+
             # Extract official genre tags
             if 'tag-list' in recording:
                 enriched_data['tags'] = [tag['name'] for tag in recording['tag-list']]
 
             return enriched_data
-            
-        return None
-    except mb.WebServiceError as exc:
-        print(f"ERROR: Could not connect to MusicBrainz for '{title}': {exc}")
+
         return None
     except Exception as e:
-        print(f"An unexpected error occurred during metadata enrichment for '{title}': {e}")
+        # A malformed answer is treated (and cached) as "no confident match".
+        print(f"An unexpected error occurred while reading MusicBrainz results for '{title}': {e}")
         return None
 
+def enrich_metadata(artist: str, title: str) -> Optional[Dict[str, Any]]:
+    """
+    Enriches song metadata by searching the MusicBrainz database, served from
+    the lookup cache when a fresh answer is already stored.
+
+    Args:
+        artist: The name of the song's artist.
+        title: The title of the song.
+
+    Returns:
+        A dictionary containing enriched metadata (like year and tags),
+        or None if no definitive match is found.
+    """
+    return lookup_cache.cached(METADATA_SERVICE, fetch_metadata, artist, title)
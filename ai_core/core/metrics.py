@@ -0,0 +1,174 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; they reach minutes for stem separation.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram, one series per label combination.
+    `observe` is a bisect and a few additions under a lock.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+class Gauge:
+    """
+    A value per label combination, either set directly or, with `callback`,
+    read at scrape time from a function returning {labels tuple: value}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 callback: Callable[[], Dict[Tuple[str, ...], float]] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self) -> Iterable[str]:
+        if self.callback is not None:
+            values = self.callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Counter(Gauge):
+    """A monotonically increasing Gauge; callback counters report totals kept elsewhere."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All registered metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# --- Application Metrics ---
+request_duration = registry.register(Histogram(
+    "ai_core_request_duration_seconds", "API request latency by route template.", ("method", "route", "status")
+))
+stage_duration = registry.register(Histogram(
+    "ai_core_stage_duration_seconds", "Time spent in each stage of an engine operation.", ("operation", "stage")
+))
+model_load_seconds = registry.register(Gauge(
+    "ai_core_model_load_seconds", "How long the most recent load of each model took.", ("model",)
+))
+
+def _cache_stats() -> Dict[str, Dict[str, float]]:
+    from ai_core.core.song_hydration import song_cache
+    from ai_core.core.listened_cache import listened_cache
+    return {"song": song_cache.stats(), "listened": listened_cache.stats()}
+
+def _cache_series(field: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    return lambda: {(cache,): stats[field] for cache, stats in _cache_stats().items()}
+
+registry.register(Counter("ai_core_cache_hits_total", "Cache lookups served from memory.", ("cache",), _cache_series("hits")))
+registry.register(Counter("ai_core_cache_misses_total", "Cache lookups that went to the database.", ("cache",), _cache_series("misses")))
+registry.register(Gauge("ai_core_cache_hit_ratio", "Hits over all lookups since startup.", ("cache",), _cache_series("hit_ratio")))
+registry.register(Gauge("ai_core_cache_entries", "Entries currently held.", ("cache",), _cache_series("size")))
+
+# The stages timed while handling the current request, for its Server-Timing
+# header. Worker threads get a copy of the context, which still holds the
+# same list.
+request_stages: ContextVar[Optional[List[Tuple[str, str, float]]]] = ContextVar("request_stages", default=None)
+
+@contextmanager
+def timed(operation: str, stage: str):
+    """
+    Records the duration of the `with` block as one stage of `operation`,
+    and in the current request's stage list if there is one.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.observe(elapsed, operation, stage)
+        stages = request_stages.get()
+        if stages is not None:
+            stages.append((operation, stage, elapsed))
+
+@contextmanager
+def timed_model_load(model: str):
+    """Records how long loading `model` took."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        model_load_seconds.set(time.perf_counter() - start, model)
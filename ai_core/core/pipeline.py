@@ -0,0 +1,391 @@
+import os
+import math
+import time
+import heapq
+import queue
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from decouple import config
+
+# --- Configuration ---
+# Default capacity of the queue in front of each stage. A full queue blocks
+# the upstream stage, so memory stays bounded by the slowest stage.
+PIPELINE_QUEUE_SIZE = config("PIPELINE_QUEUE_SIZE", default=16, cast=int)
+PIPELINE_REPORT_INTERVAL = config("PIPELINE_REPORT_INTERVAL", default=30.0, cast=float)
+# How long a batching stage waits for more items before running a short batch.
+PIPELINE_BATCH_WAIT = config("PIPELINE_BATCH_WAIT", default=0.5, cast=float)
+# How many of the slowest items the run report lists.
+PIPELINE_SLOWEST_ITEMS = config("PIPELINE_SLOWEST_ITEMS", default=20, cast=int)
+
+_END = object()
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(1, math.ceil(q / 100 * len(sorted_values))) - 1]
+
+def _latency_summary(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 3) if ordered else None,
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 3) if ordered else None,
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else None,
+    }
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    `fn` takes an item and returns the item to pass on, or None to drop it.
+    With `batch_size > 1` it instead takes a list of up to `batch_size` items
+    and returns a list. Each of the `workers` threads runs `fn` independently.
+    """
+    def __init__(self, name: str, fn: Callable, workers: int = 1, batch_size: int = 1, queue_size: Optional[int] = None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+class StageStats:
+    def __init__(self):
+        self.received = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.calls = 0
+        self.busy_seconds = 0.0
+        # Seconds spent per item; a batch's time is split evenly over its items.
+        self.item_seconds: List[float] = []
+        self.first_started = None
+        self.last_finished = None
+        self._lock = threading.Lock()
+
+    def record(self, received, emitted, errors, busy_seconds, started=None):
+        with self._lock:
+            self.received += received
+            self.emitted += emitted
+            self.dropped += received - emitted - errors
+            self.errors += errors
+            self.calls += 1
+            self.busy_seconds += busy_seconds
+            if received:
+                self.item_seconds.extend([busy_seconds / received] * received)
+            if started is not None:
+                if self.first_started is None or started < self.first_started:
+                    self.first_started = started
+                finished = started + busy_seconds
+                if self.last_finished is None or finished > self.last_finished:
+                    self.last_finished = finished
+
+    def as_dict(self, workers: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "received": self.received,
+                "emitted": self.emitted,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "calls": self.calls,
+                "busy_seconds": round(self.busy_seconds, 3),
+                # From the stage's first call starting to its last one finishing.
+                "wall_seconds": round(self.last_finished - self.first_started, 3) if self.first_started is not None else 0.0,
+                # Items per second of worker time, i.e. what one worker sustains.
+                "items_per_second": round(self.received / self.busy_seconds, 3) if self.busy_seconds else None,
+                "workers": workers,
+                "per_item": _latency_summary(self.item_seconds),
+            }
+
+class StepTimings:
+    """
+    Durations of named steps inside stages (e.g. "dsp.beat_track"), for work
+    a stage does more than one kind of. Shared by all worker threads.
+    """
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[name].append(seconds)
+
+    @contextmanager
+    def time(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        return {
+            name: {"calls": len(values), "total_seconds": round(sum(values), 3), **_latency_summary(values)}
+            for name, values in samples.items()
+        }
+
+class Checkpoint:
+    """
+    Append-only log of item keys that made it through the final stage, so an
+    interrupted run can resume without redoing them.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> set:
+        if not self.path.exists():
+            return set()
+        with open(self.path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+
+    def mark(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+
+class Pipeline:
+    """
+    Runs items from `source` through `stages`, each stage with its own worker
+    threads, connected by bounded queues.
+
+    If a `checkpoint` is given, `key(item)` is recorded for every item that
+    leaves the last stage, and items whose key is already recorded are
+    skipped at the source. The checkpoint is cleared after a complete run.
+
+    The run report covers every stage (counts, busy and wall time, per-item
+    p50/p95), the named steps recorded in `timings`, and the `slowest`
+    items by total stage time, identified by `label(item)` (default: `key`).
+    An item labelled None before a stage is labelled again afterwards, so a
+    stage that sets the labelled field is counted; items still labelled
+    None are left out.
+    """
+    def __init__(self, name: str, source: Iterable, stages: List[Stage], key: Callable[[Any], str] = None,
+                 checkpoint: Optional[Checkpoint] = None, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 report_interval: float = PIPELINE_REPORT_INTERVAL, label: Callable[[Any], str] = None,
+                 timings: Optional[StepTimings] = None, slowest: int = PIPELINE_SLOWEST_ITEMS):
+        if checkpoint is not None and key is None:
+            raise ValueError("A checkpointed pipeline needs a key function.")
+        self.name = name
+        self.source = source
+        self.stages = stages
+        self.key = key
+        self.checkpoint = checkpoint
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.stats = {stage.name: StageStats() for stage in stages}
+        self.label = label or key
+        self.timings = timings if timings is not None else StepTimings()
+        self.slowest = slowest
+        self.skipped = 0
+        self.completed = 0
+        self.wall_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._item_seconds = defaultdict(lambda: defaultdict(float))  # label -> stage -> seconds
+        self._item_lock = threading.Lock()
+
+    def run(self) -> Dict[str, Any]:
+        done = self.checkpoint.load() if self.checkpoint else set()
+        if done:
+            print(f"Resuming '{self.name}': {len(done)} items already completed.")
+
+        queues = [queue.Queue(maxsize=stage.queue_size or self.queue_size) for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        source_error = []
+        self.started_at = datetime.utcnow()
+        start = time.perf_counter()
+
+        def emit(index, items):
+            if index + 1 < len(self.stages):
+                for item in items:
+                    queues[index + 1].put(item)
+            else:
+                if self.checkpoint:
+                    self.checkpoint.mark(self.key(item) for item in items)
+                with remaining_lock:
+                    self.completed += len(items)
+
+        def feed():
+            try:
+                for item in self.source:
+                    if done and self.key(item) in done:
+                        self.skipped += 1
+                        continue
+                    queues[0].put(item)
+            except Exception as e:
+                source_error.append(e)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_END)
+
+        def next_batch(q, size):
+            item = q.get()
+            if item is _END:
+                return [], True
+            batch = [item]
+            while len(batch) < size:
+                try:
+                    item = q.get(timeout=PIPELINE_BATCH_WAIT)
+                except queue.Empty:
+                    break
+                if item is _END:
+                    return batch, True
+                batch.append(item)
+            return batch, False
+
+        def work(index):
+            stage = self.stages[index]
+            stats = self.stats[stage.name]
+            try:
+                while True:
+                    batch, finished = next_batch(queues[index], stage.batch_size)
+                    if batch:
+                        labels = self._labels(batch)
+                        started = time.perf_counter()
+                        elapsed = None
+                        try:
+                            if stage.batch_size > 1:
+                                outputs = [item for item in stage.fn(batch) if item is not None]
+                            else:
+                                output = stage.fn(batch[0])
+                                outputs = [output] if output is not None else []
+                            elapsed = time.perf_counter() - started
+                            if labels is not None and None in labels:
+                                labels = self._late_labels(labels, batch, outputs)
+                            self._record_items(stage.name, labels, elapsed)
+                            emit(index, outputs)
+                            errors = 0
+                        except Exception as e:
+                            print(f"ERROR: Stage '{stage.name}' failed on {len(batch)} item(s): {e}")
+                            outputs, errors = [], len(batch)
+                        if elapsed is None:
+                            elapsed = time.perf_counter() - started
+                        stats.record(len(batch), len(outputs), errors, elapsed, started)
+                    if finished:
+                        break
+            finally:
+                # The last worker of a stage to finish closes the next stage's
+                # input, even if this worker died, so the run cannot hang.
+                with remaining_lock:
+                    remaining[index] -= 1
+                    last = remaining[index] == 0
+                if last and index + 1 < len(self.stages):
+                    for _ in range(self.stages[index + 1].workers):
+                        queues[index + 1].put(_END)
+
+        threads = [threading.Thread(target=feed, name=f"{self.name}-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=work, args=(index,), name=f"{self.name}-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+        for thread in threads:
+            thread.start()
+
+        last_report = time.perf_counter()
+        while any(thread.is_alive() for thread in threads):
+            threads[-1].join(timeout=1.0)
+            if self.report_interval and time.perf_counter() - last_report >= self.report_interval:
+                last_report = time.perf_counter()
+                self._print_progress(queues, time.perf_counter() - start)
+        self.wall_seconds = time.perf_counter() - start
+        self.finished_at = datetime.utcnow()
+
+        if source_error:
+            raise source_error[0]
+        if self.checkpoint:
+            self.checkpoint.clear()
+        report = self.report()
+        self._print_report(report)
+        return report
+
+    def _labels(self, batch) -> Optional[List[str]]:
+        if self.label is None:
+            return None
+        try:
+            return [self.label(item) for item in batch]
+        except Exception:
+            return None
+
+    def _late_labels(self, labels: List[Optional[str]], batch, outputs) -> List[Optional[str]]:
+        """
+        Fills in labels that were None before the stage ran, from the items
+        as the stage left them (stages may add the labelled field) or, when
+        each input produced one output, from the outputs.
+        """
+        candidates = [self._labels(batch) or [None] * len(batch)]
+        if len(outputs) == len(batch):
+            candidates.append(self._labels(outputs) or [None] * len(batch))
+        return [
+            next((label for label in (before, *later) if label is not None), None)
+            for before, *later in zip(labels, *candidates)
+        ]
+
+    def _record_items(self, stage_name: str, labels: Optional[List[str]], elapsed: float) -> None:
+        if not labels:
+            return
+        share = elapsed / len(labels)
+        with self._item_lock:
+            for label in labels:
+                if label is not None:
+                    self._item_seconds[label][stage_name] += share
+
+    def slowest_items(self, n: int) -> List[Dict[str, Any]]:
+        with self._item_lock:
+            totals = [(sum(stages.values()), label, dict(stages)) for label, stages in self._item_seconds.items()]
+        return [
+            {"item": label, "seconds": round(total, 3), "stages": {name: round(seconds, 3) for name, seconds in stages.items()}}
+            for total, label, stages in heapq.nlargest(n, totals, key=lambda entry: entry[0])
+        ]
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "pipeline": self.name,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "completed": self.completed,
+            "skipped_from_checkpoint": self.skipped,
+            "items_per_second": round(self.completed / self.wall_seconds, 3) if self.wall_seconds else None,
+            "stages": {stage.name: self.stats[stage.name].as_dict(stage.workers) for stage in self.stages},
+            "steps": self.timings.as_dict(),
+            "slowest_items": self.slowest_items(self.slowest),
+        }
+
+    def _print_progress(self, queues, elapsed):
+        line = ", ".join(
+            f"{stage.name} {self.stats[stage.name].received} (q={queues[i].qsize()})"
+            for i, stage in enumerate(self.stages)
+        )
+        print(f"[{self.name} {elapsed:6.0f}s] {line}")
+
+    def _print_report(self, report):
+        print(f"\n--- Pipeline '{self.name}': {report['completed']} items in {report['wall_seconds']:.1f}s ---")
+        for name, stats in report["stages"].items():
+            rate = f"{stats['items_per_second']:.2f}/s per worker" if stats["items_per_second"] else "-"
+            p50, p95 = stats["per_item"]["p50_ms"], stats["per_item"]["p95_ms"]
+            latency = f", p50 {p50:.0f} ms, p95 {p95:.0f} ms" if p50 is not None else ""
+            print(
+                f"{name:>10}: {stats['received']:>6} in, {stats['emitted']:>6} out, {stats['dropped']:>5} dropped, "
+                f"{stats['errors']:>4} errors, busy {stats['busy_seconds']:8.1f}s, {rate}{latency}"
+            )
+        for name, stats in report["steps"].items():
+            print(f"{name:>22}: {stats['calls']:>6} calls, {stats['total_seconds']:8.1f}s, p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms")
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict
+
+# Threads parked in one of these are idle (waiting on a lock, a queue or the
+# event loop's selector), so their samples are not counted.
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the stack of every busy thread every
+    `interval` seconds from a background thread. It sees work handed to the
+    API's worker threads, which a per-thread profiler such as cProfile
+    started in the request handler would miss, and costs the profiled code
+    nothing beyond the GIL hand-offs.
+
+    Samples come from the whole process, so requests running at the same
+    time show up too.
+    """
+    def __init__(self, interval: float = 0.001, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._self = Counter()
+        self._cumulative = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+        self._seconds = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self._seconds = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                self.samples += 1
+                self._self[(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)] += 1
+                seen = set()
+                depth = 0
+                while frame is not None and depth < self.max_depth:
+                    code = frame.f_code
+                    key = (code.co_filename, code.co_firstlineno, code.co_name)
+                    if key not in seen:
+                        seen.add(key)
+                        self._cumulative[key] += 1
+                    frame = frame.f_back
+                    depth += 1
+
+    def report(self, top: int = 25) -> Dict[str, Any]:
+        """The `top` frames by self samples (the line running) and by cumulative samples (on the stack)."""
+        def rows(counter):
+            return [
+                {"function": name, "file": filename, "line": line, "samples": count,
+                 "percent": round(100 * count / self.samples, 1)}
+                for (filename, line, name), count in counter.most_common(top)
+            ]
+
+        return {
+            "duration_ms": round(self._seconds * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "top_self": rows(self._self),
+            "top_cumulative": rows(self._cumulative),
+        }
@@ -0,0 +1,124 @@
+import queue
+import datetime
+import threading
+from typing import List, Optional
+
+import numpy as np
+from decouple import config
+from sqlalchemy.orm import Session
+
+from ai_core.database import models
+from ai_core.database.session import SessionLocal
+from ai_core.api import schemas
+from ai_core.core import catalog, recommender_engine
+from ai_core.core.song_hydration import hydrate_songs
+from ai_core.core.listened_cache import listened_cache
+
+# --- Configuration ---
+# How many recommendations are materialized per user.
+RECOMMENDATION_LIST_SIZE = config("RECOMMENDATION_LIST_SIZE", default=100, cast=int)
+
+def refresh_user_recommendations(user_id: int, db: Session, size: int = RECOMMENDATION_LIST_SIZE) -> int:
+    """
+    Recomputes a user's top-N list and replaces the stored one atomically.
+
+    Returns:
+        The number of recommendations stored.
+    """
+    fingerprint = db.query(models.UserFingerprint).filter(models.UserFingerprint.user_id == user_id).first()
+    catalog_version = catalog.get_catalog_version(db)
+    scored = recommender_engine.score_recommendations(user_id, db, limit=size)
+
+    db.query(models.UserRecommendation).filter(models.UserRecommendation.user_id == user_id).delete()
+    now = datetime.datetime.utcnow()
+    db.add_all([
+        models.UserRecommendation(
+            user_id=user_id,
+            rank=rank,
+            song_id=song_id,
+            score=score,
+            catalog_version=catalog_version,
+            fingerprint_updated=fingerprint.last_updated if fingerprint else None,
+            computed_at=now,
+        )
+        for rank, (song_id, score) in enumerate(scored)
+    ])
+    db.commit()
+    return len(scored)
+
+def get_stored_recommendations(user_id: int, db: Session, limit: int = 10) -> Optional[List[schemas.Song]]:
+    """
+    Serves a user's recommendations from the materialized list in one indexed
+    read, hydrated through the song cache. Songs the user has heard since the
+    list was built are filtered out with the listened-set mask, and a refresh
+    is queued to replace them. A list built against an older catalog is
+    still served, and a refresh is queued for it too.
+
+    Returns:
+        The songs in rank order, or None if no list exists or too few unheard
+        songs are left for `limit`, in which case the caller should compute live.
+    """
+    if limit > RECOMMENDATION_LIST_SIZE:
+        return None
+
+    # The whole stored list is read, so heard songs can be skipped over.
+    rows = (
+        db.query(models.UserRecommendation.song_id, models.UserRecommendation.catalog_version)
+        .filter(models.UserRecommendation.user_id == user_id)
+        .order_by(models.UserRecommendation.rank)
+        .all()
+    )
+    if not rows:
+        return None
+
+    song_ids = np.fromiter((row.song_id for row in rows), dtype=np.int64, count=len(rows))
+    heard = listened_cache.exclusion_mask(user_id, db, song_ids)
+    if heard.any() or rows[0].catalog_version != catalog.get_catalog_version(db):
+        refresher.submit(user_id)
+    unheard = song_ids[~heard]
+    if len(unheard) < min(limit, len(rows)):
+        return None
+    return hydrate_songs(db, unheard[:limit].tolist())
+
+class RecommendationRefresher:
+    """
+    Background worker that rebuilds materialized lists off the request path.
+    Submitting a user that is already queued is a no-op.
+    """
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, user_id: int) -> None:
+        with self._lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="recommendation-refresher", daemon=True)
+                self._thread.start()
+        self._queue.put(user_id)
+
+    def _run(self):
+        while True:
+            user_id = self._queue.get()
+            with self._lock:
+                self._pending.discard(user_id)
+            db = SessionLocal()
+            try:
+                count = refresh_user_recommendations(user_id, db)
+                print(f"Refreshed {count} stored recommendations for user_id: {user_id}.")
+            except Exception as e:
+                db.rollback()
+                print(f"ERROR: Could not refresh recommendations for user_id {user_id}: {e}")
+            finally:
+                db.close()
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Blocks until every queued refresh has finished."""
+        self._queue.join()
+
+refresher = RecommendationRefresher()
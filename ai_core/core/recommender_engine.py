@@ -1,37 +1,58 @@
 import numpy as np
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Tuple
 from ai_core.database import models
+from ai_core.api import schemas
+from ai_core.core.listened_cache import listened_cache
+from ai_core.core.metrics import timed
+from ai_core.core.song_hydration import hydrate_songs
 from sklearn.metrics.pairwise import cosine_similarity
 
-def get_recommendations(user_id: int, db: Session, limit: int = 10) -> List[models.Song]:
-    print(f"Generating {limit} recommendations for user_id: {user_id}...")
-    user_fingerprint_obj = db.query(models.UserFingerprint).filter(models.UserFingerprint.user_id == user_id).first()
-    if not user_fingerprint_obj or not user_fingerprint_obj.fingerprint_vector:
-        return []
+def score_recommendations(user_id: int, db: Session, limit: int = 10) -> List[Tuple[int, float]]:
+    """
+    Ranks unheard catalog songs against the user's taste fingerprint.
+
+    Returns:
+        Up to `limit` (song_id, similarity) pairs, best first, or an empty
+        list if the user has no fingerprint.
+    """
+    with timed("recommendations", "load"):
+        user_fingerprint_obj = db.query(models.UserFingerprint).filter(models.UserFingerprint.user_id == user_id).first()
+        if not user_fingerprint_obj or not user_fingerprint_obj.fingerprint_vector:
+            return []
+
+        user_fingerprint = np.frombuffer(user_fingerprint_obj.fingerprint_vector, dtype=np.float32).reshape(1, -1)
+
+        candidate_songs = (
+            db.query(models.Song.id, models.Song.clip_embedding)
+            .filter(models.Song.clip_embedding.isnot(None))
+            .all()
+        )
 
-    user_fingerprint = np.frombuffer(user_fingerprint_obj.fingerprint_vector, dtype=np.float32).reshape(1, -1)
-    
-    listened_song_ids = [
-        event.song_id for event in 
-        db.query(models.UserEvent.song_id).filter(models.UserEvent.user_id == user_id).distinct().all()
-    ]
+        if not candidate_songs:
+            return []
 
-    candidate_songs = (
-        db.query(models.Song.id, models.Song.clip_embedding)
-        .filter(models.Song.id.notin_(listened_song_ids), models.Song.clip_embedding.isnot(None))
-        .all()
-    )
+        candidate_ids = np.fromiter((song.id for song in candidate_songs), dtype=np.int64, count=len(candidate_songs))
+        candidate_embeddings = np.array([np.frombuffer(song.clip_embedding, dtype=np.float32) for song in candidate_songs])
+        heard = listened_cache.exclusion_mask(user_id, db, candidate_ids)
 
-    if not candidate_songs:
+    with timed("recommendations", "score"):
+        similarity_scores = cosine_similarity(user_fingerprint, candidate_embeddings)[0]
+        # Exclude songs the user has already heard in the scoring stage, rather
+        # than with a NOT IN (...) list that grows with the user's history.
+        similarity_scores[heard] = -np.inf
+
+    with timed("recommendations", "top_k"):
+        top_indices = np.argsort(similarity_scores)[::-1][:limit]
+        top_indices = top_indices[np.isfinite(similarity_scores[top_indices])]
+    return list(zip(candidate_ids[top_indices].tolist(), similarity_scores[top_indices].tolist()))
+
+def get_recommendations(user_id: int, db: Session, limit: int = 10) -> List[schemas.Song]:
+    print(f"Generating {limit} recommendations for user_id: {user_id}...")
+    scored = score_recommendations(user_id, db, limit)
+    if not scored:
         return []
-        
-    candidate_ids = [song.id for song in candidate_songs]
-    candidate_embeddings = np.array([np.frombuffer(song.clip_embedding, dtype=np.float32) for song in candidate_songs])
-    similarity_scores = cosine_similarity(user_fingerprint, candidate_embeddings)[0]
-    top_indices = np.argsort(similarity_scores)[::-1][:limit]
-    recommended_song_ids = [candidate_ids[i] for i in top_indices]
-    
-    recommendations = db.query(models.Song).filter(models.Song.id.in_(recommended_song_ids)).all()
-    recommendations.sort(key=lambda song: recommended_song_ids.index(song.id))
-    return recommendations
+    recommended_song_ids = [song_id for song_id, _ in scored]
+
+    with timed("recommendations", "hydrate"):
+        return hydrate_songs(db, recommended_song_ids)
@@ -0,0 +1,300 @@
+import os
+import gzip
+import json
+import datetime
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from decouple import config
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from ai_core import history_db
+from ai_core.database import models
+
+# --- Configuration ---
+HISTORY_RETENTION_DAYS = config("HISTORY_RETENTION_DAYS", default=90, cast=int)
+USER_EVENTS_RETENTION_DAYS = config("USER_EVENTS_RETENTION_DAYS", default=180, cast=int)
+ARCHIVE_DIR = Path(config("ARCHIVE_DIR", default=str(Path(__file__).resolve().parent.parent / "data" / "archive")))
+RETENTION_CHUNK_SIZE = config("RETENTION_CHUNK_SIZE", default=5000, cast=int)
+# Pages released per incremental_vacuum call (4 KiB pages -> ~40 MB).
+VACUUM_MAX_PAGES = config("VACUUM_MAX_PAGES", default=10000, cast=int)
+
+
+class ArchiveWriter:
+    """
+    Writes archived rows to a gzip-compressed NDJSON file. Each chunk is
+    flushed to disk before the caller deletes the source rows, so a crash can
+    at worst archive a row twice but never lose one.
+    """
+    def __init__(self, archive_dir: Path, table: str, cutoff: datetime.datetime):
+        archive_dir = Path(archive_dir) / table
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        run_stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self.path = archive_dir / f"{table}-before-{cutoff:%Y-%m-%d}-{run_stamp}.ndjson.gz"
+        self._raw = open(self.path, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self.rows_written = 0
+
+    def write_chunk(self, rows):
+        for row in rows:
+            self._file.write((json.dumps(row, default=str) + "\n").encode("utf-8"))
+        self._file.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self.rows_written += len(rows)
+
+    def close(self):
+        self._file.close()
+        self._raw.close()
+        if self.rows_written == 0:
+            self.path.unlink(missing_ok=True)
+
+
+def _sqlite_storage_stats(execute) -> Dict[str, Any]:
+    page_size = execute("PRAGMA page_size")[0][0]
+    return {
+        "size_bytes": execute("PRAGMA page_count")[0][0] * page_size,
+        "free_bytes": execute("PRAGMA freelist_count")[0][0] * page_size,
+        "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}[execute("PRAGMA auto_vacuum")[0][0]],
+    }
+
+
+def _vacuum_action(auto_vacuum: str, convert: bool) -> str:
+    if auto_vacuum == "incremental":
+        return "incremental_vacuum"
+    return "full_vacuum_to_convert" if convert else "skipped_needs_conversion"
+
+
+def incremental_vacuum(execute, max_pages: int = VACUUM_MAX_PAGES, convert: bool = False) -> Dict[str, Any]:
+    """
+    Returns free pages to the filesystem without a blocking full VACUUM.
+
+    Incremental mode only takes effect after one full VACUUM. That blocking
+    VACUUM only runs with `convert`; otherwise a database that is not yet in
+    incremental mode is left alone and reported as needing conversion.
+
+    Args:
+        execute: A callable running one SQL statement outside a transaction
+            and returning its rows. Every call must use the same connection,
+            or the auto_vacuum setting may not reach the VACUUM.
+        max_pages: Upper bound on pages released in this call.
+        convert: Allow the one-time full VACUUM that switches the database
+            to incremental mode.
+    """
+    before = _sqlite_storage_stats(execute)
+    action = _vacuum_action(before["auto_vacuum"], convert)
+    if action == "full_vacuum_to_convert":
+        execute("PRAGMA auto_vacuum = INCREMENTAL")
+        execute("VACUUM")
+    elif action == "incremental_vacuum":
+        execute(f"PRAGMA incremental_vacuum({max_pages})")
+    after = _sqlite_storage_stats(execute)
+    return {
+        "action": action,
+        "converted_to_incremental": action == "full_vacuum_to_convert" and after["auto_vacuum"] == "incremental",
+        "size_bytes_before": before["size_bytes"],
+        "size_bytes_after": after["size_bytes"],
+        "free_bytes_after": after["free_bytes"],
+    }
+
+
+def _plan_vacuum(storage: Dict[str, Any], convert: bool) -> Dict[str, Any]:
+    action = _vacuum_action(storage["auto_vacuum"], convert)
+    return {"action": action, "blocking_full_vacuum": action == "full_vacuum_to_convert"}
+
+
+# --- history (history_db) ---
+
+def plan_history_retention(cutoff: datetime.datetime, convert_vacuum: bool = False) -> Dict[str, Any]:
+    """Reports what a retention run would do to the history table."""
+    conn = history_db.manager.connection()
+    count, oldest = conn.execute(
+        "SELECT COUNT(*), MIN(timestamp) FROM history WHERE timestamp < ?", (cutoff.isoformat(),)
+    ).fetchone()
+    storage = _sqlite_storage_stats(lambda sql: conn.execute(sql).fetchall())
+    return {
+        "table": "history",
+        "cutoff": cutoff.isoformat(),
+        "rows_to_archive": count,
+        "oldest_timestamp": oldest,
+        "total_rows": conn.execute("SELECT COUNT(*) FROM history").fetchone()[0],
+        "storage": storage,
+        "vacuum": _plan_vacuum(storage, convert_vacuum),
+    }
+
+
+def archive_history(cutoff: datetime.datetime, archive_dir: Path = ARCHIVE_DIR, chunk_size: int = RETENTION_CHUNK_SIZE,
+                    convert_vacuum: bool = False) -> Dict[str, Any]:
+    """
+    Rolls history rows older than `cutoff` into history_daily, writes them to
+    a compressed archive file and deletes them, one chunk per transaction.
+    """
+    conn = history_db.manager.connection()
+    writer = ArchiveWriter(archive_dir, "history", cutoff)
+    days = set()
+    try:
+        while True:
+            rows = conn.execute(
+                f"SELECT {history_db.HISTORY_COLUMNS} FROM history WHERE timestamp < ? ORDER BY id LIMIT ?",
+                (cutoff.isoformat(), chunk_size)
+            ).fetchall()
+            if not rows:
+                break
+            events = [history_db._row_to_dict(row) for row in rows]
+            writer.write_chunk(events)
+
+            rollup = Counter((e["user_id"], e["timestamp"][:10], e["event_type"]) for e in events)
+            days.update(day for _, day, _ in rollup)
+            with history_db.manager.transaction() as tx:
+                tx.executemany("""
+                    INSERT INTO history_daily (user_id, day, event_type, event_count) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_id, day, event_type) DO UPDATE SET event_count = event_count + excluded.event_count
+                """, [(*key, n) for key, n in rollup.items()])
+                tx.executemany("DELETE FROM history WHERE id = ?", [(e["id"],) for e in events])
+    finally:
+        writer.close()
+
+    # The thread's one history connection runs every vacuum statement.
+    vacuum = incremental_vacuum(lambda sql: conn.execute(sql).fetchall(), convert=convert_vacuum)
+    return {
+        "table": "history",
+        "rows_archived": writer.rows_written,
+        "days_rolled_up": len(days),
+        "archive_file": str(writer.path) if writer.rows_written else None,
+        "vacuum": vacuum,
+    }
+
+
+# --- user_events (SQLAlchemy) ---
+
+@contextmanager
+def _autocommit_execute(db: Session):
+    """
+    Yields an `execute(sql)` that runs every statement on one autocommit
+    connection, as VACUUM and the auto_vacuum pragma require.
+    """
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        def execute(sql):
+            result = conn.execute(text(sql))
+            return result.fetchall() if result.returns_rows else []
+        yield execute
+
+
+def plan_user_event_retention(db: Session, cutoff: datetime.datetime, convert_vacuum: bool = False) -> Dict[str, Any]:
+    """Reports what a retention run would do to the user_events table."""
+    count, oldest = (
+        db.query(func.count(models.UserEvent.id), func.min(models.UserEvent.timestamp))
+        .filter(models.UserEvent.timestamp < cutoff)
+        .one()
+    )
+    report = {
+        "table": "user_events",
+        "cutoff": cutoff.isoformat(),
+        "rows_to_archive": count,
+        "oldest_timestamp": oldest.isoformat() if oldest else None,
+        "total_rows": db.query(func.count(models.UserEvent.id)).scalar(),
+    }
+    if db.get_bind().dialect.name == "sqlite":
+        with _autocommit_execute(db) as execute:
+            report["storage"] = _sqlite_storage_stats(execute)
+        report["vacuum"] = _plan_vacuum(report["storage"], convert_vacuum)
+    return report
+
+
+def archive_user_events(db: Session, cutoff: datetime.datetime, archive_dir: Path = ARCHIVE_DIR, chunk_size: int = RETENTION_CHUNK_SIZE,
+                        convert_vacuum: bool = False) -> Dict[str, Any]:
+    """
+    Rolls user_events older than `cutoff` into UserEventDaily, writes them to
+    a compressed archive file and deletes them, one chunk per transaction.
+    """
+    writer = ArchiveWriter(archive_dir, "user_events", cutoff)
+    days = set()
+    try:
+        while True:
+            events = (
+                db.query(models.UserEvent)
+                .filter(models.UserEvent.timestamp < cutoff)
+                .order_by(models.UserEvent.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not events:
+                break
+            writer.write_chunk([
+                {"id": e.id, "user_id": e.user_id, "song_id": e.song_id, "event_type": e.event_type, "timestamp": e.timestamp}
+                for e in events
+            ])
+
+            rollup = Counter((e.user_id, e.event_type, e.song_id, e.timestamp.strftime("%Y-%m-%d")) for e in events)
+            for (user_id, event_type, song_id, day), n in rollup.items():
+                days.add(day)
+                daily = db.get(models.UserEventDaily, (user_id, event_type, song_id, day))
+                if daily:
+                    daily.event_count += n
+                else:
+                    db.add(models.UserEventDaily(user_id=user_id, event_type=event_type, song_id=song_id, day=day, event_count=n))
+            for e in events:
+                db.delete(e)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        writer.close()
+
+    report = {
+        "table": "user_events",
+        "rows_archived": writer.rows_written,
+        "days_rolled_up": len(days),
+        "archive_file": str(writer.path) if writer.rows_written else None,
+    }
+    if db.get_bind().dialect.name == "sqlite":
+        with _autocommit_execute(db) as execute:
+            report["vacuum"] = incremental_vacuum(execute, convert=convert_vacuum)
+    return report
+
+
+def run_retention(
+    db: Session,
+    dry_run: bool = False,
+    history_days: int = HISTORY_RETENTION_DAYS,
+    user_events_days: int = USER_EVENTS_RETENTION_DAYS,
+    archive_dir: Path = ARCHIVE_DIR,
+    now: Optional[datetime.datetime] = None,
+    convert_vacuum: bool = False,
+) -> Dict[str, Any]:
+    """
+    Applies the retention policy to both event tables.
+
+    Args:
+        db: The SQLAlchemy database session.
+        dry_run: If True, only report what would be archived.
+        history_days: Raw history rows older than this are archived.
+        user_events_days: Raw user_events older than this are archived.
+        archive_dir: Where the compressed archive files are written.
+        now: Reference time for the cutoffs (defaults to utcnow).
+        convert_vacuum: Allow a one-time, blocking full VACUUM on databases
+            not yet in incremental auto_vacuum mode. Without it they are
+            archived but not vacuumed.
+
+    Returns:
+        A JSON-serializable report, one entry per table.
+    """
+    now = now or datetime.datetime.utcnow()
+    history_cutoff = now - datetime.timedelta(days=history_days)
+    user_events_cutoff = now - datetime.timedelta(days=user_events_days)
+
+    if dry_run:
+        return {
+            "dry_run": True,
+            "history": plan_history_retention(history_cutoff, convert_vacuum),
+            "user_events": plan_user_event_retention(db, user_events_cutoff, convert_vacuum),
+        }
+    return {
+        "dry_run": False,
+        "history": archive_history(history_cutoff, archive_dir, convert_vacuum=convert_vacuum),
+        "user_events": archive_user_events(db, user_events_cutoff, archive_dir, convert_vacuum=convert_vacuum),
+    }
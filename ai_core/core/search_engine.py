@@ -1,9 +1,12 @@
 import numpy as np
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import chromadb
 
-from ai_core.database import models
+from ai_core.api import schemas
+from ai_core.core.metrics import timed
+from ai_core.core.song_hydration import hydrate_songs
+from ai_core.core.vector_metadata import build_where
 from ai_core.models.clip_embedder import SimpleClipEmbedder
 
 def semantic_search(
@@ -11,8 +14,9 @@ def semantic_search(
     db: Session, 
     vector_collection: chromadb.Collection,
     embedder: SimpleClipEmbedder,
-    limit: int = 5
-) -> List[models.Song]:
+    limit: int = 5,
+    filters: Optional[schemas.SearchFilters] = None
+) -> List[schemas.Song]:
     """
     Performs semantic search on the music library based on a text query.
 
@@ -22,24 +26,30 @@ def semantic_search(
         vector_collection: The ChromaDB collection of song vectors.
         embedder: The AI model embedder instance.
         limit: The number of results to return.
+        filters: Optional bpm/key/artist/year constraints. They are applied
+            by the vector database against the metadata stored with each
+            vector, so the top `limit` matches all satisfy them.
 
     Returns:
-        A list of the most relevant Song objects.
+        A list of the most relevant songs, best match first.
     """
     print(f"Performing semantic search for: '{query_text}'...")
 
     # Step 1: Convert the user's text query into an AI embedding vector.
     # Note: The embedder needs a new get_text_embedding method.
-    query_vector = embedder.get_text_embedding(query_text)
+    with timed("semantic_search", "embed"):
+        query_vector = embedder.get_text_embedding(query_text)
     if query_vector is None:
         print("Could not generate a vector for the query text.")
         return []
 
     # Step 2: Query the vector database to find the most similar song vectors.
-    results = vector_collection.query(
-        query_embeddings=[query_vector.tolist()],
-        n_results=limit,
-    )
+    with timed("semantic_search", "vector_query"):
+        results = vector_collection.query(
+            query_embeddings=[query_vector.tolist()],
+            n_results=limit,
+            where=build_where(filters),
+        )
 
     if not results or not results['ids'][0]:
         print("No similar songs found in the vector database.")
@@ -49,10 +59,52 @@ def semantic_search(
     recommended_song_ids = [int(song_id) for song_id in results['ids'][0]]
     print(f"Found top {len(recommended_song_ids)} matching song IDs: {recommended_song_ids}")
 
-    # Step 3: Fetch the full song details from our SQL database for the top matches.
-    recommendations = db.query(models.Song).filter(models.Song.id.in_(recommended_song_ids)).all()
-    
-    # Sort the final list to match the recommendation order from the vector search
-    recommendations.sort(key=lambda song: recommended_song_ids.index(song.id))
-    
-    return recommendations
+    # Step 3: Fetch the response fields from our SQL database for the top
+    # matches, in the order returned by the vector search.
+    with timed("semantic_search", "hydrate"):
+        return hydrate_songs(db, recommended_song_ids)
+
+def semantic_search_batch(
+    queries: List[str],
+    db: Session,
+    vector_collection: chromadb.Collection,
+    embedder: SimpleClipEmbedder,
+    limit: int = 5,
+    filters: Optional[schemas.SearchFilters] = None
+) -> List[List[schemas.Song]]:
+    """
+    Runs several semantic searches with one text-encoder call, one
+    multi-query vector lookup and one song hydration.
+
+    Args:
+        queries: The natural language search queries.
+        db: The SQLAlchemy database session.
+        vector_collection: The ChromaDB collection of song vectors.
+        embedder: The AI model embedder instance.
+        limit: The number of results to return per query.
+        filters: Optional constraints applied to every query.
+
+    Returns:
+        One ranked list of songs per query, in the order of `queries`.
+    """
+    print(f"Performing batch semantic search for {len(queries)} queries...")
+
+    with timed("semantic_search_batch", "embed"):
+        query_vectors = embedder.get_text_embeddings(queries)
+    if query_vectors is None:
+        print("Could not generate vectors for the query texts.")
+        return [[] for _ in queries]
+
+    with timed("semantic_search_batch", "vector_query"):
+        results = vector_collection.query(
+            query_embeddings=query_vectors.tolist(),
+            n_results=limit,
+            where=build_where(filters),
+        )
+    ranked_ids = [[int(song_id) for song_id in ids] for ids in (results or {}).get('ids') or [[] for _ in queries]]
+
+    # Hydrate every distinct song once, then fan the results back out.
+    unique_ids = list(dict.fromkeys(song_id for ids in ranked_ids for song_id in ids))
+    with timed("semantic_search_batch", "hydrate"):
+        songs_by_id = {song.id: song for song in hydrate_songs(db, unique_ids)}
+    return [[songs_by_id[song_id] for song_id in ids if song_id in songs_by_id] for ids in ranked_ids]
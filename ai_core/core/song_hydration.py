@@ -0,0 +1,115 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from decouple import config
+from sqlalchemy.orm import Session
+
+from ai_core.database import models
+from ai_core.api import schemas
+from ai_core.core import catalog
+
+# --- Configuration ---
+SONG_CACHE_MAX_SIZE = config("SONG_CACHE_MAX_SIZE", default=50000, cast=int)
+# How often a worker re-reads the catalog version to notice bumps made by
+# the analysis scripts, which run in another process.
+SONG_CACHE_VERSION_CHECK_INTERVAL = config("SONG_CACHE_VERSION_CHECK_INTERVAL", default=30.0, cast=float)
+
+# Only the columns the API returns; never the clip_embedding blob or lyrics.
+SONG_RESPONSE_COLUMNS = tuple(getattr(models.Song, name) for name in schemas.Song.model_fields)
+
+class SongCache:
+    """
+    In-process LRU cache from song id to its schemas.Song response payload.
+    The whole cache is dropped when the catalog version changes.
+    """
+    def __init__(self, max_size: int = SONG_CACHE_MAX_SIZE, version_check_interval: float = SONG_CACHE_VERSION_CHECK_INTERVAL):
+        self.max_size = max_size
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._catalog_version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def check_catalog_version(self, db: Session) -> None:
+        """Clears the cache if the catalog version moved since the last check."""
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        version = catalog.get_catalog_version(db)
+        with self._lock:
+            if version != self._catalog_version:
+                self._entries.clear()
+                self._catalog_version = version
+            self._version_checked_at = now
+
+    def get_many(self, song_ids: List[int]) -> Dict[int, schemas.Song]:
+        found = {}
+        with self._lock:
+            for song_id in song_ids:
+                song = self._entries.get(song_id)
+                if song is not None:
+                    self._entries.move_to_end(song_id)
+                    found[song_id] = song
+            self.hits += len(found)
+            self.misses += len(song_ids) - len(found)
+        return found
+
+    def put_many(self, songs: Iterable[schemas.Song]) -> None:
+        with self._lock:
+            for song in songs:
+                self._entries[song.id] = song
+                self._entries.move_to_end(song.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, song_ids: Iterable[int] = None) -> None:
+        """Drops the given songs, or everything if no ids are given."""
+        with self._lock:
+            if song_ids is None:
+                self._entries.clear()
+            else:
+                for song_id in song_ids:
+                    self._entries.pop(song_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+song_cache = SongCache()
+
+def hydrate_songs(db: Session, song_ids: Iterable[int]) -> List[schemas.Song]:
+    """
+    Returns the response fields for a ranked list of song ids, served from
+    the song cache and fetched in one query only for the ids it is missing.
+
+    Args:
+        db: The SQLAlchemy database session.
+        song_ids: Song ids in the order they should be returned.
+
+    Returns:
+        schemas.Song objects in the order of `song_ids`; ids that no longer
+        exist are skipped.
+    """
+    song_ids = list(song_ids)
+    if not song_ids:
+        return []
+
+    song_cache.check_catalog_version(db)
+    by_id = song_cache.get_many(song_ids)
+    missing = [song_id for song_id in song_ids if song_id not in by_id]
+    if missing:
+        rows = db.query(*SONG_RESPONSE_COLUMNS).filter(models.Song.id.in_(missing)).all()
+        fetched = [schemas.Song.model_validate(row) for row in rows]
+        song_cache.put_many(fetched)
+        by_id.update((song.id, song) for song in fetched)
+    return [by_id[song_id] for song_id in song_ids if song_id in by_id]
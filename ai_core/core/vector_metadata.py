@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional
+
+from ai_core.api import schemas
+
+def normalize_artist(artist: str) -> str:
+    return " ".join(artist.lower().split())
+
+def song_metadata(song) -> Dict[str, Any]:
+    """
+    The metadata stored with a song's vector so semantic search can filter
+    inside the vector query. Chroma rejects None values, so unknown fields
+    are left out; `song_id` keeps the dict non-empty.
+    """
+    metadata = {"song_id": song.id}
+    if song.bpm is not None:
+        metadata["bpm"] = float(song.bpm)
+    if song.key:
+        metadata["key"] = song.key
+    if song.artist:
+        metadata["artist"] = normalize_artist(song.artist)
+    if song.year is not None:
+        metadata["year"] = int(song.year)
+    return metadata
+
+def build_where(filters: Optional[schemas.SearchFilters]) -> Optional[Dict[str, Any]]:
+    """
+    Translates search filters into a Chroma `where` clause, or None if no
+    filter is set.
+    """
+    if filters is None:
+        return None
+    conditions = []
+    if filters.bpm_min is not None:
+        conditions.append({"bpm": {"$gte": filters.bpm_min}})
+    if filters.bpm_max is not None:
+        conditions.append({"bpm": {"$lte": filters.bpm_max}})
+    if filters.key:
+        conditions.append({"key": {"$eq": filters.key}})
+    if filters.artist:
+        conditions.append({"artist": {"$eq": normalize_artist(filters.artist)}})
+    if filters.year_min is not None:
+        conditions.append({"year": {"$gte": filters.year_min}})
+    if filters.year_max is not None:
+        conditions.append({"year": {"$lte": filters.year_max}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
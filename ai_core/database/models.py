@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime, 
     LargeBinary, 
     ForeignKey,
+    Index,
     Text
 )
 from sqlalchemy.orm import declarative_base
@@ -27,16 +28,40 @@ class Song(Base):
     key = Column(String)
     lyrics = Column(Text, nullable=True)
     lyric_summary = Column(String, nullable=True)
+    # Release year from MusicBrainz enrichment.
+    year = Column(Integer, nullable=True)
 
 class UserEvent(Base):
     __tablename__ = "user_events"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True, nullable=False)
+    user_id = Column(Integer, nullable=False)
     song_id = Column(Integer, ForeignKey("songs.id"), nullable=False)
     event_type = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
 
+    # Covering indexes for the personalization hot paths: the fingerprint
+    # query filters on (user_id, event_type) and the recommender on user_id,
+    # and both only read DISTINCT song_id.
+    __table_args__ = (
+        Index("ix_user_events_user_event_song", "user_id", "event_type", "song_id"),
+        Index("ix_user_events_user_song", "user_id", "song_id"),
+    )
+
+class UserEventDaily(Base):
+    """
+    Per-user, per-day rollup of user_events that the retention job has moved
+    out of the raw table. Keeps song_id so taste fingerprints and listened
+    sets still see the songs behind archived events.
+    """
+    __tablename__ = "user_event_daily"
+
+    user_id = Column(Integer, primary_key=True)
+    event_type = Column(String, primary_key=True)
+    song_id = Column(Integer, primary_key=True)
+    day = Column(String(10), primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+
 class UserFingerprint(Base):
     __tablename__ = "user_fingerprints"
     
@@ -45,6 +70,30 @@ class UserFingerprint(Base):
     fingerprint_vector = Column(LargeBinary)
     last_updated = Column(DateTime, default=datetime.datetime.utcnow)
 
+class CatalogState(Base):
+    """
+    Single-row table holding the catalog version. Library analysis scripts
+    bump it whenever songs or their embeddings change, which tells caches and
+    materialized recommendation lists that they are stale.
+    """
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class UserRecommendation(Base):
+    """One entry of a user's materialized top-N recommendation list."""
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(Integer, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    song_id = Column(Integer, ForeignKey("songs.id"), nullable=False)
+    score = Column(Float, nullable=False)
+    catalog_version = Column(Integer, nullable=False)
+    fingerprint_updated = Column(DateTime)
+    computed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
 def create_db_and_tables():
     """
     Binds to the engine and creates all defined tables in the database.
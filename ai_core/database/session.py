@@ -1,16 +1,105 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from decouple import config
 
 # Use python-decouple to fetch the database URL from the .env file
 DATABASE_URL = config("DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} # Required for SQLite
-)
+# --- Engine Tuning (all overridable from the .env file) ---
+SQLITE_JOURNAL_MODE = config("SQLITE_JOURNAL_MODE", default="WAL")
+SQLITE_SYNCHRONOUS = config("SQLITE_SYNCHRONOUS", default="NORMAL")
+SQLITE_CACHE_SIZE_KB = config("SQLITE_CACHE_SIZE_KB", default=65536, cast=int)
+SQLITE_MMAP_SIZE = config("SQLITE_MMAP_SIZE", default=268435456, cast=int)
+SQLITE_BUSY_TIMEOUT_MS = config("SQLITE_BUSY_TIMEOUT_MS", default=5000, cast=int)
+DB_POOL_SIZE = config("DB_POOL_SIZE", default=5, cast=int)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", default=10, cast=int)
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", default=1800, cast=int)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def _apply_sqlite_pragmas(engine: Engine, read_only: bool) -> None:
+    """
+    Registers a connect hook that applies our production pragmas to every
+    new DBAPI connection handed out by the pool.
+    """
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        if not read_only:
+            # journal_mode is persistent in the file, so only the writer sets it.
+            cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        # A negative cache_size is interpreted by SQLite as KiB, not pages.
+        cursor.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+
+def build_engine(database_url: str = DATABASE_URL, read_only: bool = False, **engine_kwargs) -> Engine:
+    """
+    Builds a SQLAlchemy engine tuned for the backend behind the URL.
+
+    SQLite engines get WAL journaling, a busy timeout and larger page/mmap
+    caches applied on connect, plus a pool sized for a single-file database.
+    Other backends (e.g. Postgres) get a pre-pinged, recycled QueuePool.
+
+    Args:
+        database_url: The SQLAlchemy database URL.
+        read_only: If True, connections refuse writes. Used for the
+            recommendation and search read paths.
+        **engine_kwargs: Extra keyword arguments passed to create_engine,
+            overriding the defaults chosen here.
+
+    Returns:
+        A configured SQLAlchemy Engine.
+    """
+    url = make_url(database_url)
+    options = {}
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {
+            "check_same_thread": False,  # Required for SQLite
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        if _is_memory_sqlite(url):
+            # An in-memory database only exists on its one connection.
+            options["poolclass"] = StaticPool
+        else:
+            options["poolclass"] = QueuePool
+            options["pool_size"] = DB_POOL_SIZE
+            options["max_overflow"] = DB_MAX_OVERFLOW
+    else:
+        options["poolclass"] = QueuePool
+        options["pool_size"] = DB_POOL_SIZE
+        options["max_overflow"] = DB_MAX_OVERFLOW
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = DB_POOL_RECYCLE
+        if read_only and url.get_backend_name() == "postgresql":
+            options["connect_args"] = {"options": "-c default_transaction_read_only=on"}
+
+    options.update(engine_kwargs)
+    engine = create_engine(url, **options)
+
+    if url.get_backend_name() == "sqlite":
+        _apply_sqlite_pragmas(engine, read_only=read_only)
+
+    return engine
+
+
+engine = build_engine(DATABASE_URL)
+read_engine = build_engine(DATABASE_URL, read_only=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 def get_db_session():
     """
@@ -22,3 +111,14 @@ def get_db_session():
         yield db
     finally:
         db.close()
+
+def get_read_db_session():
+    """
+    Dependency function to get a read-only database session for API requests
+    that never write (recommendations, search).
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,6 +1,11 @@
 import os
+import time
+import hashlib
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Optional
 import chromadb
+from decouple import config
 from sentence_transformers import SentenceTransformer
 from fastapi import APIRouter
 from pydantic import BaseModel
@@ -16,6 +21,11 @@ client = chromadb.PersistentClient(path=str(DB_DIR))
 collection = client.get_or_create_collection("ai_core_vectors")
 embedder = SentenceTransformer("all-MiniLM-L6-v2")
 
+# Texts are read, encoded and upserted this many at a time, so memory stays
+# flat however many texts are indexed.
+EMBEDDINGS_CHUNK_SIZE = config("EMBEDDINGS_CHUNK_SIZE", default=1000, cast=int)
+EMBEDDINGS_BATCH_SIZE = config("EMBEDDINGS_BATCH_SIZE", default=64, cast=int)
+
 # ------------------------
 # Data models
 # ------------------------
@@ -31,16 +41,76 @@ class QueryTextsRequest(BaseModel):
 # ------------------------
 # Core functions
 # ------------------------
-def add_texts(texts, ids=None, metadatas=None):
-    embeddings = embedder.encode(texts).tolist()
-    if ids is None:
-        ids = [f"id_{i}" for i in range(len(texts))]
-    collection.add(
-        documents=texts,
-        embeddings=embeddings,
-        ids=ids,
-        metadatas=metadatas
-    )
+def text_id(text: str) -> str:
+    """Stable id derived from the text itself, so re-adding a text is idempotent."""
+    return "txt_" + hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def _chunks(texts, ids, metadatas, chunk_size):
+    texts = iter(texts)
+    ids = iter(ids) if ids is not None else None
+    metadatas = iter(metadatas) if metadatas is not None else None
+    while True:
+        chunk_texts = list(islice(texts, chunk_size))
+        if not chunk_texts:
+            return
+        chunk_ids = list(islice(ids, len(chunk_texts))) if ids is not None else [text_id(t) for t in chunk_texts]
+        chunk_metadatas = list(islice(metadatas, len(chunk_texts))) if metadatas is not None else None
+        yield chunk_texts, chunk_ids, chunk_metadatas
+
+def add_texts(
+    texts: Iterable[str],
+    ids: Optional[Iterable[str]] = None,
+    metadatas: Optional[Iterable[dict]] = None,
+    chunk_size: int = EMBEDDINGS_CHUNK_SIZE,
+    batch_size: int = EMBEDDINGS_BATCH_SIZE,
+    skip_existing: bool = True,
+) -> dict:
+    """
+    Indexes texts in chunks: each chunk is checked against the collection,
+    encoded in batches and upserted. Accepts any iterables, including
+    generators, so texts never need to be in memory all at once.
+
+    Args:
+        texts: The texts to index.
+        ids: Optional ids aligned with `texts`; by default ids are derived
+            from the text content.
+        metadatas: Optional metadata dicts aligned with `texts`.
+        chunk_size: Texts read, encoded and upserted per step.
+        batch_size: Encoder batch size.
+        skip_existing: Skip ids that are already stored with the same text.
+
+    Returns:
+        Counts of texts received, added and skipped, plus throughput.
+    """
+    stats = {"received": 0, "added": 0, "skipped": 0}
+    start = time.perf_counter()
+    for chunk_texts, chunk_ids, chunk_metadatas in _chunks(texts, ids, metadatas, chunk_size):
+        stats["received"] += len(chunk_texts)
+
+        # Repeated ids within a chunk would be rejected by the upsert.
+        keep = list({id_: i for i, id_ in enumerate(chunk_ids)}.values())
+        if skip_existing:
+            existing = collection.get(ids=[chunk_ids[i] for i in keep], include=["documents"])
+            stored = dict(zip(existing["ids"], existing["documents"]))
+            keep = [i for i in keep if stored.get(chunk_ids[i]) != chunk_texts[i]]
+        stats["skipped"] += len(chunk_texts) - len(keep)
+        if not keep:
+            continue
+
+        documents = [chunk_texts[i] for i in keep]
+        embeddings = embedder.encode(documents, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        collection.upsert(
+            documents=documents,
+            embeddings=embeddings.tolist(),
+            ids=[chunk_ids[i] for i in keep],
+            metadatas=[chunk_metadatas[i] for i in keep] if chunk_metadatas is not None else None
+        )
+        stats["added"] += len(keep)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["texts_per_second"] = round(stats["received"] / elapsed, 1) if elapsed else None
+    return stats
 
 def query_texts(query_texts, n_results=5):
     query_embeddings = embedder.encode(query_texts).tolist()
@@ -56,8 +126,8 @@ router = APIRouter(prefix="/embeddings", tags=["Embeddings"])
 
 @router.post("/add")
 async def add_endpoint(req: AddTextsRequest):
-    add_texts(req.texts, req.ids, req.metadatas)
-    return {"status": "success", "count": len(req.texts)}
+    stats = add_texts(req.texts, req.ids, req.metadatas)
+    return {"status": "success", "count": len(req.texts), **stats}
 
 @router.post("/query")
 async def query_endpoint(req: QueryTextsRequest):
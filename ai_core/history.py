@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 import uuid
 from . import history_db
 
@@ -17,9 +17,35 @@ async def add_history_event(
     event: HistoryEvent,
     session_id: Optional[str] = None
 ):
-    sid = history_db.add_event(event_type, user_id, event.dict(), session_id)
+    sid = session_id or str(uuid.uuid4())
+    history_db.add_event(event_type, user_id, session_id=sid, payload=event.dict())
     return {"status": "success", "session_id": sid}
 
+@router.post("/add-batch")
+async def add_history_events(
+    event_type: str,
+    user_id: str,
+    events: List[HistoryEvent],
+    session_id: Optional[str] = None
+):
+    sid = session_id or str(uuid.uuid4())
+    count = history_db.add_events(
+        {"event_type": event_type, "user_id": user_id, "session_id": sid, "payload": event.dict()}
+        for event in events
+    )
+    return {"status": "success", "session_id": sid, "count": count}
+
 @router.get("/")
-async def get_history(limit: int = Query(10), session_id: Optional[str] = None):
-    return history_db.get_history(limit=limit, session_id=session_id)
+async def get_history(
+    response: Response,
+    limit: int = Query(10),
+    session_id: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    try:
+        events = history_db.get_history(limit=limit, session_id=session_id, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if events and len(events) == limit:
+        response.headers["X-Next-Cursor"] = history_db.encode_cursor(events[-1])
+    return events
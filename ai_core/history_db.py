@@ -1,15 +1,87 @@
 import sqlite3
 import json
+import base64
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
 DB_PATH = Path(__file__).resolve().parent / "data" / "history.db"
 
-def init_db():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+HISTORY_COLUMNS = "id, event_type, user_id, session_id, payload, timestamp"
+
+# Set when the schema is created; False if this SQLite build lacks FTS5.
+FTS_ENABLED = True
+# How many of the most recent keyword matches are ranked by relevance.
+FTS_RANK_WINDOW = 1000
+
+class HistoryConnectionManager:
+    """
+    Thread-safe owner of the history database connections.
+
+    Each thread gets one long-lived connection (FastAPI runs sync routes in a
+    threadpool, so workers reuse theirs across requests). Connections run in
+    WAL mode and keep a statement cache, so repeated queries skip re-parsing.
+    """
+    def __init__(self, db_path=DB_PATH, cached_statements=256, busy_timeout=5.0):
+        self.db_path = Path(db_path)
+        self.cached_statements = cached_statements
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._initialized = False
+
+    def _connect(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def connection(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+                if not self._initialized:
+                    _create_schema(conn)
+                    self._initialized = True
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Yields this thread's connection and commits (or rolls back) once."""
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close_all(self):
+        """Closes every connection the manager has handed out."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._initialized = False
+        self._local = threading.local()
+
+manager = HistoryConnectionManager(DB_PATH)
+
+def _create_schema(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS history (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             event_type TEXT NOT NULL,
@@ -19,49 +91,150 @@ def init_db():
             timestamp TEXT NOT NULL
         )
     """)
+    # Every read orders by timestamp DESC, optionally narrowed by user or session.
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_history_timestamp ON history (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_history_user_timestamp ON history (user_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_history_session_timestamp ON history (session_id, timestamp)")
+    # Per-user, per-day counts of events the retention job has archived.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS history_daily (
+            user_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            event_count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, day, event_type)
+        )
+    """)
+    _create_fts(conn)
     conn.commit()
-    conn.close()
+
+# Flattens a JSON payload to the space-separated text of its string values,
+# so keyword search never matches JSON keys or punctuation.
+_PAYLOAD_TEXT_SQL = "(SELECT group_concat(value, ' ') FROM json_tree({payload}) WHERE type = 'text')"
+
+def _create_fts(conn):
+    """
+    Creates the history_fts full-text index and the triggers that keep it in
+    sync with history. Existing rows are indexed the first time it is created.
+    """
+    global FTS_ENABLED
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone()
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(body, tokenize = 'unicode61')")
+    except sqlite3.OperationalError as e:
+        print(f"WARNING: SQLite was built without FTS5, history keyword search falls back to LIKE: {e}")
+        FTS_ENABLED = False
+        return
+
+    new_text = _PAYLOAD_TEXT_SQL.format(payload="new.payload")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history
+        WHEN json_valid(new.payload)
+        BEGIN
+            INSERT INTO history_fts (rowid, body) VALUES (new.id, {new_text});
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history
+        BEGIN
+            DELETE FROM history_fts WHERE rowid = old.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE OF payload ON history
+        BEGIN
+            DELETE FROM history_fts WHERE rowid = old.id;
+            INSERT INTO history_fts (rowid, body)
+            SELECT new.id, {new_text} WHERE json_valid(new.payload);
+        END
+    """)
+    if not exists:
+        payload_text = _PAYLOAD_TEXT_SQL.format(payload="payload")
+        conn.execute(f"INSERT INTO history_fts (rowid, body) SELECT id, {payload_text} FROM history WHERE json_valid(payload)")
+    FTS_ENABLED = True
+
+def _fts_query(keyword):
+    """
+    Turns free-text user input into an FTS5 query: every word must match, and
+    quoting keeps FTS5 operators in the input from being parsed. Words match
+    whole tokens; prefix queries would scan every term sharing the prefix.
+    """
+    terms = [term.replace('"', '""') for term in keyword.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+def _row_to_dict(row):
+    return {
+        "id": row[0],
+        "event_type": row[1],
+        "user_id": row[2],
+        "session_id": row[3],
+        "payload": json.loads(row[4]) if row[4] else None,
+        "timestamp": row[5]
+    }
+
+def init_db():
+    with manager.transaction() as conn:
+        _create_schema(conn)
 
 def add_event(event_type, user_id, session_id=None, payload=None):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
     payload_json = json.dumps(payload) if payload is not None else None
-    c.execute("""
-        INSERT INTO history (event_type, user_id, session_id, payload, timestamp)
-        VALUES (?, ?, ?, ?, ?)
-    """, (event_type, user_id, session_id, payload_json, datetime.utcnow().isoformat()))
-    conn.commit()
-    conn.close()
-
-def get_history(limit=10):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT * FROM history ORDER BY timestamp DESC LIMIT ?", (limit,))
-    rows = c.fetchall()
-    conn.close()
-    history_list = []
-    for row in rows:
-        history_list.append({
-            "id": row[0],
-            "event_type": row[1],
-            "user_id": row[2],
-            "session_id": row[3],
-            "payload": json.loads(row[4]) if row[4] else None,
-            "timestamp": row[5]
-        })
-    return history_list
+    with manager.transaction() as conn:
+        cursor = conn.execute("""
+            INSERT INTO history (event_type, user_id, session_id, payload, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, (event_type, user_id, session_id, payload_json, datetime.utcnow().isoformat()))
+    return cursor.lastrowid
 
-def clear_history():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM history")
-    conn.commit()
-    conn.close()
-def search_history(event_type=None, user_id=None, keyword=None, limit=10):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+def add_events(events):
+    """
+    Inserts many history events in a single transaction.
+
+    Args:
+        events: An iterable of dicts with "event_type", "user_id" and optional
+            "session_id" and "payload" keys.
 
-    query = "SELECT * FROM history WHERE 1=1"
+    Returns:
+        The number of events written.
+    """
+    timestamp = datetime.utcnow().isoformat()
+    rows = [
+        (
+            event["event_type"],
+            event["user_id"],
+            event.get("session_id"),
+            json.dumps(event["payload"]) if event.get("payload") is not None else None,
+            event.get("timestamp") or timestamp,
+        )
+        for event in events
+    ]
+    with manager.transaction() as conn:
+        conn.executemany("""
+            INSERT INTO history (event_type, user_id, session_id, payload, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+    return len(rows)
+
+def encode_cursor(event):
+    """Builds the opaque keyset cursor that resumes a listing after `event`."""
+    raw = json.dumps([event["timestamp"], event["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Returns the (timestamp, id) pair in a cursor, or raises ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, event_id = json.loads(raw)
+        return str(timestamp), int(event_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor!r}") from e
+
+def _recent_history(conn, event_type=None, user_id=None, session_id=None, keyword=None, cursor=None, limit=10):
+    """
+    Newest-first listing ordered by (timestamp, id), resuming strictly after
+    `cursor`. The row-value comparison lets SQLite seek straight into the
+    timestamp indexes, so deep pages cost the same as the first one.
+    """
+    query = f"SELECT {HISTORY_COLUMNS} FROM history WHERE 1=1"
     params = []
 
     if event_type:
@@ -72,25 +245,113 @@ def search_history(event_type=None, user_id=None, keyword=None, limit=10):
         query += " AND user_id = ?"
         params.append(user_id)
 
-    if keyword:
+    if session_id:
+        query += " AND session_id = ?"
+        params.append(session_id)
+
+    if keyword and FTS_ENABLED:
+        query += " AND id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)"
+        params.append(_fts_query(keyword))
+    elif keyword:
         query += " AND payload LIKE ?"
         params.append(f"%{keyword}%")
 
-    query += " ORDER BY timestamp DESC LIMIT ?"
+    if cursor:
+        query += " AND (timestamp, id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit)
+
+    rows = conn.execute(query, tuple(params)).fetchall()
+    return [_row_to_dict(row) for row in rows]
+
+def get_history(limit=10, session_id=None, cursor=None):
+    return _recent_history(manager.connection(), session_id=session_id, cursor=cursor, limit=limit)
+
+def iter_history_pages(event_type=None, user_id=None, session_id=None, chunk_size=500):
+    """
+    Yields every matching event, newest first, as lists of up to `chunk_size`
+    rows fetched by keyset cursor, so memory stays constant for any history
+    size. Each page is a separate query, so the generator may be advanced
+    from different threads.
+    """
+    cursor = None
+    while True:
+        chunk = _recent_history(
+            manager.connection(), event_type, user_id, session_id, cursor=cursor, limit=chunk_size
+        )
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        cursor = encode_cursor(chunk[-1])
+
+def iter_history(event_type=None, user_id=None, session_id=None, chunk_size=500):
+    """Yields every matching event, newest first; see `iter_history_pages`."""
+    for chunk in iter_history_pages(event_type, user_id, session_id, chunk_size=chunk_size):
+        yield from chunk
+
+def clear_history():
+    with manager.transaction() as conn:
+        conn.execute("DELETE FROM history")
+
+def search_order(keyword=None, cursor=None, order=None):
+    """
+    Returns the order search_history will actually use for these arguments:
+    "relevance" only for a keyword search ranked through FTS, else "recent".
+    """
+    keyword = keyword.strip() if keyword else None
+    if order is None:
+        order = "relevance" if keyword and not cursor else "recent"
+    return "relevance" if order == "relevance" and keyword and FTS_ENABLED else "recent"
+
+def search_history(event_type=None, user_id=None, keyword=None, limit=10, cursor=None, order=None):
+    """
+    Searches history by event type, user and payload keyword.
+
+    `order` is "relevance" (the default when a keyword is given) or "recent".
+    Relevance-ranked results are a single page; pass order="recent" to page
+    through keyword matches with a cursor.
+    """
+    conn = manager.connection()
+    keyword = keyword.strip() if keyword else None
+    if search_order(keyword, cursor, order) == "relevance":
+        if cursor:
+            raise ValueError("Relevance-ranked search results cannot be paged; use order='recent'.")
+        return _search_history_fts(conn, event_type, user_id, keyword, limit)
+
+    return _recent_history(conn, event_type, user_id, keyword=keyword, cursor=cursor, limit=limit)
+
+def _search_history_fts(conn, event_type, user_id, keyword, limit):
+    """
+    Ranked keyword search through history_fts, best matches first.
+
+    Relevance is computed over the FTS_RANK_WINDOW most recent matching rows
+    only, so a keyword that matches half the table costs the same as a rare
+    one and latency stays flat as history grows.
+    """
+    columns = ", ".join(f"h.{column.strip()}" for column in HISTORY_COLUMNS.split(","))
+    inner = f"""
+        SELECT {columns}, history_fts.rank AS score FROM history_fts
+        JOIN history h ON h.id = history_fts.rowid
+        WHERE history_fts MATCH ?
+    """
+    params = [_fts_query(keyword)]
+
+    if event_type:
+        inner += " AND h.event_type = ?"
+        params.append(event_type)
+
+    if user_id:
+        inner += " AND h.user_id = ?"
+        params.append(user_id)
+
+    inner += " ORDER BY history_fts.rowid DESC LIMIT ?"
+    params.append(max(limit, FTS_RANK_WINDOW))
+
+    query = f"SELECT {HISTORY_COLUMNS} FROM ({inner}) ORDER BY score, timestamp DESC LIMIT ?"
     params.append(limit)
 
-    c.execute(query, tuple(params))
-    rows = c.fetchall()
-    conn.close()
-
-    history_list = []
-    for row in rows:
-        history_list.append({
-            "id": row[0],
-            "event_type": row[1],
-            "user_id": row[2],
-            "session_id": row[3],
-            "payload": json.loads(row[4]) if row[4] else None,
-            "timestamp": row[5]
-        })
-    return history_list
+    rows = conn.execute(query, tuple(params)).fetchall()
+    return [_row_to_dict(row) for row in rows]
@@ -1,15 +1,56 @@
-from fastapi import APIRouter, Query
-from typing import Optional
+import json
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Literal, Optional
 from ai_core import history_db
 
 router = APIRouter()
 
+class HistoryEventIn(BaseModel):
+    event_type: str
+    user_id: str
+    session_id: Optional[str] = None
+    payload: Optional[dict] = None
+
+def _set_next_cursor(response: Response, events: list, limit: int):
+    # A full page means there may be more; the client passes this back as `cursor`.
+    if events and len(events) == limit:
+        response.headers["X-Next-Cursor"] = history_db.encode_cursor(events[-1])
+
 @router.get("/history")
-def read_history(limit: int = Query(10, description="Number of events to return")):
+def read_history(
+    response: Response,
+    limit: int = Query(10, description="Number of events to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page")
+):
+    """
+    Return the most recent history events, one page at a time.
+    """
+    try:
+        events = history_db.get_history(limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, events, limit)
+    return events
+
+@router.get("/history/export")
+def export_history(
+    event_type: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    chunk_size: int = Query(500, ge=1, le=10000)
+):
     """
-    Return the most recent history events.
+    Stream every matching history event as NDJSON, newest first.
     """
-    return history_db.get_history(limit)
+    def generate():
+        for chunk in history_db.iter_history_pages(event_type, user_id, session_id, chunk_size=chunk_size):
+            yield "".join(json.dumps(event) + "\n" for event in chunk)
+
+    # A sync generator is iterated in the threadpool, keeping the event loop
+    # free; yielding whole chunks costs one thread hop and one send per chunk.
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 @router.post("/history/add")
 def create_event(
@@ -21,8 +62,16 @@ def create_event(
     """
     Add a new history event to the database.
     """
-    history_db.add_event(event_type, user_id, session_id, payload)
-    return {"status": "success", "message": "Event added"}
+    event_id = history_db.add_event(event_type, user_id, session_id, payload)
+    return {"status": "success", "message": "Event added", "id": event_id}
+
+@router.post("/history/add-batch")
+def create_events(events: List[HistoryEventIn]):
+    """
+    Add many history events in a single transaction.
+    """
+    count = history_db.add_events(event.dict() for event in events)
+    return {"status": "success", "message": f"{count} events added", "count": count}
 
 @router.delete("/history/clear")
 def clear_all_history():
@@ -33,12 +82,25 @@ def clear_all_history():
     return {"status": "success", "message": "All history cleared"}
 @router.get("/history/search")
 def search_history_route(
+    response: Response,
     event_type: Optional[str] = None,
     user_id: Optional[str] = None,
     keyword: Optional[str] = None,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    order: Optional[Literal["relevance", "recent"]] = None
 ):
     """
     Search history by event_type, user_id, or keyword in payload.
+    Keyword matches are ranked by relevance unless order=recent, which
+    returns pages that can be continued with the X-Next-Cursor header.
     """
-    return history_db.search_history(event_type, user_id, keyword, limit)
+    try:
+        events = history_db.search_history(event_type, user_id, keyword, limit, cursor=cursor, order=order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Only recency-ordered results can be continued with a cursor.
+    if history_db.search_order(keyword, cursor, order) == "recent":
+        _set_next_cursor(response, events, limit)
+    return events
+
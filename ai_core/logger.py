@@ -1,9 +1,163 @@
-import json, time, os
+import json, time, os, gzip, atexit, shutil, threading
 from pathlib import Path
+from decouple import config
 DATA_DIR = Path(__file__).resolve().parent / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 EVENT_FILE = DATA_DIR / "events.jsonl"
 
+# --- Event log tuning ---
+EVENT_LOG_MAX_BYTES = config("EVENT_LOG_MAX_BYTES", default=64 * 1024 * 1024, cast=int)
+EVENT_LOG_ROTATE_DAILY = config("EVENT_LOG_ROTATE_DAILY", default=True, cast=bool)
+EVENT_LOG_COMPRESS = config("EVENT_LOG_COMPRESS", default=True, cast=bool)
+EVENT_LOG_FLUSH_RECORDS = config("EVENT_LOG_FLUSH_RECORDS", default=256, cast=int)
+EVENT_LOG_FLUSH_INTERVAL = config("EVENT_LOG_FLUSH_INTERVAL", default=1.0, cast=float)
+
+class EventLogWriter:
+    """
+    Appends JSON lines to one long-lived file handle.
+
+    Records are buffered in memory and written when the buffer reaches
+    `flush_records`, when `flush_interval` seconds have passed (checked by a
+    background thread), or on close. The file is rotated to
+    events-<timestamp>.<seq>.jsonl[.gz] when it would exceed `max_bytes` or when the
+    UTC day changes. Rotation itself is only a rename; rotated files are
+    gzipped by the background thread, so writers never wait on compression.
+    """
+    def __init__(self, path=EVENT_FILE, max_bytes=EVENT_LOG_MAX_BYTES, rotate_daily=EVENT_LOG_ROTATE_DAILY,
+                 compress=EVENT_LOG_COMPRESS, flush_records=EVENT_LOG_FLUSH_RECORDS, flush_interval=EVENT_LOG_FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._file = None
+        self._day = None
+        self._closed = threading.Event()
+        self._flusher = None
+        self._rotated = []  # renamed files waiting to be compressed
+        self._compress_lock = threading.Lock()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        # An existing file belongs to the day it was last written, not today.
+        mtime = self.path.stat().st_mtime if self._file.tell() else time.time()
+        self._day = time.strftime("%Y-%m-%d", time.gmtime(mtime))
+        if self._flusher is None and (self.flush_interval > 0 or self.compress):
+            self._flusher = threading.Thread(target=self._flush_periodically, name="event-log-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval if self.flush_interval > 0 else 1.0):
+            if self.flush_interval > 0:
+                self.flush()
+            self._compress_rotated()
+
+    def _compress_rotated(self):
+        # Runs without the write lock; the temporary name is outside the
+        # rotated-file pattern, so readers never see a partial archive.
+        with self._compress_lock:
+            with self._lock:
+                pending, self._rotated = self._rotated, []
+            for rotated in pending:
+                partial = rotated.with_name(f".{rotated.name}.gz.partial")
+                with open(rotated, "rb") as src, gzip.open(partial, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(partial, f"{rotated}.gz")
+                rotated.unlink()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+        # The sequence number keeps names unique and lexically ordered when
+        # several rotations happen within one second.
+        n = 0
+        rotated = self.path.with_name(f"{self.path.stem}-{stamp}.{n:03d}{self.path.suffix}")
+        while rotated.exists() or Path(f"{rotated}.gz").exists():
+            n += 1
+            rotated = self.path.with_name(f"{self.path.stem}-{stamp}.{n:03d}{self.path.suffix}")
+        os.replace(self.path, rotated)
+        if self.compress:
+            self._rotated.append(rotated)
+
+    def _write_buffer(self):
+        # Caller holds the lock.
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        chunk = "".join(self._buffer)
+        self._buffer.clear()
+        today = time.strftime("%Y-%m-%d", time.gmtime())
+        size = self._file.tell()
+        if size and ((self.rotate_daily and today != self._day) or size + len(chunk.encode("utf-8")) > self.max_bytes):
+            self._rotate()
+            self._open()
+        self._file.write(chunk)
+        self._file.flush()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_records:
+                self._write_buffer()
+
+    def flush(self):
+        with self._lock:
+            self._write_buffer()
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            self._write_buffer()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self._compress_rotated()
+
+def _decode_records(line: str, decoder=json.JSONDecoder()):
+    """
+    Yields every JSON object in one line. Files written before the writer
+    existed joined records with a literal backslash-n, so several records can
+    share a line.
+    """
+    pos, end = 0, len(line)
+    while pos < end:
+        if line.startswith("\\n", pos):
+            pos += 2
+            continue
+        if line[pos].isspace():
+            pos += 1
+            continue
+        record, pos = decoder.raw_decode(line, pos)
+        yield record
+
+def iter_events(path=EVENT_FILE, include_rotated=True):
+    """
+    Replays the event log in write order: rotated files (oldest first,
+    gzipped or not) followed by the live file.
+    """
+    path = Path(path)
+    files = sorted(path.parent.glob(f"{path.stem}-*{path.suffix}*")) if include_rotated else []
+    if path.exists():
+        files.append(path)
+    for file in files:
+        # Mid-compression, a rotated file briefly exists in both forms.
+        if file.suffix != ".gz" and Path(f"{file}.gz") in files:
+            continue
+        opener = gzip.open if file.suffix == ".gz" else open
+        with opener(file, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield from _decode_records(line)
+
+event_log = EventLogWriter(EVENT_FILE)
+atexit.register(event_log.close)
+
 def capture_event(event: dict):
     # attach provenance fields
     record = {
@@ -17,6 +171,5 @@ def capture_event(event: dict):
         },
         "payload": event.get("payload", {})
     }
-    with open(EVENT_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\\n")
+    event_log.write(record)
     return record
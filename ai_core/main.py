@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from .database import models
 # We now import all of our API router modules
-from .api import ingestion, search_routes, personalization, alchemy
+from .api import ingestion, search_routes, personalization, alchemy, metrics, profiling
 
 # This creates the database tables on startup
 models.create_db_and_tables()
@@ -17,6 +17,12 @@ app.include_router(ingestion.router, prefix="/api/v1")
 app.include_router(search_routes.router, prefix="/api/v1")
 app.include_router(personalization.router, prefix="/api/v1")
 app.include_router(alchemy.router, prefix="/api/v1") # Add the new alchemy router
+app.include_router(metrics.router)
+
+# Per-route request latency for /metrics and the Server-Timing header
+app.add_middleware(metrics.MetricsMiddleware)
+# Admin-only, opt-in request profiling
+app.add_middleware(profiling.ProfilingMiddleware)
 
 @app.get("/")
 def read_root():
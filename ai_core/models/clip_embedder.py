@@ -2,28 +2,131 @@ import torch
 from PIL import Image
 import numpy as np
 import warnings
+from typing import List
 from sentence_transformers import SentenceTransformer
 import librosa
+from decouple import config
+
+from ai_core.core.metrics import timed_model_load
+from ai_core.models.text_encoder import build_text_encoder
 
 warnings.filterwarnings("ignore")
 
+SAMPLE_RATE = 22050
+# The mel spectrogram settings the embedder renders (librosa's defaults).
+# Cached features are keyed on these, so changing one invalidates them.
+SPECTROGRAM_PARAMS = {"sr": SAMPLE_RATE, "n_fft": 2048, "hop_length": 512, "n_mels": 128}
+
+# "full" renders the whole track as one image; "windowed" decodes only
+# AUDIO_EMBEDDING_WINDOWS evenly spaced windows, embeds them as one batch and
+# averages the results, so the cost per track is constant.
+AUDIO_EMBEDDING_MODE = config("AUDIO_EMBEDDING_MODE", default="full")
+AUDIO_EMBEDDING_WINDOWS = config("AUDIO_EMBEDDING_WINDOWS", default=4, cast=int)
+AUDIO_EMBEDDING_WINDOW_SECONDS = config("AUDIO_EMBEDDING_WINDOW_SECONDS", default=10.0, cast=float)
+
+def embedding_params(mode: str = AUDIO_EMBEDDING_MODE) -> dict:
+    """Everything that determines the spectrogram(s) computed for a track."""
+    if mode == "windowed":
+        return dict(SPECTROGRAM_PARAMS, mode=mode, windows=AUDIO_EMBEDDING_WINDOWS, window_seconds=AUDIO_EMBEDDING_WINDOW_SECONDS)
+    return dict(SPECTROGRAM_PARAMS)
+
+def load_audio(file_path: str, sr: int = SAMPLE_RATE):
+    """Decodes a file to a mono waveform at the embedder's sample rate."""
+    return librosa.load(file_path, sr=sr, mono=True)
+
+def get_duration(file_path: str) -> float:
+    try:
+        return librosa.get_duration(path=file_path)
+    except TypeError:
+        # librosa < 0.10
+        return librosa.get_duration(filename=file_path)
+
+def load_windows(file_path: str, n_windows: int = AUDIO_EMBEDDING_WINDOWS,
+                 window_seconds: float = AUDIO_EMBEDDING_WINDOW_SECONDS, sr: int = SAMPLE_RATE):
+    """
+    Decodes `n_windows` evenly spaced windows of `window_seconds` each, using
+    librosa's offset/duration so the rest of the file is never decoded.
+    Tracks shorter than one window are decoded whole.
+
+    Returns:
+        A (n_windows, samples) array and the sample rate.
+    """
+    duration = get_duration(file_path)
+    if duration <= window_seconds:
+        y, sr = load_audio(file_path, sr=sr)
+        return y[np.newaxis, :], sr
+    offsets = np.unique(np.linspace(0.0, duration - window_seconds, n_windows).round(2))
+    windows = [
+        librosa.load(file_path, sr=sr, mono=True, offset=float(offset), duration=window_seconds)[0]
+        for offset in offsets
+    ]
+    length = min(len(window) for window in windows)
+    return np.stack([window[:length] for window in windows]), sr
+
+def compute_spectrogram(y: np.ndarray, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Returns the log-mel spectrogram of a waveform, normalized to [0, 1]."""
+    mel_spectrogram = librosa.feature.melspectrogram(
+        y=y, sr=sr, n_fft=SPECTROGRAM_PARAMS["n_fft"],
+        hop_length=SPECTROGRAM_PARAMS["hop_length"], n_mels=SPECTROGRAM_PARAMS["n_mels"]
+    )
+    log_mel_spectrogram = librosa.power_to_db(mel_spectrogram, ref=np.max)
+    return (log_mel_spectrogram - log_mel_spectrogram.min()) / (log_mel_spectrogram.max() - log_mel_spectrogram.min())
+
+def compute_spectrograms(y: np.ndarray, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Spectrogram of a waveform, or a stack of one spectrogram per window for
+    the (windows, samples) array returned by `load_windows`.
+    """
+    if y.ndim == 1:
+        return compute_spectrogram(y, sr)
+    return np.stack([compute_spectrogram(window, sr) for window in y])
+
+def spectrogram_to_uint8(spectrogram: np.ndarray) -> np.ndarray:
+    """Quantizes a normalized spectrogram to the 8-bit pixels the model sees."""
+    if spectrogram.dtype == np.uint8:
+        return spectrogram
+    return (spectrogram * 255).astype(np.uint8)
+
 class SimpleClipEmbedder:
-    def __init__(self, device="cuda"):
+    def __init__(self, device="cuda", text_backend: str = "torch"):
         print(f"Loading public CLIP model onto device '{device}'...")
         self.device = device
-        self.model = SentenceTransformer('clip-ViT-L-14', device=self.device)
+        with timed_model_load("clip-ViT-L-14"):
+            self.model = SentenceTransformer('clip-ViT-L-14', device=self.device)
+        with timed_model_load(f"clip_text_encoder_{text_backend}"):
+            self.text_encoder = build_text_encoder(self.model, text_backend)
         print("CLIP model loaded successfully.")
 
-    def get_audio_embedding_from_file(self, file_path: str) -> np.ndarray:
+    def embed_spectrograms(self, spectrograms, batch_size: int = 8) -> np.ndarray:
+        """
+        Encodes spectrograms, rendered as RGB images, in batches. Accepts
+        normalized float spectrograms or their uint8 form.
+        """
+        images = [
+            Image.fromarray(np.stack([spectrogram_to_uint8(spectrogram)]*3, axis=-1))
+            for spectrogram in spectrograms
+        ]
+        return self.model.encode(images, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+    def embed_tracks(self, spectrograms, batch_size: int = 8) -> np.ndarray:
+        """
+        One embedding per track, where each entry is a single spectrogram or
+        a (windows, mels, frames) stack. All windows of all tracks are
+        encoded together and then mean-pooled per track.
+        """
+        stacks = [s[np.newaxis] if s.ndim == 2 else s for s in spectrograms]
+        embeddings = self.embed_spectrograms([window for stack in stacks for window in stack], batch_size=batch_size)
+        bounds = np.cumsum([0] + [len(stack) for stack in stacks])
+        return np.stack([embeddings[start:end].mean(axis=0) for start, end in zip(bounds[:-1], bounds[1:])])
+
+    def get_audio_embedding_from_file(self, file_path: str, mode: str = AUDIO_EMBEDDING_MODE) -> np.ndarray:
         try:
-            y, sr = librosa.load(file_path, sr=22050, mono=True)
-            mel_spectrogram = librosa.feature.melspectrogram(y=y, sr=sr)
-            log_mel_spectrogram = librosa.power_to_db(mel_spectrogram, ref=np.max)
-            normalized_spectrogram = (log_mel_spectrogram - log_mel_spectrogram.min()) / (log_mel_spectrogram.max() - log_mel_spectrogram.min())
-            spectrogram_rgb = np.stack([normalized_spectrogram]*3, axis=-1)
-            image = Image.fromarray((spectrogram_rgb * 255).astype(np.uint8))
-            embedding = self.model.encode(image, batch_size=1, convert_to_numpy=True, show_progress_bar=False)
-            return embedding
+            if mode == "windowed":
+                y, sr = load_windows(file_path)
+            else:
+                y, sr = load_audio(file_path)
+            spectrograms = compute_spectrograms(y, sr)
+            return self.embed_tracks([spectrograms], batch_size=len(spectrograms) if spectrograms.ndim == 3 else 1)[0]
         except Exception as e:
             print(f"Error processing file {file_path}: {e}")
             return None
@@ -31,8 +134,15 @@ class SimpleClipEmbedder:
     def get_text_embedding(self, text: str) -> np.ndarray:
         """Encodes a text string into an embedding vector."""
         try:
-            embedding = self.model.encode(text, convert_to_numpy=True, show_progress_bar=False)
-            return embedding
+            return self.text_encoder.encode([text])[0]
         except Exception as e:
             print(f"Error encoding text '{text}': {e}")
             return None
+
+    def get_text_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Encodes several text strings in one model call."""
+        try:
+            return self.text_encoder.encode(texts, batch_size=len(texts))
+        except Exception as e:
+            print(f"Error encoding {len(texts)} texts: {e}")
+            return None
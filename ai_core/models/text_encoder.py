@@ -0,0 +1,172 @@
+import copy
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import torch
+from decouple import config
+
+# --- Configuration ---
+# "torch" (fp32), "torch-int8" (dynamic int8 quantization of the text tower),
+# "onnx" or "onnx-int8" (ONNX Runtime, optionally with int8 weights).
+TEXT_ENCODER_BACKEND = config("TEXT_ENCODER_BACKEND", default="torch")
+TEXT_ENCODER_ONNX_DIR = Path(config("TEXT_ENCODER_ONNX_DIR", default=str(Path(__file__).resolve().parent.parent / "data" / "models")))
+TEXT_ENCODER_THREADS = config("TEXT_ENCODER_THREADS", default=0, cast=int)
+# An optimized backend is only used if every probe query's embedding has at
+# least this cosine similarity with the fp32 embedding.
+TEXT_ENCODER_MIN_COSINE = config("TEXT_ENCODER_MIN_COSINE", default=0.98, cast=float)
+
+TEXT_ENCODER_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Representative search queries used for the startup agreement check.
+PROBE_QUERIES = [
+    "upbeat summer pop song",
+    "sad piano ballad about lost love",
+    "aggressive heavy metal with fast drums",
+    "chill lofi beats to study to",
+    "energetic dance track for the gym",
+    "acoustic folk guitar by the campfire",
+    "dark atmospheric synthwave at night",
+    "a jazzy saxophone solo in a smoky bar",
+]
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two sets of embeddings."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
+
+def _clip_module(model):
+    # sentence-transformers wraps the Hugging Face CLIP model in its first module.
+    return model[0]
+
+class TorchTextEncoder:
+    """Encodes text through the SentenceTransformer model itself."""
+    def __init__(self, model):
+        self.model = model
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        with torch.inference_mode():
+            return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+class QuantizedTorchTextEncoder(TorchTextEncoder):
+    """
+    Swaps the CLIP text tower's Linear layers for dynamically quantized int8
+    ones. The vision tower is untouched, so image embeddings are unchanged.
+    Call `restore()` to put the fp32 layers back.
+    """
+    def __init__(self, model):
+        super().__init__(model)
+        clip = _clip_module(model).model
+        self._original = (clip.text_model, clip.text_projection)
+
+        holder = torch.nn.Module()
+        holder.text_model = clip.text_model
+        holder.text_projection = clip.text_projection
+        quantized = torch.ao.quantization.quantize_dynamic(holder, {torch.nn.Linear}, dtype=torch.qint8)
+        clip.text_model = quantized.text_model
+        clip.text_projection = quantized.text_projection
+
+    def restore(self) -> None:
+        clip = _clip_module(self.model).model
+        clip.text_model, clip.text_projection = self._original
+
+class _TextTower(torch.nn.Module):
+    def __init__(self, clip):
+        super().__init__()
+        self.text_model = clip.text_model
+        self.text_projection = clip.text_projection
+
+    def forward(self, input_ids, attention_mask):
+        pooled = self.text_model(input_ids=input_ids, attention_mask=attention_mask)[1]
+        return self.text_projection(pooled)
+
+class OnnxTextEncoder:
+    """
+    Runs the CLIP text tower with ONNX Runtime on CPU. The model is exported
+    once to TEXT_ENCODER_ONNX_DIR (and int8-quantized if requested) and
+    reused on later starts.
+    """
+    def __init__(self, model, quantize: bool = False, onnx_dir: Path = TEXT_ENCODER_ONNX_DIR, threads: int = TEXT_ENCODER_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The 'onnx' text encoder backends require the onnxruntime package.") from e
+
+        clip_module = _clip_module(model)
+        self.tokenizer = clip_module.processor.tokenizer
+        path = self.export(clip_module.model, Path(onnx_dir), quantize)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def export(clip, onnx_dir: Path, quantize: bool) -> Path:
+        onnx_dir.mkdir(parents=True, exist_ok=True)
+        fp32_path = onnx_dir / "clip_text.onnx"
+        int8_path = onnx_dir / "clip_text.int8.onnx"
+        if not fp32_path.exists():
+            print(f"Exporting the CLIP text encoder to {fp32_path}...")
+            tower = _TextTower(copy.deepcopy(clip).float().cpu()).eval()
+            dummy = torch.ones((1, 8), dtype=torch.long)
+            torch.onnx.export(
+                tower, (dummy, dummy), str(fp32_path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["text_embeds"],
+                dynamic_axes={"input_ids": {0: "batch", 1: "sequence"}, "attention_mask": {0: "batch", 1: "sequence"}, "text_embeds": {0: "batch"}},
+                opset_version=14,
+            )
+        if not quantize:
+            return fp32_path
+        if not int8_path.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            print(f"Quantizing the ONNX text encoder to {int8_path}...")
+            quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        return int8_path
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True, max_length=77, return_tensors="np")
+            outputs.append(self.session.run(["text_embeds"], {
+                "input_ids": tokens["input_ids"].astype(np.int64),
+                "attention_mask": tokens["attention_mask"].astype(np.int64),
+            })[0])
+        return np.concatenate(outputs)
+
+def build_text_encoder(model, backend: str = TEXT_ENCODER_BACKEND, min_cosine: float = TEXT_ENCODER_MIN_COSINE):
+    """
+    Returns a text encoder for `backend`. Optimized backends are checked
+    against the fp32 model on PROBE_QUERIES first. If agreement is below
+    `min_cosine`, or the backend cannot be built, the fp32 encoder is
+    returned instead.
+    """
+    if backend not in TEXT_ENCODER_BACKENDS:
+        raise ValueError(f"Unknown text encoder backend '{backend}'. Choose from {', '.join(TEXT_ENCODER_BACKENDS)}.")
+    fp32 = TorchTextEncoder(model)
+    if backend == "torch":
+        return fp32
+
+    reference = fp32.encode(PROBE_QUERIES)
+    encoder = None
+    try:
+        if backend == "torch-int8":
+            encoder = QuantizedTorchTextEncoder(model)
+        else:
+            encoder = OnnxTextEncoder(model, quantize=backend == "onnx-int8")
+        agreement = cosine_agreement(reference, encoder.encode(PROBE_QUERIES))
+    except Exception as e:
+        print(f"WARNING: Could not build the '{backend}' text encoder, using fp32: {e}")
+        if isinstance(encoder, QuantizedTorchTextEncoder):
+            encoder.restore()
+        return fp32
+
+    if agreement.min() < min_cosine:
+        print(f"WARNING: '{backend}' text encoder agreement {agreement.min():.4f} is below {min_cosine}; using fp32.")
+        if isinstance(encoder, QuantizedTorchTextEncoder):
+            encoder.restore()
+        return fp32
+    print(f"Using the '{backend}' text encoder (cosine agreement with fp32: min {agreement.min():.4f}, mean {agreement.mean():.4f}).")
+    return encoder
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import argparse
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from ai_core.database.session import build_engine
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user_events (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        song_id INTEGER NOT NULL,
+        event_type VARCHAR NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def run_workload(engine, read_engine, writers: int, readers: int, duration: float) -> dict:
+    """
+    Hammers the engine with concurrent writer and reader threads for a fixed
+    duration and counts completed operations and lock errors.
+    """
+    stats = {"writes": 0, "reads": 0, "locked_errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def bump(key):
+        with lock:
+            stats[key] += 1
+
+    def writer(worker_id):
+        i = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        text("INSERT INTO user_events (user_id, song_id, event_type) VALUES (:u, :s, 'SONG_PLAYED_FULL')"),
+                        {"u": worker_id, "s": i},
+                    )
+                bump("writes")
+            except OperationalError:
+                bump("locked_errors")
+            i += 1
+
+    def reader(worker_id):
+        while time.perf_counter() < deadline:
+            try:
+                with read_engine.connect() as conn:
+                    conn.execute(
+                        text("SELECT DISTINCT song_id FROM user_events WHERE user_id = :u"),
+                        {"u": worker_id % max(writers, 1)},
+                    ).fetchall()
+                bump("reads")
+            except OperationalError:
+                bump("locked_errors")
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats["writes_per_sec"] = round(stats["writes"] / duration, 1)
+    stats["reads_per_sec"] = round(stats["reads"] / duration, 1)
+    return stats
+
+def benchmark(writers: int, readers: int, duration: float):
+    print("--- 🚀 SQLite Concurrency Benchmark ---")
+    print(f"{writers} writer threads, {readers} reader threads, {duration}s per run.\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default_url = f"sqlite:///{Path(tmp) / 'default.db'}"
+        tuned_url = f"sqlite:///{Path(tmp) / 'tuned.db'}"
+
+        # The engine exactly as session.py used to build it.
+        default_engine = create_engine(default_url, connect_args={"check_same_thread": False})
+        tuned_engine = build_engine(tuned_url)
+        tuned_read_engine = build_engine(tuned_url, read_only=True)
+
+        results = {}
+        runs = (
+            ("default", default_engine, default_engine),
+            ("tuned", tuned_engine, tuned_read_engine),
+        )
+        for name, engine, read_engine in runs:
+            with engine.begin() as conn:
+                conn.execute(text(SCHEMA))
+            results[name] = run_workload(engine, read_engine, writers, readers, duration)
+            engine.dispose()
+            read_engine.dispose()
+
+    for name, stats in results.items():
+        print(
+            f"{name:>8}: {stats['writes_per_sec']:>9} writes/s  "
+            f"{stats['reads_per_sec']:>9} reads/s  "
+            f"{stats['locked_errors']:>5} 'database is locked' errors"
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the default and tuned SQLite engines under concurrent load.")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    benchmark(args.writers, args.readers, args.duration)
@@ -0,0 +1,130 @@
+import sys
+import json
+import time
+import sqlite3
+import tempfile
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+from ai_core import history_db
+
+def legacy_add_event(db_path, event_type, user_id, session_id=None, payload=None):
+    """The original connect-insert-commit-close implementation."""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    payload_json = json.dumps(payload) if payload is not None else None
+    c.execute("""
+        INSERT INTO history (event_type, user_id, session_id, payload, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    """, (event_type, user_id, session_id, payload_json, datetime.utcnow().isoformat()))
+    conn.commit()
+    conn.close()
+
+def legacy_get_history(db_path, limit=10):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT * FROM history ORDER BY timestamp DESC LIMIT ?", (limit,)).fetchall()
+    conn.close()
+    return rows
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = n / elapsed if elapsed else float("inf")
+    print(f"{label:<40} {n:>7} ops in {elapsed:7.3f}s  ->  {rate:>10.0f} ops/s")
+    return rate
+
+def benchmark(n_events: int, n_reads: int):
+    print("--- 🚀 History DB Throughput Benchmark ---\n")
+    payload = {"query": "lofi chill beats", "results_count": 5}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.db"
+        history_db.manager = history_db.HistoryConnectionManager(Path(tmp) / "managed.db")
+        history_db.init_db()
+
+        conn = sqlite3.connect(legacy_path)
+        history_db._create_schema(conn)
+        conn.close()
+
+        results = {
+            "legacy_add_event": timed("before: add_event (connect per call)", n_events, lambda: [
+                legacy_add_event(legacy_path, "search", "user-1", "s1", payload) for _ in range(n_events)
+            ]),
+            "add_event": timed("after:  add_event (persistent conn)", n_events, lambda: [
+                history_db.add_event("search", "user-1", "s1", payload) for _ in range(n_events)
+            ]),
+            "add_events": timed("after:  add_events (one batch)", n_events, lambda: history_db.add_events(
+                {"event_type": "search", "user_id": "user-1", "session_id": "s1", "payload": payload}
+                for _ in range(n_events)
+            )),
+            "legacy_get_history": timed("before: get_history", n_reads, lambda: [
+                legacy_get_history(legacy_path) for _ in range(n_reads)
+            ]),
+            "get_history": timed("after:  get_history", n_reads, lambda: [
+                history_db.get_history() for _ in range(n_reads)
+            ]),
+        }
+        history_db.manager.close_all()
+
+    return results
+
+def benchmark_keyword_search(sizes, n_queries: int = 200):
+    """
+    Measures keyword search latency as the table grows, comparing the old
+    LIKE scan against the FTS5 index used by search_history.
+    """
+    print("\n--- 🔎 Keyword Search Scaling ---\n")
+    words = ["lofi", "jazz", "ambient", "workout", "focus", "rainy", "synthwave", "acoustic", "piano", "latin"]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history_db.manager = history_db.HistoryConnectionManager(Path(tmp) / "search.db")
+        conn = history_db.manager.connection()
+        total = 0
+        for size in sizes:
+            history_db.add_events(
+                {
+                    "event_type": "search",
+                    "user_id": f"user-{i % 100}",
+                    "payload": {"query": f"{words[i % len(words)]} {words[(i * 7) % len(words)]} mix {i}"},
+                }
+                for i in range(total, size)
+            )
+            total = size
+
+            # A common keyword (10% of rows) and a rare one (a single row).
+            results[size] = {}
+            for label, keyword in (("common", "ambient"), ("rare", str(size // 2))):
+                start = time.perf_counter()
+                for _ in range(n_queries):
+                    conn.execute(
+                        "SELECT * FROM history WHERE payload LIKE ? ORDER BY timestamp DESC LIMIT 10", (f"%{keyword}%",)
+                    ).fetchall()
+                like_ms = (time.perf_counter() - start) / n_queries * 1000
+
+                start = time.perf_counter()
+                for _ in range(n_queries):
+                    history_db.search_history(keyword=keyword, limit=10)
+                fts_ms = (time.perf_counter() - start) / n_queries * 1000
+
+                results[size][label] = {"like_ms": round(like_ms, 3), "fts_ms": round(fts_ms, 3)}
+                print(f"{size:>9} rows, {label:<6} keyword:  LIKE {like_ms:8.3f} ms/query   FTS5 {fts_ms:8.3f} ms/query")
+        history_db.manager.close_all()
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure history_db throughput before and after the connection manager.")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--search-sizes", type=int, nargs="*", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    benchmark(args.events, args.reads)
+    if args.search_sizes:
+        benchmark_keyword_search(args.search_sizes)
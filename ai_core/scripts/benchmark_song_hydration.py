@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from ai_core.api import schemas
+from ai_core.database import models
+from ai_core.database.session import build_engine
+from ai_core.core.song_hydration import hydrate_songs, song_cache
+
+def legacy_hydrate(db, song_ids):
+    """The full-row fetch and list.index sort both engines used to do."""
+    songs = db.query(models.Song).filter(models.Song.id.in_(song_ids)).all()
+    songs.sort(key=lambda song: song_ids.index(song.id))
+    return songs
+
+def row_bytes(values):
+    return sum(len(v) if isinstance(v, (bytes, str)) else 8 for v in values if v is not None)
+
+def benchmark(n_songs: int, top_k: int, n_requests: int):
+    print("--- 🚀 Song Hydration Benchmark ---")
+    print(f"{n_songs} songs, top_k={top_k}, {n_requests} requests per variant.\n")
+
+    engine = build_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    rng = np.random.default_rng(0)
+    lyrics = "la " * 1000
+    db.add_all([
+        models.Song(
+            id=i, filepath=f"song_{i}.mp3", title=f"Song {i}", artist=f"Artist {i % 50}",
+            clip_embedding=rng.random(768, dtype=np.float32).tobytes(),
+            bpm=120.0, key="C", lyrics=lyrics, lyric_summary="A song about repetition."
+        )
+        for i in range(1, n_songs + 1)
+    ])
+    db.commit()
+    db.close()
+
+    requests = [random.Random(i).sample(range(1, n_songs + 1), top_k) for i in range(n_requests)]
+    results = {}
+
+    # "lean" clears the song cache before every request to measure the SQL
+    # path alone; "cached" shows the steady state with a warm cache.
+    variants = (("legacy", legacy_hydrate, False), ("lean", hydrate_songs, True), ("cached", hydrate_songs, False))
+    for name, hydrate, cold in variants:
+        if name == "cached":
+            db = Session()
+            for song_ids in requests:
+                hydrate(db, song_ids)
+            db.close()
+        fetch_time = serialize_time = 0.0
+        bytes_read = 0
+        for song_ids in requests:
+            if cold:
+                song_cache.invalidate()
+            db = Session()  # fresh identity map, as in a real request
+            start = time.perf_counter()
+            songs = hydrate(db, song_ids)
+            fetch_time += time.perf_counter() - start
+
+            if name == "legacy":
+                bytes_read += sum(row_bytes([s.id, s.filepath, s.title, s.artist, s.clip_embedding, s.bpm, s.key, s.lyrics, s.lyric_summary]) for s in songs)
+            elif cold:
+                bytes_read += sum(row_bytes(s.model_dump().values()) for s in songs)
+
+            start = time.perf_counter()
+            [schemas.Song.model_validate(song).model_dump_json() for song in songs]
+            serialize_time += time.perf_counter() - start
+            db.close()
+
+        results[name] = {
+            "fetch_ms_per_request": round(fetch_time / n_requests * 1000, 3),
+            "serialize_ms_per_request": round(serialize_time / n_requests * 1000, 3),
+            "bytes_read_per_request": bytes_read // n_requests,
+        }
+        print(
+            f"{name:>7}: fetch {results[name]['fetch_ms_per_request']:8.3f} ms  "
+            f"serialize {results[name]['serialize_ms_per_request']:7.3f} ms  "
+            f"{results[name]['bytes_read_per_request']:>9} bytes read per request"
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full-row, lean and cached Song hydration.")
+    parser.add_argument("--songs", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    benchmark(args.songs, args.top_k, args.requests)
@@ -0,0 +1,383 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import platform
+import sqlite3
+import tempfile
+import argparse
+import contextlib
+from types import SimpleNamespace
+from datetime import datetime
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from ai_core import history_db
+from ai_core.api import schemas
+from ai_core.api.ingestion import ingest_user_event
+from ai_core.database import models
+from ai_core.database.session import build_engine
+from ai_core.core.fingerprint_engine import calculate_user_fingerprint
+from ai_core.core.recommender_engine import get_recommendations
+from ai_core.core.listened_cache import listened_cache
+from ai_core.core.song_hydration import song_cache
+from ai_core.core.vector_metadata import song_metadata
+
+EMBEDDING_DIM = 768
+KEYS = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+QUERIES = [
+    "upbeat summer pop song", "sad piano ballad", "aggressive heavy metal", "chill lofi beats",
+    "energetic dance track", "acoustic folk guitar", "dark synthwave", "jazzy saxophone solo",
+    "romantic slow jam", "epic orchestral soundtrack", "rainy day indie", "latin party anthem",
+]
+HISTORY_WORDS = ["lofi", "jazz", "ambient", "workout", "focus", "rainy", "synthwave", "acoustic", "piano", "latin"]
+
+# Metrics compared against a baseline; "higher" means bigger is better.
+COMPARED_METRICS = {"p50_ms": "lower", "p95_ms": "lower", "ops_per_second": "higher"}
+# Untimed calls before measuring, and timed passes per benchmark; reported
+# metrics are the median over the passes. Set from the command line.
+WARMUP_CALLS = 5
+REPEATS = 3
+
+class StubEmbedder:
+    """
+    Deterministic stand-in for SimpleClipEmbedder. Each text is hashed to a
+    seed for a random unit vector, so results are repeatable across runs and
+    no model is downloaded or loaded.
+    """
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def get_text_embedding(self, text: str) -> np.ndarray:
+        return self._vector(text)
+
+    def get_text_embeddings(self, texts) -> np.ndarray:
+        return np.stack([self._vector(text) for text in texts])
+
+    def get_audio_embedding_from_file(self, file_path: str, mode: str = None) -> np.ndarray:
+        return self._vector(file_path)
+
+def random_embeddings(rng, n: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def synthetic_song(song_id: int, embedding: np.ndarray) -> dict:
+    return {
+        "id": song_id, "filepath": f"synthetic/song_{song_id}.mp3",
+        "title": f"Song {song_id}", "artist": f"Artist {song_id % 997}",
+        "clip_embedding": embedding.tobytes(),
+        "bpm": float(60 + song_id * 7 % 120), "key": KEYS[song_id % len(KEYS)], "year": 1960 + song_id % 65,
+    }
+
+def build_catalog(session_factory, n_songs: int, n_users: int, events_per_user: int, dim: int = EMBEDDING_DIM,
+                  seed: int = 0, chunk_size: int = 10000) -> dict:
+    """
+    Fills an empty database with `n_songs` songs with random unit embeddings
+    and `events_per_user` listening events for each of `n_users` users.
+    Generation is seeded, so the same arguments give the same catalog.
+    """
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    db = session_factory()
+    try:
+        for first in range(1, n_songs + 1, chunk_size):
+            ids = range(first, min(first + chunk_size, n_songs + 1))
+            embeddings = random_embeddings(rng, len(ids), dim)
+            db.execute(insert(models.Song), [synthetic_song(song_id, embeddings[i]) for i, song_id in enumerate(ids)])
+            db.commit()
+
+        users_per_chunk = max(1, chunk_size // max(events_per_user, 1))
+        for first in range(1, n_users + 1, users_per_chunk):
+            users = np.arange(first, min(first + users_per_chunk, n_users + 1))
+            user_ids = np.repeat(users, events_per_user)
+            song_ids = rng.integers(1, n_songs + 1, size=len(user_ids))
+            played = rng.random(len(user_ids)) < 0.75
+            db.execute(insert(models.UserEvent), [
+                {"user_id": int(user_id), "song_id": int(song_id), "event_type": "SONG_PLAYED_FULL" if full else "SKIP"}
+                for user_id, song_id, full in zip(user_ids, song_ids, played)
+            ])
+            db.commit()
+    finally:
+        db.close()
+    return {"songs": n_songs, "users": n_users, "events": n_users * events_per_user, "seconds": round(time.perf_counter() - start, 3)}
+
+def summarize(latencies, total_seconds: float) -> dict:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "calls": len(latencies),
+        "total_seconds": round(total_seconds, 3),
+        "ops_per_second": round(len(latencies) / total_seconds, 1) if total_seconds else None,
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "max_ms": round(float(latencies_ms.max()), 3),
+    }
+
+def measure(label: str, fn, calls, reset=None) -> dict:
+    """
+    Times `fn(*args)` for each args tuple in `calls`, with the engines' logging
+    silenced. The first WARMUP_CALLS calls run untimed, then all calls are
+    timed REPEATS times; each metric is the median over those passes.
+    `reset`, if given, runs before every timed pass (e.g. to empty caches).
+    """
+    calls = list(calls)
+    passes = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for args in calls[:WARMUP_CALLS]:
+            fn(*args)
+        for _ in range(max(REPEATS, 1)):
+            if reset:
+                reset()
+            latencies = []
+            start = time.perf_counter()
+            for args in calls:
+                started = time.perf_counter()
+                fn(*args)
+                latencies.append(time.perf_counter() - started)
+            passes.append(summarize(latencies, time.perf_counter() - start))
+    result = {
+        metric: round(float(np.median([run[metric] for run in passes])), 3) if passes[0][metric] is not None else None
+        for metric in passes[0]
+    }
+    result["calls"] = passes[0]["calls"]
+    result["repeats"] = len(passes)
+    print(f"{label:<34} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  {result['ops_per_second']:>10} ops/s")
+    return result
+
+def with_session(session_factory, fn):
+    """Wraps an engine function so every call gets its own session, as an API request does."""
+    def call(*args):
+        db = session_factory()
+        try:
+            return fn(*args, db)
+        finally:
+            db.close()
+    return call
+
+def bench_personalization(session_factory, sample_users) -> dict:
+    results = {}
+    results["calculate_user_fingerprint"] = measure(
+        "calculate_user_fingerprint", with_session(session_factory, calculate_user_fingerprint),
+        [(user_id,) for user_id in sample_users],
+    )
+
+    # Store the sampled users' fingerprints, as the personalization API does.
+    db = session_factory()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            fingerprints = [(user_id, calculate_user_fingerprint(user_id, db)) for user_id in sample_users]
+        db.add_all([
+            models.UserFingerprint(user_id=user_id, fingerprint_vector=vector.astype(np.float32).tobytes())
+            for user_id, vector in fingerprints if vector is not None
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    # Cold caches: every sampled user's listened set and songs are loaded once per pass.
+    def empty_caches():
+        listened_cache.invalidate()
+        song_cache.invalidate()
+    results["get_recommendations"] = measure(
+        "get_recommendations", with_session(session_factory, lambda user_id, db: get_recommendations(user_id, db, 10)),
+        [(user_id,) for user_id in sample_users], reset=empty_caches,
+    )
+    return results
+
+def bench_semantic_search(session_factory, n_songs: int, vector_limit: int, n_queries: int, dim: int,
+                          workdir: Path, seed: int) -> dict:
+    try:
+        import chromadb
+        from ai_core.core.search_engine import semantic_search
+    except ImportError as e:
+        print(f"Skipping semantic_search: {e}")
+        return {"skipped": str(e)}
+
+    # The vectors are regenerated from the catalog seed instead of re-read.
+    rng = np.random.default_rng(seed)
+    n_vectors = min(n_songs, vector_limit)
+    collection = chromadb.PersistentClient(path=str(workdir / "chroma")).get_or_create_collection(name="benchmark_songs")
+    start = time.perf_counter()
+    for first in range(1, n_vectors + 1, 5000):
+        ids = range(first, min(first + 5000, n_vectors + 1))
+        embeddings = random_embeddings(rng, len(ids), dim)
+        collection.upsert(
+            ids=[str(song_id) for song_id in ids],
+            embeddings=embeddings.tolist(),
+            metadatas=[song_metadata(SimpleNamespace(**synthetic_song(song_id, embeddings[i]))) for i, song_id in enumerate(ids)],
+        )
+    print(f"Indexed {n_vectors} vectors in {time.perf_counter() - start:.1f}s.")
+
+    embedder = StubEmbedder(dim)
+    queries = [(QUERIES[i % len(QUERIES)] + f" {i}",) for i in range(n_queries)]
+    filters = schemas.SearchFilters(bpm_min=90, bpm_max=130)
+    return {
+        "vectors": n_vectors,
+        "semantic_search": measure(
+            "semantic_search", with_session(session_factory, lambda q, db: semantic_search(q, db, collection, embedder, 10)), queries,
+            reset=song_cache.invalidate,
+        ),
+        "semantic_search_filtered": measure(
+            "semantic_search (bpm filter)",
+            with_session(session_factory, lambda q, db: semantic_search(q, db, collection, embedder, 10, filters)), queries,
+            reset=song_cache.invalidate,
+        ),
+    }
+
+def bench_ingest(session_factory, n_songs: int, n_users: int, n_events: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed + 1)
+    events = [
+        (schemas.UserEventCreate(user_id=int(user_id), song_id=int(song_id), event_type="SONG_PLAYED_FULL"),)
+        for user_id, song_id in zip(rng.integers(1, n_users + 1, n_events), rng.integers(1, n_songs + 1, n_events))
+    ]
+    return {"ingest_event": measure("ingest_event", with_session(session_factory, ingest_user_event), events)}
+
+def bench_history(workdir: Path, n_events: int, n_users: int, n_queries: int) -> dict:
+    history_db.manager = history_db.HistoryConnectionManager(workdir / "history.db")
+    history_db.init_db()
+    start = time.perf_counter()
+    for first in range(0, n_events, 10000):
+        history_db.add_events(
+            {
+                "event_type": "search", "user_id": f"user-{i % n_users}", "session_id": f"s{i % (n_users * 3)}",
+                "payload": {"query": f"{HISTORY_WORDS[i % len(HISTORY_WORDS)]} {HISTORY_WORDS[(i * 7) % len(HISTORY_WORDS)]} mix {i}"},
+            }
+            for i in range(first, min(first + 10000, n_events))
+        )
+    print(f"Loaded {n_events} history events in {time.perf_counter() - start:.1f}s.")
+
+    calls = range(n_queries)
+    results = {
+        "history_add_event": measure(
+            "history add_event", lambda i: history_db.add_event("search", f"user-{i % n_users}", "bench", {"query": "lofi"}),
+            [(i,) for i in calls],
+        ),
+        "history_get_history": measure("history get_history", lambda: history_db.get_history(limit=10), [() for _ in calls]),
+        "history_search_user": measure(
+            "history search_history (user)", lambda i: history_db.search_history(user_id=f"user-{i % n_users}", limit=10),
+            [(i,) for i in calls],
+        ),
+        "history_search_keyword": measure(
+            "history search_history (keyword)",
+            lambda i: history_db.search_history(keyword=HISTORY_WORDS[i % len(HISTORY_WORDS)], limit=10),
+            [(i,) for i in calls],
+        ),
+    }
+    history_db.manager.close_all()
+    return results
+
+def run_size(n_songs: int, args) -> dict:
+    print(f"\n--- 📀 Catalog of {n_songs} songs ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        engine = build_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+        models.Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        catalog = build_catalog(session_factory, n_songs, args.users, args.events_per_user, args.dim, args.seed)
+        print(f"Generated {catalog['songs']} songs and {catalog['events']} events in {catalog['seconds']:.1f}s.")
+
+        sample_users = np.random.default_rng(args.seed).choice(
+            np.arange(1, args.users + 1), size=min(args.samples, args.users), replace=False
+        ).tolist()
+        results = {"catalog": catalog}
+        if "personalization" in args.benchmarks:
+            results.update(bench_personalization(session_factory, sample_users))
+        if "search" in args.benchmarks:
+            results.update(bench_semantic_search(session_factory, n_songs, args.vector_limit, args.samples, args.dim, workdir, args.seed))
+        if "ingest" in args.benchmarks:
+            results.update(bench_ingest(session_factory, n_songs, args.users, args.ingest_events, args.seed))
+        if "history" in args.benchmarks:
+            results.update(bench_history(workdir, catalog["events"], args.users, args.samples))
+        engine.dispose()
+    return results
+
+def compare(current: dict, baseline: dict, tolerance: float, min_seconds: float = 0.0, min_calls: int = 0) -> list:
+    """
+    Lists every compared metric that is more than `tolerance` (a fraction)
+    worse than in the baseline, for the catalog sizes both runs measured.
+    Benchmarks that ran for less than `min_seconds` per pass or timed fewer
+    than `min_calls` calls in either run are too noisy to judge and skipped.
+    """
+    regressions = []
+    for size, benchmarks in current["results"].items():
+        for name, metrics in benchmarks.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not isinstance(metrics, dict) or not isinstance(before, dict):
+                continue
+            if not any(metric in metrics for metric in COMPARED_METRICS):
+                continue
+            if any(run.get("total_seconds", 0) < min_seconds or run.get("calls", 0) < min_calls for run in (metrics, before)):
+                print(f"{size:>8} {name:<28} skipped, too short to compare (needs {min_seconds}s and {min_calls} calls per pass)")
+                continue
+            for metric, better in COMPARED_METRICS.items():
+                new, old = metrics.get(metric), before.get(metric)
+                if not new or not old:
+                    continue
+                change = (new - old) / old
+                worse = change > tolerance if better == "lower" else change < -tolerance
+                print(f"{size:>8} {name:<28} {metric:<15} {old:>12} -> {new:>12} ({change:+.1%}){'  ❌' if worse else ''}")
+                if worse:
+                    regressions.append({"size": size, "benchmark": name, "metric": metric, "baseline": old, "current": new})
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the personalization, search, ingest and history paths on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Catalog sizes (number of songs) to run.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events-per-user", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=50, help="Users or queries timed per benchmark.")
+    parser.add_argument("--ingest-events", type=int, default=1000)
+    parser.add_argument("--vector-limit", type=int, default=100000, help="Most vectors indexed for semantic_search.")
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--benchmarks", nargs="+", choices=["personalization", "search", "ingest", "history"],
+                        default=["personalization", "search", "ingest", "history"])
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--compare", help="A previous results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a metric counts as a regression.")
+    parser.add_argument("--warmup", type=int, default=WARMUP_CALLS, help="Untimed calls before each benchmark.")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Timed passes per benchmark; metrics are their median.")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Benchmarks with a shorter timed pass are not compared.")
+    parser.add_argument("--min-calls", type=int, default=20, help="Benchmarks timing fewer calls are not compared.")
+    args = parser.parse_args()
+    WARMUP_CALLS, REPEATS = args.warmup, args.repeats
+
+    print("--- 🚀 Synthetic Benchmark Suite ---")
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "sqlite": sqlite3.sqlite_version},
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "tolerance", "min_seconds", "min_calls")},
+        "results": {str(size): run_size(size, args) for size in args.sizes},
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("WARNING: The baseline was run with a different configuration.")
+        print(f"\n--- Comparison with {args.compare} ---")
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds, args.min_calls)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}.")
+            sys.exit(1)
+        print("\n✅ No regressions.")
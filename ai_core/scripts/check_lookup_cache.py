@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from xml.sax.saxutils import escape
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+# Canned answers the stub serves, keyed by title. Any other title is "not found".
+CANNED_SONGS = {
+    "First Love": {"id": 1, "artist": "宇多田ヒカル", "year": "1999", "tags": ["j-pop"],
+                   "lyrics": "最後のキスは\nタバコの flavor がした"},
+    "Выхода нет": {"id": 2, "artist": "Сплин", "year": "1998", "tags": ["russian rock"],
+                   "lyrics": "Сколько лет прошло\nВсё о том же гудят провода"},
+    "Halo": {"id": 3, "artist": "Beyoncé", "year": "2008", "tags": ["pop", "r&b"],
+             "lyrics": "Remember those walls I built\nWell, baby, they're tumbling down"},
+}
+# Titles the stub answers with a server error, to check transient failures.
+# musicbrainzngs retries these with a growing delay, which takes about a minute.
+FAILING_TITLES = ("Flaky Song",)
+
+def find_title(query: str):
+    query = query.casefold()
+    for title in CANNED_SONGS.keys() | set(FAILING_TITLES):
+        if title.casefold() in query:
+            return title
+    return None
+
+def genius_song(title: str):
+    song = CANNED_SONGS[title]
+    artist = {
+        "api_path": f"/artists/{song['id']}", "header_image_url": "", "id": song["id"], "image_url": "",
+        "is_meme_verified": False, "is_verified": False, "name": song["artist"], "url": f"https://genius.com/artists/{song['id']}",
+    }
+    return {
+        "annotation_count": 0, "api_path": f"/songs/{song['id']}", "full_title": f"{title} by {song['artist']}",
+        "header_image_thumbnail_url": "", "header_image_url": "", "id": song["id"], "instrumental": False,
+        "lyrics_owner_id": 0, "lyrics_state": "complete", "path": f"/stub-lyrics-{song['id']}",
+        "primary_artist": artist, "pyongs_count": 0, "song_art_image_thumbnail_url": "", "song_art_image_url": "",
+        "stats": {"unreviewed_annotations": 0, "hot": False}, "title": title, "title_with_featured": title,
+        "url": f"https://genius.com/stub-lyrics-{song['id']}",
+    }
+
+def musicbrainz_xml(title) -> str:
+    recordings = ""
+    if title is not None:
+        song = CANNED_SONGS[title]
+        tags = "".join(f'<tag count="1"><name>{escape(tag)}</name></tag>' for tag in song["tags"])
+        recordings = (
+            f'<recording id="00000000-0000-0000-0000-{song["id"]:012d}" ns2:score="100">'
+            f'<title>{escape(title)}</title><first-release-date>{song["year"]}-01-01</first-release-date>'
+            f'<tag-list>{tags}</tag-list><release-list count="1"><release id="00000000-0000-0000-0001-{song["id"]:012d}">'
+            f'<title>{escape(title)}</title><date>{song["year"]}-01-01</date></release></release-list></recording>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<metadata xmlns="http://musicbrainz.org/ns/mmd-2.0#" xmlns:ns2="http://musicbrainz.org/ns/ext#-2.0">'
+        f'<recording-list count="{1 if recordings else 0}" offset="0">{recordings}</recording-list></metadata>'
+    )
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serves canned Genius and MusicBrainz answers:
+
+        /ws/2/recording           MusicBrainz recording search (XML)
+        /api/search/multi         Genius public search
+        /v1/songs/<id>            Genius song details
+        /web/stub-lyrics-<id>     Genius lyrics page
+    """
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append(self.path)
+
+        if url.path.startswith("/ws/2/recording"):
+            title = find_title(params.get("query", ""))
+            if title in FAILING_TITLES:
+                return self.reply(500, "text/plain", "stub failure")
+            return self.reply(200, "application/xml", musicbrainz_xml(title))
+        if url.path == "/api/search/multi":
+            title = find_title(params.get("q", ""))
+            if title in FAILING_TITLES:
+                return self.reply(500, "text/plain", "stub failure")
+            hits = [{"index": "song", "type": "song", "result": genius_song(title)}] if title else []
+            sections = [{"type": "top_hit", "hits": hits}, {"type": "song", "hits": hits}]
+            return self.reply(200, "application/json", json.dumps({"meta": {"status": 200}, "response": {"sections": sections}}))
+        if url.path.startswith("/v1/songs/"):
+            song_id = int(url.path.rsplit("/", 1)[-1])
+            title = next(t for t, song in CANNED_SONGS.items() if song["id"] == song_id)
+            return self.reply(200, "application/json", json.dumps({"meta": {"status": 200}, "response": {"song": genius_song(title)}}))
+        if url.path.startswith("/web/stub-lyrics-"):
+            song_id = int(url.path.rsplit("-", 1)[-1])
+            title = next(t for t, song in CANNED_SONGS.items() if song["id"] == song_id)
+            body = "<br/>".join([f"{title} Lyrics"] + CANNED_SONGS[title]["lyrics"].split("\n"))
+            page = f'<html><body><div class="Lyrics__Root"><div class="Lyrics__Container-stub" data-lyrics-container="true">{body}</div></div></body></html>'
+            return self.reply(200, "text/html", page)
+        self.reply(404, "text/plain", "not found")
+
+    def reply(self, status: int, content_type: str, body: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def check(verbose: bool) -> bool:
+    print("--- 🚀 Lookup Cache Check Against a Local Stub Server ---")
+    server = start_stub_server()
+    host = f"127.0.0.1:{server.server_address[1]}"
+    print(f"Stub Genius/MusicBrainz server listening on {host}")
+
+    # The clients read their endpoints at import time.
+    os.environ.setdefault("GENIUS_ACCESS_TOKEN", "stub-token")
+    os.environ["GENIUS_API_ROOT"] = f"http://{host}/v1/"
+    os.environ["GENIUS_PUBLIC_API_ROOT"] = f"http://{host}/api/"
+    os.environ["GENIUS_WEB_ROOT"] = f"http://{host}/web/"
+    os.environ["MUSICBRAINZ_HOST"] = host
+    os.environ["MUSICBRAINZ_HTTPS"] = "False"
+    from ai_core.core import lyric_fetcher, metadata_enricher
+    from ai_core.core.lookup_cache import LookupCache
+    lyric_fetcher.genius.sleep_time = 0
+    metadata_enricher.mb.set_rate_limit(False)
+
+    services = [
+        ("lyrics", lyric_fetcher.LYRICS_SERVICE, lyric_fetcher.fetch_lyrics),
+        ("metadata", metadata_enricher.METADATA_SERVICE, metadata_enricher.fetch_metadata),
+    ]
+    results = []
+
+    def expect(name: str, passed: bool, detail: str = ""):
+        results.append(passed)
+        print(f"{'✅' if passed else '❌'} {name}{f' ({detail})' if detail and (verbose or not passed) else ''}")
+
+    def lookup(cache, service, fetch, artist, title):
+        before = len(server.requests)
+        value = cache.cached(service, fetch, artist, title)
+        return value, len(server.requests) - before
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "lookup_cache.db"
+        cache = LookupCache(path)
+
+        for label, service, fetch in services:
+            print(f"\n{label}:")
+            for title, song in CANNED_SONGS.items():
+                value, calls = lookup(cache, service, fetch, song["artist"], title)
+                expected = song["year"] if label == "metadata" else song["lyrics"].split("\n")[-1]
+                found = value is not None and expected in (value.get("year") if label == "metadata" else value)
+                expect(f"hit fetched: {song['artist']} - {title}", found and calls > 0, f"{calls} requests, value {value!r}")
+                again, calls = lookup(cache, service, fetch, song["artist"].upper(), f"{title} (feat. Someone)")
+                expect(f"hit served from cache: {song['artist']} - {title}", again == value and calls == 0, f"{calls} requests")
+
+            value, calls = lookup(cache, service, fetch, "Nobody", "Unknown Song")
+            expect("miss fetched", value is None and calls > 0, f"{calls} requests")
+            value, calls = lookup(cache, service, fetch, "Nobody", "Unknown Song")
+            expect("miss served from cache", value is None and calls == 0, f"{calls} requests")
+
+            value, calls = lookup(cache, service, fetch, "Somebody", FAILING_TITLES[0])
+            expect("server error is not cached", value is None and calls > 0 and cache.get(service, "Somebody", FAILING_TITLES[0]) is None)
+
+        # Entries written with a zero TTL are expired straight away.
+        print("\nTTL:")
+        path = Path(tmp) / "expiring_lookup_cache.db"
+        expiring = LookupCache(path, hit_ttl_days=0, miss_ttl_days=0)
+        for label, service, fetch in services:
+            title, song = next(iter(CANNED_SONGS.items()))
+            lookup(expiring, service, fetch, song["artist"], title)
+            lookup(expiring, service, fetch, "Nobody", "Unknown Song")
+            _, hit_calls = lookup(expiring, service, fetch, song["artist"], title)
+            _, miss_calls = lookup(expiring, service, fetch, "Nobody", "Unknown Song")
+            expect(f"expired {label} entries are fetched again", hit_calls > 0 and miss_calls > 0, f"{hit_calls}/{miss_calls} requests")
+
+        # Offline mode serves the expired entries above and fetches nothing.
+        print("\nOffline:")
+        offline = LookupCache(path, offline=True)
+        for label, service, fetch in services:
+            title, song = next(iter(CANNED_SONGS.items()))
+            value, calls = lookup(offline, service, fetch, song["artist"], title)
+            expect(f"expired {label} entry served offline", value is not None and calls == 0, f"{calls} requests")
+            value, calls = lookup(offline, service, fetch, "Another", "Uncached Song")
+            expect(f"uncached {label} lookup makes no request", value is None and calls == 0, f"{calls} requests")
+        stats = offline.prefetch(services[0][1], services[0][2], [("Another", "Uncached Song")])
+        expect("offline prefetch makes no request", stats == {"cached": 0, "hits": 0, "misses": 0, "errors": 0})
+
+    server.shutdown()
+    passed = all(results)
+    print(f"\n{'✅' if passed else '❌'} {sum(results)}/{len(results)} checks passed, {len(server.requests)} stub requests served.")
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exercise the lyric/metadata lookup cache against a local stub of Genius and MusicBrainz.")
+    parser.add_argument("--verbose", action="store_true", help="Show request counts and values for passing checks too.")
+    args = parser.parse_args()
+    sys.exit(0 if check(args.verbose) else 1)
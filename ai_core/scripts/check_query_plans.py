@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from ai_core import history_db
+from ai_core.database import models
+from ai_core.database.session import build_engine
+from ai_core.core import fingerprint_engine, recommender_engine
+
+# Each hot table and the indexes its queries are allowed to use.
+EXPECTED_INDEXES = {
+    "user_events": ("ix_user_events_user_event_song", "ix_user_events_user_song"),
+    "history": ("ix_history_timestamp", "ix_history_user_timestamp", "ix_history_session_timestamp"),
+}
+
+def check_plan(explain, statement, params, table):
+    """
+    Runs EXPLAIN QUERY PLAN for one captured statement and returns a failure
+    message if it touches `table` with a full table scan or a temp sort.
+    """
+    plan = [row[-1] for row in explain("EXPLAIN QUERY PLAN " + statement, params)]
+    failures = []
+    for step in plan:
+        if step == f"SCAN {table}":
+            failures.append(f"full table scan of {table}")
+        if f" {table} " in f" {step} " and "INDEX" in step and not any(ix in step for ix in EXPECTED_INDEXES[table]):
+            failures.append(f"unexpected index on {table}: {step}")
+        # Ranked full-text matches are sorted by relevance, which is expected.
+        if "TEMP B-TREE FOR ORDER BY" in step and table == "history" and "history_fts" not in statement:
+            failures.append("ORDER BY timestamp needs a temp sort")
+    if failures:
+        return f"{statement.strip()}\n      plan: {plan}\n      problems: {failures}"
+    return None
+
+def check_personalization_queries():
+    """Captures the SQL issued by the fingerprint and recommender engines."""
+    engine = build_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    embedding = np.ones(768, dtype=np.float32).tobytes()
+    db.add_all([models.Song(id=i, filepath=f"song_{i}.mp3", title=f"Song {i}", artist="Artist", clip_embedding=embedding) for i in range(1, 11)])
+    db.add_all([models.UserEvent(user_id=1, song_id=i, event_type="SONG_PLAYED_FULL") for i in range(1, 6)])
+    db.commit()
+
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "user_events" in statement and not statement.startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    fingerprint = fingerprint_engine.calculate_user_fingerprint(1, db)
+    db.add(models.UserFingerprint(user_id=1, fingerprint_vector=fingerprint.tobytes()))
+    db.commit()
+    recommender_engine.get_recommendations(1, db, limit=3)
+
+    raw = engine.raw_connection()
+    explain = lambda sql, params: raw.cursor().execute(sql, params).fetchall()
+    failures = [check_plan(explain, statement, params, "user_events") for statement, params in captured]
+    raw.close()
+    db.close()
+    return len(captured), [f for f in failures if f]
+
+def check_history_queries():
+    """Captures the SQL issued by history_db's read functions."""
+    with tempfile.TemporaryDirectory() as tmp:
+        history_db.manager = history_db.HistoryConnectionManager(Path(tmp) / "history.db")
+        history_db.add_events(
+            {"event_type": "search", "user_id": f"user-{i % 3}", "session_id": f"s{i % 5}", "payload": {"query": "jazz"}}
+            for i in range(50)
+        )
+
+        captured = []
+        conn = history_db.manager.connection()
+        conn.set_trace_callback(lambda sql: captured.append(sql) if sql.lstrip().startswith("SELECT") else None)
+        history_db.get_history(limit=10)
+        history_db.get_history(limit=10, session_id="s1")
+        history_db.search_history(user_id="user-1", limit=10)
+        history_db.search_history(event_type="search", keyword="jazz", limit=10)
+        page = history_db.get_history(limit=10)
+        history_db.get_history(limit=10, cursor=history_db.encode_cursor(page[-1]))
+        history_db.search_history(user_id="user-1", limit=10, cursor=history_db.encode_cursor(page[-1]))
+        conn.set_trace_callback(None)
+
+        explain = lambda sql, params: conn.execute(sql, params).fetchall()
+        failures = [check_plan(explain, statement, (), "history") for statement in captured]
+        history_db.manager.close_all()
+    return len(captured), [f for f in failures if f]
+
+def run_checks():
+    print("--- 🚀 Query Plan Regression Check ---")
+    all_failures = []
+    for name, check in (("personalization", check_personalization_queries), ("history", check_history_queries)):
+        count, failures = check()
+        status = "✅ PASS" if not failures else "❌ FAIL"
+        print(f"{status}: {name} ({count} queries inspected)")
+        for failure in failures:
+            print(f"    - {failure}")
+        all_failures.extend(failures)
+    return not all_failures
+
+if __name__ == "__main__":
+    sys.exit(0 if run_checks() else 1)
@@ -0,0 +1,61 @@
+import sys
+import time
+import argparse
+import warnings
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+warnings.filterwarnings("ignore")
+
+import numpy as np
+
+from ai_core.models.clip_embedder import SimpleClipEmbedder
+from ai_core.models.text_encoder import (
+    build_text_encoder, cosine_agreement, PROBE_QUERIES, TEXT_ENCODER_BACKENDS, TEXT_ENCODER_MIN_COSINE
+)
+
+MOODS = ["happy", "melancholic", "angry", "calm", "romantic", "nostalgic", "dreamy", "dark"]
+GENRES = ["pop", "rock", "jazz", "hip hop", "classical piano", "techno", "country", "reggae"]
+
+def make_queries(n: int):
+    queries = list(PROBE_QUERIES)
+    for i in range(n - len(queries)):
+        queries.append(f"{MOODS[i % len(MOODS)]} {GENRES[(i // len(MOODS)) % len(GENRES)]} song with vocals")
+    return queries[:n]
+
+def per_query_ms(encoder, queries):
+    """Mean latency of encoding one query at a time, as the search endpoint does."""
+    encoder.encode(queries[:2])  # warm-up
+    start = time.perf_counter()
+    embeddings = np.stack([encoder.encode([query])[0] for query in queries])
+    return embeddings, (time.perf_counter() - start) / len(queries) * 1000
+
+def check(backend: str, n_queries: int, min_cosine: float) -> bool:
+    print(f"--- 🚀 Text Encoder Check: fp32 vs '{backend}' ---")
+    embedder = SimpleClipEmbedder(device="cpu")
+    queries = make_queries(n_queries)
+
+    reference, fp32_ms = per_query_ms(embedder.text_encoder, queries)
+    # Built with no agreement floor so the numbers are reported either way.
+    candidate_encoder = build_text_encoder(embedder.model, backend, min_cosine=-1.0)
+    candidate, candidate_ms = per_query_ms(candidate_encoder, queries)
+
+    agreement = cosine_agreement(reference, candidate)
+    print(f"\n{len(queries)} queries, single-query latency:")
+    print(f"  fp32: {fp32_ms:7.2f} ms/query")
+    print(f"  {backend}: {candidate_ms:7.2f} ms/query ({fp32_ms / candidate_ms:.2f}x)")
+    print(f"  cosine agreement: min {agreement.min():.4f}, mean {agreement.mean():.4f}")
+
+    passed = agreement.min() >= min_cosine
+    print(f"\n{'✅' if passed else '❌'} Minimum agreement {'meets' if passed else 'is below'} the {min_cosine} threshold.")
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare an optimized text encoder backend against the fp32 model.")
+    parser.add_argument("--backend", choices=[b for b in TEXT_ENCODER_BACKENDS if b != "torch"], default="torch-int8")
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--min-cosine", type=float, default=TEXT_ENCODER_MIN_COSINE)
+    args = parser.parse_args()
+    sys.exit(0 if check(args.backend, args.queries, args.min_cosine) else 1)
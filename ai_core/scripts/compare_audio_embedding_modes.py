@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import torch
+
+from ai_core.models.clip_embedder import SimpleClipEmbedder, load_audio, load_windows, compute_spectrograms
+
+AUDIO_DIR = project_root / "data" / "audio"
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def embed_all(embedder, files, load):
+    """Embeds every file with the given loader, timing decode/DSP and encoding separately."""
+    embeddings, decode_seconds, encode_seconds = [], 0.0, 0.0
+    for path in files:
+        start = time.perf_counter()
+        y, sr = load(str(path))
+        spectrograms = compute_spectrograms(y, sr)
+        decode_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        embeddings.append(embedder.embed_tracks([spectrograms], batch_size=len(spectrograms) if spectrograms.ndim == 3 else 1)[0])
+        encode_seconds += time.perf_counter() - start
+    return np.stack(embeddings), decode_seconds, encode_seconds
+
+def compare(limit: int, windows: int, window_seconds: float, top_k: int, output: str = None):
+    print("--- 🚀 Full-Track vs Windowed Audio Embedding ---")
+    files = sorted(AUDIO_DIR / f for f in os.listdir(AUDIO_DIR) if f.endswith('.mp3'))[:limit]
+    print(f"Comparing {len(files)} files; windowed mode uses {windows} x {window_seconds:.0f}s windows.\n")
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    embedder = SimpleClipEmbedder(device=device)
+
+    full, full_decode, full_encode = embed_all(embedder, files, load_audio)
+    windowed, win_decode, win_encode = embed_all(
+        embedder, files, lambda path: load_windows(path, n_windows=windows, window_seconds=window_seconds)
+    )
+
+    full, windowed = normalize(full), normalize(windowed)
+    cosine = np.sum(full * windowed, axis=1)
+
+    # Neighbourhood agreement: how many of each song's top-k neighbours under
+    # full-track embeddings are also its top-k under windowed embeddings.
+    k = min(top_k, len(files) - 1)
+    overlap = None
+    if k > 0:
+        def neighbours(vectors):
+            similarity = vectors @ vectors.T
+            np.fill_diagonal(similarity, -np.inf)
+            return np.argsort(-similarity, axis=1)[:, :k]
+        full_nn, win_nn = neighbours(full), neighbours(windowed)
+        overlap = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(full_nn, win_nn)]))
+
+    full_total, win_total = full_decode + full_encode, win_decode + win_encode
+    results = {
+        "files": len(files),
+        "windows": windows,
+        "window_seconds": window_seconds,
+        "full": {"decode_dsp_seconds": round(full_decode, 3), "encode_seconds": round(full_encode, 3), "seconds_per_track": round(full_total / len(files), 4)},
+        "windowed": {"decode_dsp_seconds": round(win_decode, 3), "encode_seconds": round(win_encode, 3), "seconds_per_track": round(win_total / len(files), 4)},
+        "speedup": round(full_total / win_total, 2) if win_total else None,
+        "cosine_mean": round(float(cosine.mean()), 4),
+        "cosine_min": round(float(cosine.min()), 4),
+        f"top{k}_neighbour_overlap": round(overlap, 4) if overlap is not None else None,
+    }
+
+    print(f"    full: {results['full']['seconds_per_track']:.3f} s/track (decode+DSP {full_decode:.1f}s, encode {full_encode:.1f}s)")
+    print(f"windowed: {results['windowed']['seconds_per_track']:.3f} s/track (decode+DSP {win_decode:.1f}s, encode {win_encode:.1f}s)")
+    print(f" speedup: {results['speedup']}x")
+    print(f"  cosine: mean {results['cosine_mean']:.4f}, min {results['cosine_min']:.4f}")
+    if overlap is not None:
+        print(f" top-{k} neighbour overlap: {overlap:.1%}")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output}.")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full-track and windowed audio embeddings for agreement and speed.")
+    parser.add_argument("--limit", type=int, default=50, help="Number of audio files to compare.")
+    parser.add_argument("--windows", type=int, default=4)
+    parser.add_argument("--window-seconds", type=float, default=10.0)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output", help="Optional path for a JSON copy of the results.")
+    args = parser.parse_args()
+    compare(args.limit, args.windows, args.window_seconds, args.top_k, args.output)
@@ -0,0 +1,53 @@
+import sys
+import argparse
+from itertools import tee
+from operator import itemgetter
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+from ai_core.database.session import SessionLocal
+from ai_core.database import models
+from ai_core import embeddings
+
+def iter_song_texts(db, fields, chunk_size):
+    """Streams (id, text, metadata) for every non-empty lyric/summary field."""
+    columns = [getattr(models.Song, field) for field in fields]
+    rows = db.query(models.Song.id, *columns).order_by(models.Song.id).yield_per(chunk_size)
+    for row in rows:
+        for field in fields:
+            text = getattr(row, field)
+            if text:
+                yield f"song:{row.id}:{field}", text, {"song_id": row.id, "field": field}
+
+def index_song_texts(fields, chunk_size: int, batch_size: int):
+    """
+    Indexes song lyrics and summaries without loading them all at once. Ids
+    are per song and field, so a changed text replaces its old vector and
+    unchanged texts are skipped on re-runs.
+    """
+    print("--- 🚀 Indexing Song Texts into the Embeddings Collection ---")
+    db = SessionLocal()
+    try:
+        # add_texts reads the three views a chunk at a time, so tee only
+        # buffers about one chunk.
+        streams = tee(iter_song_texts(db, fields, chunk_size), 3)
+        ids, texts, metadatas = (map(itemgetter(index), stream) for index, stream in enumerate(streams))
+        stats = embeddings.add_texts(texts, ids=ids, metadatas=metadatas, chunk_size=chunk_size, batch_size=batch_size)
+    finally:
+        db.close()
+    print(
+        f"✅ {stats['received']} texts: {stats['added']} embedded, {stats['skipped']} unchanged, "
+        f"{stats['seconds']:.1f}s ({stats['texts_per_second']} texts/s)."
+    )
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream song lyrics and summaries into the embeddings collection.")
+    parser.add_argument("--fields", nargs="+", choices=["lyrics", "lyric_summary"], default=["lyrics", "lyric_summary"])
+    parser.add_argument("--chunk-size", type=int, default=embeddings.EMBEDDINGS_CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=embeddings.EMBEDDINGS_BATCH_SIZE)
+    args = parser.parse_args()
+    index_song_texts(args.fields, args.chunk_size, args.batch_size)
@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import tempfile
+import argparse
+import contextlib
+from collections import Counter, defaultdict
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+import httpx
+import numpy as np
+
+SEARCH_QUERIES = [
+    "upbeat summer pop song", "sad piano ballad", "aggressive heavy metal", "chill lofi beats",
+    "energetic dance track", "acoustic folk guitar", "dark synthwave", "jazzy saxophone solo",
+]
+DEFAULT_MIX = {"ingest": 50, "recommendations": 20, "search": 15, "history": 10, "fingerprint": 5}
+# ai_core.main does not mount the history router, so a running server has no
+# /api/v1/history; only the in-process app adds it.
+SERVER_ENDPOINTS = {"ingest", "recommendations", "search", "fingerprint"}
+
+def build_request(endpoint: str, rng: random.Random, n_users: int, n_songs: int):
+    """Returns (method, path, kwargs) for one call to `endpoint` by a random simulated user."""
+    user_id = rng.randint(1, n_users)
+    if endpoint == "ingest":
+        event_type = rng.choice(["SONG_PLAYED_FULL", "SONG_PLAYED_FULL", "SONG_PLAYED_FULL", "SKIP"])
+        return "POST", "/api/v1/ingest-event", {"json": {"user_id": user_id, "song_id": rng.randint(1, n_songs), "event_type": event_type}}
+    if endpoint == "fingerprint":
+        return "POST", f"/api/v1/users/{user_id}/generate-fingerprint", {}
+    if endpoint == "recommendations":
+        return "GET", f"/api/v1/users/{user_id}/recommendations", {"params": {"limit": 10}}
+    if endpoint == "search":
+        return "GET", "/api/v1/search/semantic", {"params": {"q": rng.choice(SEARCH_QUERIES), "limit": 10}}
+    if endpoint == "history":
+        return "GET", "/api/v1/history", {"params": {"limit": 10}}
+    raise ValueError(f"Unknown endpoint '{endpoint}'.")
+
+def parse_mix(entries) -> dict:
+    """Parses "endpoint=weight" pairs, e.g. ["ingest=70", "search=30"]."""
+    mix = {}
+    for entry in entries:
+        endpoint, _, weight = entry.partition("=")
+        if endpoint not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{endpoint}'. Choose from {', '.join(DEFAULT_MIX)}.")
+        mix[endpoint] = float(weight or 1)
+    return mix
+
+def build_app(with_search: bool):
+    """
+    The API app: ai_core.main's, or without chromadb (which the search
+    routes import) one with the same middleware and the other routers.
+    """
+    if with_search:
+        from ai_core.main import app
+        return app
+    from fastapi import FastAPI
+    from ai_core.api import ingestion, personalization, metrics
+    from ai_core.database import models
+    models.create_db_and_tables()
+    app = FastAPI(title="Acytel Music AI (load test, no vector store)")
+    app.include_router(ingestion.router, prefix="/api/v1")
+    app.include_router(personalization.router, prefix="/api/v1")
+    app.include_router(metrics.router)
+    app.add_middleware(metrics.MetricsMiddleware)
+    return app
+
+def setup_in_process_app(workdir: Path, n_songs: int, n_users: int, events_per_user: int, dim: int, seed: int):
+    """
+    Builds the API app against a synthetic catalog in `workdir`, with the CLIP
+    embedder replaced by the benchmark StubEmbedder so no model is loaded.
+    Every simulated user starts with a fingerprint and a listening history.
+
+    Returns:
+        The app and the set of endpoints it serves; "search" is left out
+        when chromadb is not installed.
+    """
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'load_test.db'}"
+    from ai_core.models import clip_embedder
+    from ai_core.scripts.benchmark_suite import StubEmbedder, build_catalog, random_embeddings, synthetic_song
+    clip_embedder.SimpleClipEmbedder = lambda **kwargs: StubEmbedder(dim)
+
+    try:
+        import chromadb
+    except ImportError as e:
+        print(f"Skipping the search endpoint: {e}")
+        chromadb = None
+    from ai_core import history_db, history_routes
+    from ai_core.database import models
+    from ai_core.database.session import SessionLocal
+    from ai_core.core.fingerprint_engine import calculate_user_fingerprint
+    from ai_core.core.vector_metadata import song_metadata
+    from types import SimpleNamespace
+    app = build_app(with_search=chromadb is not None)
+    endpoints = set(DEFAULT_MIX) if chromadb is not None else set(DEFAULT_MIX) - {"search"}
+
+    catalog = build_catalog(SessionLocal, n_songs, n_users, events_per_user, dim, seed)
+    db = SessionLocal()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            fingerprints = [(user_id, calculate_user_fingerprint(user_id, db)) for user_id in range(1, n_users + 1)]
+        db.add_all([
+            models.UserFingerprint(user_id=user_id, fingerprint_vector=vector.astype(np.float32).tobytes())
+            for user_id, vector in fingerprints if vector is not None
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    if chromadb is not None:
+        from ai_core.api import search_routes
+        # The same seed regenerates the catalog's embeddings for the vector store.
+        rng = np.random.default_rng(seed)
+        collection = chromadb.PersistentClient(path=str(workdir / "chroma")).get_or_create_collection(name="load_test_songs")
+        for first in range(1, n_songs + 1, 5000):
+            ids = range(first, min(first + 5000, n_songs + 1))
+            embeddings = random_embeddings(rng, len(ids), dim)
+            collection.upsert(
+                ids=[str(song_id) for song_id in ids],
+                embeddings=embeddings.tolist(),
+                metadatas=[song_metadata(SimpleNamespace(**synthetic_song(song_id, embeddings[i]))) for i, song_id in enumerate(ids)],
+            )
+        search_routes.vector_collection = collection
+
+    # The history API is a separate router; mount it so the mix can reach it.
+    history_db.manager = history_db.HistoryConnectionManager(workdir / "history.db")
+    history_db.init_db()
+    history_db.add_events(
+        {"event_type": "search", "user_id": f"user-{i % n_users}", "payload": {"query": SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}}
+        for i in range(n_users * 10)
+    )
+    app.include_router(history_routes.router, prefix="/api/v1")
+    print(f"Built an in-process app with {catalog['songs']} songs, {catalog['users']} users and {catalog['events']} events.")
+    return app, endpoints
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, endpoint: str, latency: float, status) -> None:
+        self.latencies[endpoint].append(latency)
+        self.statuses[endpoint][status] += 1
+
+    def report(self, wall_seconds: float) -> dict:
+        def summarize(latencies, statuses):
+            latencies_ms = np.asarray(latencies) * 1000
+            errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+            return {
+                "requests": len(latencies),
+                "errors": errors,
+                "error_rate": round(errors / len(latencies), 4),
+                "throughput_rps": round(len(latencies) / wall_seconds, 2),
+                "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+                "p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+                "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+                "max_ms": round(float(latencies_ms.max()), 2),
+                "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            }
+
+        endpoints = {endpoint: summarize(self.latencies[endpoint], self.statuses[endpoint]) for endpoint in sorted(self.latencies)}
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        total = summarize(all_latencies, sum(self.statuses.values(), Counter())) if all_latencies else None
+        return {"wall_seconds": round(wall_seconds, 3), "total": total, "endpoints": endpoints}
+
+async def run_load(client: httpx.AsyncClient, mix: dict, rate: float, duration: float, n_users: int, n_songs: int,
+                   max_in_flight: int, timeout: float, seed: int) -> dict:
+    """
+    Open-loop load: requests are started on a Poisson schedule at `rate` per
+    second, whether or not earlier ones have finished. Latency is measured
+    from each request's scheduled start, so a backed-up server shows up in
+    the percentiles instead of silently lowering the request rate.
+    """
+    rng = random.Random(seed)
+    endpoints, weights = zip(*mix.items())
+    in_flight = asyncio.Semaphore(max_in_flight)
+    recorder = Recorder()
+
+    async def call(endpoint, scheduled):
+        method, path, kwargs = build_request(endpoint, rng, n_users, n_songs)
+        async with in_flight:
+            try:
+                # wait_for also bounds in-process calls, which ignore the client timeout.
+                response = await asyncio.wait_for(client.request(method, path, **kwargs), timeout)
+                status = response.status_code
+            except (httpx.HTTPError, asyncio.TimeoutError) as e:
+                status = type(e).__name__
+        recorder.record(endpoint, time.perf_counter() - scheduled, status)
+
+    tasks = []
+    start = time.perf_counter()
+    next_at = start
+    while next_at < start + duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(call(rng.choices(endpoints, weights)[0], next_at)))
+        next_at += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    return recorder.report(time.perf_counter() - start)
+
+def print_report(report: dict) -> None:
+    print(f"\n--- Load Test: {report['total']['requests']} requests in {report['wall_seconds']:.1f}s ---")
+    print(f"{'endpoint':<16}{'requests':>9}{'rps':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in list(report["endpoints"].items()) + [("TOTAL", report["total"])]:
+        print(
+            f"{name:<16}{stats['requests']:>9}{stats['throughput_rps']:>9}{stats['error_rate']:>8.1%}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}"
+        )
+
+async def main(args) -> dict:
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    workdir = None
+    if args.url:
+        available = SERVER_ENDPOINTS
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        workdir = Path(tempfile.mkdtemp(prefix="load_test_"))
+        app, available = setup_in_process_app(workdir, args.songs, args.users, args.events_per_user, args.dim, args.seed)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://load-test", timeout=args.timeout)
+    # Calls the target cannot serve would only count as errors.
+    unavailable = sorted(set(mix) - available)
+    if unavailable:
+        print(f"Leaving {', '.join(unavailable)} out of the mix: not served by {args.url or 'the in-process app'}.")
+        mix = {endpoint: weight for endpoint, weight in mix.items() if endpoint in available}
+    if not mix:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+        raise SystemExit("No endpoint in the mix is available.")
+
+    print(f"Running {args.rate} requests/s for {args.duration}s against {args.url or 'the in-process app'} with mix {mix}...")
+    try:
+        async with client:
+            report = await run_load(client, mix, args.rate, args.duration, args.users, args.songs, args.max_in_flight, args.timeout, args.seed)
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    report["config"] = {
+        "target": args.url or "in-process", "mix": mix, "rate": args.rate, "duration": args.duration,
+        "users": args.users, "songs": args.songs, "max_in_flight": args.max_in_flight, "seed": args.seed,
+    }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive a mix of API calls from many simulated users at a target rate.")
+    parser.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8001. Omit to test an in-process app with stubbed models.")
+    parser.add_argument("--mix", nargs="+", metavar="ENDPOINT=WEIGHT",
+                        help=f"Relative endpoint weights (default: {' '.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}).")
+    parser.add_argument("--rate", type=float, default=50.0, help="Target requests per second.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load for.")
+    parser.add_argument("--users", type=int, default=200, help="Simulated users.")
+    parser.add_argument("--songs", type=int, default=5000, help="Catalog size (must match the server's catalog with --url).")
+    parser.add_argument("--events-per-user", type=int, default=50, help="Seeded listening history per user (in-process only).")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding size of the synthetic catalog (in-process only).")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request counts as failed.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report as JSON to this file.")
+    args = parser.parse_args()
+
+    print("--- 🚀 API Load Test ---")
+    report = asyncio.run(main(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.output}")
@@ -0,0 +1,55 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+from ai_core.core.lookup_cache import lookup_cache
+from ai_core.core.enrichment import enrichment_services
+
+METADATA_PATH = project_root / "data" / "metadata.json"
+
+def load_pairs(from_db: bool):
+    """Returns the unique (artist, title) pairs from metadata.json or the songs table."""
+    if from_db:
+        from ai_core.database.session import SessionLocal
+        from ai_core.database import models
+        db = SessionLocal()
+        try:
+            rows = db.query(models.Song.artist, models.Song.title).all()
+        finally:
+            db.close()
+        pairs = [(row.artist, row.title) for row in rows]
+    else:
+        with open(METADATA_PATH, 'r') as f:
+            pairs = [(m.get('artist'), m.get('title')) for m in json.load(f)]
+    return list(dict.fromkeys((artist, title) for artist, title in pairs if artist and title))
+
+def prefetch(services, from_db: bool):
+    """
+    Warms the on-disk lookup cache for the whole library so that later
+    analysis runs, including offline ones, never wait on the remote APIs.
+    """
+    print("--- 🚀 Prefetching Lyric and Metadata Lookups ---")
+    pairs = load_pairs(from_db)
+    print(f"Found {len(pairs)} unique artist/title pairs.")
+
+    # The rate-limited fetchers keep a cold prefetch within the APIs' limits.
+    for service, (cache_service, fetch) in enrichment_services(services).items():
+        stats = lookup_cache.prefetch(cache_service, fetch, pairs)
+        print(
+            f"{service:>8}: {stats['cached']} already cached, {stats['hits']} found, "
+            f"{stats['misses']} not found, {stats['errors']} failed"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm the on-disk lyric and MusicBrainz lookup cache.")
+    parser.add_argument("--services", nargs="+", choices=["lyrics", "metadata"], default=["lyrics", "metadata"])
+    parser.add_argument("--from-db", action="store_true", help="Read songs from the database instead of metadata.json.")
+    parser.add_argument("--offline", action="store_true", help="Only report cache coverage; make no remote calls.")
+    args = parser.parse_args()
+    lookup_cache.offline = args.offline
+    prefetch(args.services, args.from_db)
@@ -0,0 +1,115 @@
+import sys
+import time
+import argparse
+import warnings
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+warnings.filterwarnings("ignore")
+
+import torch
+from sqlalchemy import bindparam
+
+from ai_core.database.session import SessionLocal
+from ai_core.database import models
+from ai_core.models.clip_embedder import (
+    SimpleClipEmbedder, load_audio, load_windows, compute_spectrograms, embedding_params, AUDIO_EMBEDDING_MODE
+)
+from ai_core.core import catalog
+from ai_core.core.feature_cache import FeatureCache, file_hash
+from ai_core.core.vector_metadata import song_metadata
+
+VECTOR_DB_PATH = project_root / "data" / "vector_db"
+VECTOR_DB_COLLECTION = "song_thought_vectors"
+
+def iter_spectrograms(songs, feature_cache, cached_only, stats):
+    """Yields (song_id, spectrogram), preferring cached features over decoding."""
+    for song_id, filepath, *_ in songs:
+        try:
+            key = file_hash(filepath)
+            spectrogram = feature_cache.get(key)
+            if spectrogram is None:
+                if cached_only:
+                    stats["skipped"] += 1
+                    continue
+                y, sr = (load_windows if AUDIO_EMBEDDING_MODE == "windowed" else load_audio)(filepath)
+                spectrogram = compute_spectrograms(y, sr)
+                feature_cache.put(key, spectrogram)
+                stats["decoded"] += 1
+            else:
+                stats["cached"] += 1
+        except Exception as e:
+            print(f"Error processing file {filepath}: {e}")
+            stats["skipped"] += 1
+            continue
+        yield song_id, spectrogram
+
+def reembed(target: str, batch_size: int, cached_only: bool):
+    print("--- 🚀 Re-embedding the Library from Cached Spectrograms ---")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    clip_embedder = SimpleClipEmbedder(device=device)
+    feature_cache = FeatureCache(embedding_params())
+    vector_collection = None
+    if target == "chroma":
+        import chromadb
+        vector_collection = chromadb.PersistentClient(path=str(VECTOR_DB_PATH)).get_or_create_collection(name=VECTOR_DB_COLLECTION)
+
+    db = SessionLocal()
+    try:
+        songs = db.query(
+            models.Song.id, models.Song.filepath, models.Song.bpm, models.Song.key, models.Song.artist, models.Song.year
+        ).order_by(models.Song.id).all()
+        songs_by_id = {song.id: song for song in songs}
+        print(f"Re-embedding {len(songs)} songs into {target}.")
+
+        songs_table = models.Song.__table__
+        update_embedding = (
+            songs_table.update()
+            .where(songs_table.c.id == bindparam("b_id"))
+            .values(clip_embedding=bindparam("b_embedding"))
+        )
+
+        def flush(batch):
+            embeddings = clip_embedder.embed_tracks([spectrogram for _, spectrogram in batch], batch_size=batch_size)
+            if vector_collection is not None:
+                vector_collection.upsert(
+                    ids=[str(song_id) for song_id, _ in batch],
+                    embeddings=[e.tolist() for e in embeddings],
+                    metadatas=[song_metadata(songs_by_id[song_id]) for song_id, _ in batch]
+                )
+            else:
+                db.connection().execute(update_embedding, [
+                    {"b_id": song_id, "b_embedding": embedding.tobytes()}
+                    for (song_id, _), embedding in zip(batch, embeddings)
+                ])
+                db.commit()
+
+        start = time.perf_counter()
+        batch, stats, embedded = [], {"cached": 0, "decoded": 0, "skipped": 0}, 0
+        for song_id, spectrogram in iter_spectrograms(songs, feature_cache, cached_only, stats):
+            batch.append((song_id, spectrogram))
+            if len(batch) >= batch_size:
+                flush(batch)
+                embedded += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            embedded += len(batch)
+        elapsed = time.perf_counter() - start
+
+        if embedded:
+            catalog.bump_catalog_version(db)
+        print(f"\n✅ Re-embedded {embedded} songs in {elapsed:.1f}s ({embedded / elapsed if elapsed else 0:.1f} songs/s).")
+        print(f"Features: {stats['cached']} from cache, {stats['decoded']} decoded, {stats['skipped']} skipped.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed every song from cached spectrograms instead of decoding audio.")
+    parser.add_argument("--target", choices=["db", "chroma"], default="db", help="Write to songs.clip_embedding or the ChromaDB collection.")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--cached-only", action="store_true", help="Skip songs with no cached features instead of decoding them.")
+    args = parser.parse_args()
+    reembed(args.target, args.batch_size, args.cached_only)
@@ -1,12 +1,7 @@
-import os
 import sys
-import json
 from pathlib import Path
 import warnings
-import re
-from tqdm import tqdm
 import torch
-import numpy as np
 
 # --- Environment Setup ---
 # This ensures the script can find our other project modules
@@ -18,8 +13,8 @@ warnings.filterwarnings("ignore")
 from ai_core.database.session import SessionLocal
 from ai_core.database import models
 from ai_core.models.clip_embedder import SimpleClipEmbedder
-from ai_core.core import lyric_fetcher, metadata_enricher
-import librosa
+from ai_core.core import catalog
+from ai_core.core.library_pipeline import LibraryPipeline
 import chromadb
 
 # --- Configuration ---
@@ -27,6 +22,7 @@ AUDIO_DIR = project_root / "data" / "audio"
 METADATA_PATH = project_root / "data" / "metadata.json"
 VECTOR_DB_PATH = project_root / "data" / "vector_db"
 VECTOR_DB_COLLECTION = "song_thought_vectors"
+CHECKPOINT_PATH = project_root / "data" / "genesis_engine.checkpoint"
 
 def run_genesis_engine():
     """
@@ -35,7 +31,6 @@ def run_genesis_engine():
     """
     print("--- 🚀 Launching The Genesis Engine ---")
     
-    db = SessionLocal()
     device = "cuda" if torch.cuda.is_available() else "cpu"
     
     # Initialize our AI models and databases
@@ -43,71 +38,23 @@ def run_genesis_engine():
     chroma_client = chromadb.PersistentClient(path=str(VECTOR_DB_PATH))
     vector_collection = chroma_client.get_or_create_collection(name=VECTOR_DB_COLLECTION)
 
-    try:
-        # Load the user's original metadata file
-        with open(METADATA_PATH, 'r') as f:
-            metadata_list = json.load(f)
-        
-        audio_filenames = {f for f in os.listdir(AUDIO_DIR) if f.endswith('.mp3')}
-        print(f"Found {len(metadata_list)} metadata entries and {len(audio_filenames)} audio files.")
-
-        # --- Main Processing Loop ---
-        for metadata in tqdm(metadata_list, desc="Processing Library"):
-            title = metadata.get('title')
-            artist = metadata.get('artist')
-            if not title or not artist:
-                continue
-
-            # --- The Scribe Process ---
-            # 1. Find the matching audio file
-            best_match = next((fname for fname in audio_filenames if artist.lower() in fname.lower() and title.lower() in fname.lower()), None)
-            if not best_match:
-                print(f"Skipping '{title}': No matching audio file found.")
-                continue
-            
-            filepath_str = str(AUDIO_DIR / best_match)
-
-            # 2. Check if song already exists in our factual DB
-            song = db.query(models.Song).filter(models.Song.filepath == filepath_str).first()
-            if not song:
-                # 3. If not, enrich it with external data
-                print(f"\nNew song found: '{title}'. Enriching metadata...")
-                enriched_info = metadata_enricher.enrich_metadata(artist=artist, title=title)
-                lyrics_text = lyric_fetcher.get_lyrics(artist=artist, title=title)
+    # For now, the audio embedding is our "Thought Vector", stored in ChromaDB
+    # and linked by the song's SQL ID. In the future, we will fuse this with
+    # lyric and art vectors.
+    pipeline = LibraryPipeline(
+        "genesis_engine", METADATA_PATH, AUDIO_DIR, clip_embedder,
+        vector_collection=vector_collection,
+        store_audio_features=False,
+        services=("lyrics", "metadata"),
+        checkpoint_path=CHECKPOINT_PATH,
+    )
+    report = pipeline.run()
 
-                # 4. Create the new Song record for SQLite
-                song = models.Song(
-                    filepath=filepath_str,
-                    title=title,
-                    artist=artist,
-                    lyrics=lyrics_text,
-                    # We can add more enriched fields here later (e.g., year)
-                )
-                db.add(song)
-                db.commit()
-                db.refresh(song)
-            
-            # --- The Synapse Process ---
-            # 1. Check if the vector embedding already exists
-            existing_vector = vector_collection.get(ids=[str(song.id)])
-            if existing_vector['ids']:
-                continue # Skip if already processed
-
-            # 2. If not, generate the audio embedding
-            print(f"Generating audio embedding for '{title}'...")
-            audio_embedding = clip_embedder.get_audio_embedding_from_file(filepath_str)
-
-            if audio_embedding is not None:
-                # For now, the audio embedding is our "Thought Vector"
-                # In the future, we will fuse this with lyric and art vectors
-                thought_vector = audio_embedding
-
-                # 3. Store the "Thought Vector" in ChromaDB, linked by the song's SQL ID
-                vector_collection.add(
-                    ids=[str(song.id)],
-                    embeddings=[thought_vector.tolist()]
-                )
-        
+    db = SessionLocal()
+    try:
+        # Cached recommendations only go stale when songs were written.
+        if report["stages"]["persist"]["emitted"] > 0:
+            catalog.bump_catalog_version(db)
         song_count = db.query(models.Song).count()
         vector_count = vector_collection.count()
         print(f"\n--- ✅ Genesis Engine Complete ---")
@@ -0,0 +1,46 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+from ai_core.database.session import SessionLocal
+from ai_core.core import retention_engine
+
+def run(dry_run: bool, history_days: int, user_events_days: int, archive_dir: Path, convert_vacuum: bool = False):
+    """
+    Applies the event retention policy. Intended to run nightly, e.g. from cron:
+
+        0 3 * * * cd /app && python ai_core/scripts/run_retention.py
+    """
+    mode = "DRY RUN" if dry_run else "LIVE"
+    print(f"--- 🧹 Event Retention ({mode}) ---")
+    db = SessionLocal()
+    try:
+        report = retention_engine.run_retention(
+            db,
+            dry_run=dry_run,
+            history_days=history_days,
+            user_events_days=user_events_days,
+            archive_dir=archive_dir,
+            convert_vacuum=convert_vacuum,
+        )
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2, default=str))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll up, archive and vacuum old history and user_events rows.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived.")
+    parser.add_argument("--history-days", type=int, default=retention_engine.HISTORY_RETENTION_DAYS)
+    parser.add_argument("--user-events-days", type=int, default=retention_engine.USER_EVENTS_RETENTION_DAYS)
+    parser.add_argument("--archive-dir", type=Path, default=retention_engine.ARCHIVE_DIR)
+    parser.add_argument("--convert-vacuum", action="store_true",
+                        help="Allow a one-time, blocking full VACUUM to switch a database to incremental auto_vacuum.")
+    args = parser.parse_args()
+    run(args.dry_run, args.history_days, args.user_events_days, args.archive_dir, args.convert_vacuum)
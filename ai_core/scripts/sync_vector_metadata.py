@@ -0,0 +1,71 @@
+import sys
+import argparse
+from pathlib import Path
+
+# --- Environment Setup ---
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+import chromadb
+
+from ai_core.database.session import SessionLocal
+from ai_core.database import models
+from ai_core.core.vector_metadata import song_metadata
+from ai_core.core.enrichment import EnrichmentStage
+
+VECTOR_DB_PATH = project_root / "data" / "vector_db"
+VECTOR_DB_COLLECTION = "song_thought_vectors"
+
+def backfill_years(vector_ids: set):
+    """
+    Looks up the release year on MusicBrainz (through the lookup cache) for
+    every vectorized song that has none. Library analysis only fetches
+    metadata for songs it adds, so older catalogs often lack years.
+    """
+    db = SessionLocal()
+    try:
+        songs = db.query(models.Song.id, models.Song.artist, models.Song.title).filter(
+            models.Song.year.is_(None), models.Song.artist.isnot(None), models.Song.title.isnot(None)
+        ).all()
+    finally:
+        db.close()
+    songs = [song for song in songs if str(song.id) in vector_ids]
+    print(f"Looking up release years for {len(songs)} songs...")
+    with EnrichmentStage(services=("metadata",)) as enrichment:
+        for song in songs:
+            enrichment.submit(song.id, song.artist, song.title)
+    found = sum(1 for result in enrichment.results.values() if (result.get("metadata") or {}).get("year"))
+    print(f"Found a release year for {found} of {len(songs)} songs.")
+
+def sync_vector_metadata(batch_size: int, fill_years: bool = False):
+    """
+    Copies bpm, key, artist and year from the songs table onto every song
+    vector, so filtered semantic search sees current values. Vectors written
+    before filters existed have no metadata until this runs. With
+    `fill_years`, missing years are first looked up on MusicBrainz.
+    """
+    print("--- 🚀 Syncing Song Metadata into the Vector Database ---")
+    collection = chromadb.PersistentClient(path=str(VECTOR_DB_PATH)).get_or_create_collection(name=VECTOR_DB_COLLECTION)
+    vector_ids = set(collection.get(include=[])["ids"])
+    if fill_years:
+        backfill_years(vector_ids)
+
+    db = SessionLocal()
+    try:
+        songs = db.query(
+            models.Song.id, models.Song.bpm, models.Song.key, models.Song.artist, models.Song.year
+        ).order_by(models.Song.id).all()
+        songs = [song for song in songs if str(song.id) in vector_ids]
+        for start in range(0, len(songs), batch_size):
+            batch = songs[start:start + batch_size]
+            collection.update(ids=[str(song.id) for song in batch], metadatas=[song_metadata(song) for song in batch])
+        print(f"✅ Updated metadata for {len(songs)} of {len(vector_ids)} vectors.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy filterable song fields onto the ChromaDB song vectors.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--backfill-years", action="store_true", help="Look up missing release years on MusicBrainz first.")
+    args = parser.parse_args()
+    sync_vector_metadata(args.batch_size, args.backfill_years)
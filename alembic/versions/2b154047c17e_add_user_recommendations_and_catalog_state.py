@@ -0,0 +1,49 @@
+"""Add user_recommendations and catalog_state tables
+
+Revision ID: 2b154047c17e
+Revises: f218942c1f01
+Create Date: 2026-10-19 10:41:07.205519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b154047c17e'
+down_revision: Union[str, Sequence[str], None] = 'f218942c1f01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'catalog_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'user_recommendations',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('song_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('catalog_version', sa.Integer(), nullable=False),
+        sa.Column('fingerprint_updated', sa.DateTime(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['song_id'], ['songs.id']),
+        sa.PrimaryKeyConstraint('user_id', 'rank'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_recommendations')
+    op.drop_table('catalog_state')
@@ -0,0 +1,28 @@
+"""Add year column to songs
+
+Revision ID: 7c3e91d4a5b8
+Revises: 2b154047c17e
+Create Date: 2026-10-19 14:02:51.630184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e91d4a5b8'
+down_revision: Union[str, Sequence[str], None] = '2b154047c17e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('songs', sa.Column('year', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('songs', 'year')
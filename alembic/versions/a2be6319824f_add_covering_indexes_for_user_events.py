@@ -0,0 +1,34 @@
+"""Add covering indexes for user_events personalization queries
+
+Revision ID: a2be6319824f
+Revises: 0304f5e561c2
+Create Date: 2026-10-19 09:12:31.418220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2be6319824f'
+down_revision: Union[str, Sequence[str], None] = '0304f5e561c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Both composite indexes start with user_id, so the single-column index
+    # is redundant and only slows down event ingestion.
+    op.create_index('ix_user_events_user_event_song', 'user_events', ['user_id', 'event_type', 'song_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_user_events_user_song', 'user_events', ['user_id', 'song_id'], unique=False, if_not_exists=True)
+    op.drop_index('ix_user_events_user_id', table_name='user_events', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_user_events_user_id', 'user_events', ['user_id'], unique=False, if_not_exists=True)
+    op.drop_index('ix_user_events_user_song', table_name='user_events', if_exists=True)
+    op.drop_index('ix_user_events_user_event_song', table_name='user_events', if_exists=True)
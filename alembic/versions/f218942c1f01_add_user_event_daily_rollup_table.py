@@ -0,0 +1,37 @@
+"""Add user_event_daily rollup table
+
+Revision ID: f218942c1f01
+Revises: a2be6319824f
+Create Date: 2026-10-19 10:03:54.872631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f218942c1f01'
+down_revision: Union[str, Sequence[str], None] = 'a2be6319824f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_event_daily',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('song_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.String(length=10), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'event_type', 'song_id', 'day'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_event_daily')